@@ -1,21 +1,85 @@
-"""instantiates digiaccounts module and handles top level imports"""
-
-from digiaccounts.digiaccounts_io import XbrlParserDA, get_account_information_dictionary
-from digiaccounts.digiaccounts_data import (
-    get_single_fact,
-    get_accounting_software,
-    get_average_employees,
-    get_biological_assets,
-    get_dormant_state,
-    get_entity_equity,
-    get_entity_postcode,
-    get_entity_registered_name,
-    get_entity_registration,
-    get_entity_turnover,
-    get_intangible_assets,
-    get_investment_assets,
-    get_investment_property,
-    get_openclose_pairs,
-    get_plant_equipment,
-    get_startend_period
-)
+"""instantiates digiaccounts module and handles top level imports
+
+The exported functions and classes are imported lazily on first access, so that importing the package, or one of its
+lightweight modules such as digiaccounts_ids, does not load the XBRL parser, pymongo or NumPy.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'digiaccounts_ids': (
+        'create_unique_id',
+        'get_file_registration_period_from_filename',
+        'get_uuid'
+    ),
+    'digiaccounts_io': (
+        'TaxonomyCache',
+        'ThreadSafeHttpCache',
+        'XbrlParserDA',
+        'add_account_to_collection',
+        'get_account_information_dictionary',
+        'insert_accounts_in_collection',
+        'update_accounts_in_collection'
+    ),
+    'digiaccounts_aggregates': ('AccountAggregates',),
+    'digiaccounts_archive': ('ArchiveIndex', 'iter_archive_members'),
+    'digiaccounts_batch': (
+        'extract_accounts_threaded',
+        'iter_account_information',
+        'iter_account_information_budgeted'
+    ),
+    'digiaccounts_columnar': ('ColumnarWriter', 'read_columnar', 'to_masked_columns', 'write_financial_fact_table'),
+    'digiaccounts_cache': ('ResultCache', 'get_cached_account_information'),
+    'digiaccounts_postcodes': ('PostcodeIndex',),
+    'digiaccounts_names': ('NameIndex',),
+    'digiaccounts_validation': ('read_reference_csv', 'validate_extractions', 'write_mismatches'),
+    'digiaccounts_rules': ('evaluate_rules', 'get_violating_rows', 'summarise_rules'),
+    'digiaccounts_formats': ('extract_non_fraction_value',),
+    'digiaccounts_intern': ('InternTable',),
+    'digiaccounts_profiling': ('SamplingProfiler',),
+    'digiaccounts_replay': ('SlowFilingRecorder', 'replay_corpus'),
+    'digiaccounts_taxonomy': ('warm_taxonomy_cache',),
+    'digiaccounts_triage': ('Quarantine', 'prevalidate_ixbrl', 'triage_ixbrl', 'triage_ixbrl_file'),
+    'digiaccounts_profiles': (
+        'ExtractionProfile',
+        'get_account_information_dictionary_profiled',
+        'register_profile'
+    ),
+    'digiaccounts_data': (
+        'get_single_fact',
+        'get_accounting_software',
+        'get_average_employees',
+        'get_biological_assets',
+        'get_dormant_state',
+        'get_entity_equity',
+        'get_entity_postcode',
+        'get_entity_registered_name',
+        'get_entity_registration',
+        'get_entity_turnover',
+        'get_financial_fact_rows',
+        'get_intangible_assets',
+        'get_investment_assets',
+        'get_investment_property',
+        'get_openclose_pairs',
+        'get_plant_equipment',
+        'get_startend_period'
+    ),
+}
+
+_EXPORT_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_EXPORT_MODULES)
+
+
+def __getattr__(name):
+    """imports the module an exported name is defined in on first access"""
+    module = _EXPORT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
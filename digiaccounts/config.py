@@ -28,6 +28,10 @@ FACT_DIMENSION_EQUITY = 'EquityClassesDimension'
 MONGO_KEY_START_DATE = 'period_opening_current'
 MONGO_KEY_END_DATE = 'period_closing_current'
 MONGO_KEY_POSTAL_CODE = 'registered_office_post_code'
+MONGO_KEY_POSTCODE_OUTWARD = 'registered_office_post_code_outward'
+MONGO_KEY_POSTCODE_INWARD = 'registered_office_post_code_inward'
+MONGO_KEY_POSTCODE_AREA = 'registered_office_post_code_area'
+MONGO_KEY_POSTCODE_DISTRICT = 'registered_office_post_code_district'
 MONGO_KEY_DORMANT_STATE = 'dormant_state'
 MONGO_KEY_ENTITY_REGISTRATION = 'registration_number'
 MONGO_KEY_ENTITY_NAME = 'registered_name'
@@ -49,6 +53,82 @@ MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT = 'tangible_assets_value_closing_curre
 MONGO_KEY_TANGIBLE_ASSETS_CLOSING_PREVIOUS = 'tangible_assets_value_closing_previous'
 MONGO_KEY_EQUITY_CLOSING_CURRENT = 'balance_value_closing_current'
 MONGO_KEY_EQUITY_CLOSING_PREVIOUS = 'balance_value_closing_previous'
+MONGO_KEY_FIRST_LOGGED = 'first_logged'
+MONGO_KEY_LAST_UPDATED = 'last_updated'
+
+
+# Result Cache Config
+# increment EXTRACTION_SPEC_VERSION whenever the output of get_account_information_dictionary changes, so that results
+# cached by an older version of the extraction functions are no longer served
+EXTRACTION_SPEC_VERSION = 2
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# appended to the filing hash of results extracted by a parser storing GBP values as int pence
+RESULT_CACHE_PENCE_SUFFIX = ':pence'
+
+
+# Currency Config
+# scale of the monetary values extracted by a parser created with pence=True, against tolerances given in pounds
+PENCE_PER_POUND = 100
+
+
+# Archive Config
+ARCHIVE_MEMBER_SUFFIXES = ('.html', '.htm', '.xhtml')
+
+
+# HTTP Cache Config
+# locks shared by the concurrent downloads of a ThreadSafeHttpCache, each file being downloaded under one of them
+HTTP_CACHE_LOCK_STRIPES = 64
+
+
+# Taxonomy Prefetch Config
+TAXONOMY_PREFETCH_WORKERS = 8
+
+
+# Skipping Reader Config
+# bytes of a buffer searched ahead for script elements and base64 payloads at a time, as reading advances
+SKIPPING_READER_WINDOW = 1024 * 1024
+# bytes before a ';base64,' marker searched for the 'data:' scheme and media type of its URI
+SKIPPING_READER_DATA_URI_LOOKBACK = 256
+
+
+# Triage Config
+# number of facts read after the end of ix:header before a triage scan gives up on any facts still missing
+TRIAGE_MAX_FACTS = 50
+# bytes read after the end of ix:header before giving up on missing values, so that triage stops early however large
+# the document body is
+TRIAGE_MAX_BYTES = 1024 * 1024
+TRIAGE_CHUNK_SIZE = 64 * 1024
+# reason codes of filings quarantined by prevalidate_ixbrl
+PREVALIDATION_EMPTY = 'empty'
+PREVALIDATION_NO_IX_NAMESPACE = 'no_ix_namespace'
+PREVALIDATION_NO_SCHEMA_REF = 'no_schema_ref'
+PREVALIDATION_NO_RESOURCES = 'no_ix_resources'
+
+
+# Batch Config
+BATCH_THREAD_WORKERS = 8
+# documents queued per worker thread by iter_account_information, bounding the raw documents held in memory
+BATCH_IN_FLIGHT_PER_WORKER = 2
+# budgets for iter_account_information_budgeted, documents over which are moved to the slow lane
+BATCH_MAX_DOCUMENT_BYTES = 8 * 1024 * 1024
+BATCH_DOCUMENT_TIMEOUT = 30
+BATCH_SLOW_LANE_WORKERS = 2
+BATCH_SLOW_LANE_TIMEOUT = 600
+# seconds a new worker process may take to start up and preload its taxonomies before its first document is timed
+BATCH_WORKER_STARTUP_TIMEOUT = 600
+
+
+# Intern Config
+# account information fields whose string values repeat across the filings of a batch, interned by an InternTable
+INTERN_ACCOUNT_KEYS = (
+    MONGO_KEY_ACCOUNTING_SOFTWARE,
+    MONGO_KEY_POSTCODE_AREA,
+    MONGO_KEY_POSTCODE_DISTRICT,
+)
+
+
+# Columnar Config
+COLUMNAR_CHUNK_ROWS = 100000
 
 
 # Error Config
@@ -81,3 +161,78 @@ def financial_data_error():
 
 def dormant_state_error():
     return "No facts relating to dormancy present."
+
+
+# Command Line Config
+CLI_BATCH_SIZE = 500
+# minimum seconds between updates of the progress line
+CLI_PROGRESS_INTERVAL = 0.5
+CLI_ORACLE_TABLE = 'DIGIACCOUNTS'
+CLI_ORACLE_PASSWORD_ENV = 'DIGIACCOUNTS_ORACLE_PASSWORD'
+
+
+# Profiling Config
+PROFILE_SAMPLE_RATE = 0.01
+PROFILE_TRACEBACK_LIMIT = 1
+PROFILE_TOP_ALLOCATORS = 25
+
+
+# Timing Config
+TIMING_STAGE_XML_PARSE = 'xml_parse'
+TIMING_STAGE_TAXONOMY = 'taxonomy'
+TIMING_STAGE_FACT_BUILD = 'fact_build'
+TIMING_STAGE_EXTRACTION = 'extraction'
+
+
+# Slow Filing Capture Config
+# documents kept in each of the slowest and largest heaps
+SLOW_FILING_TOP_N = 20
+REPLAY_MANIFEST = 'manifest.json'
+
+
+# Benchmark Config
+BENCH_WORKER_COUNTS = (1, 2, 4, 8)
+BENCH_DOCUMENTS = 200
+# seconds between the resident set size samples taken during each benchmark run
+BENCH_RSS_SAMPLE_INTERVAL = 0.01
+
+
+# Aggregate Config
+AGGREGATE_MEASURES = (
+    MONGO_KEY_TURNOVER_CLOSING_CURRENT,
+    MONGO_KEY_EQUITY_CLOSING_CURRENT,
+    MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT,
+)
+
+
+# Name Search Config
+# trailing company type words dropped from registered names before indexing
+NAME_SUFFIXES = ('limited', 'ltd', 'plc', 'llp', 'lp', 'cic', 'cio', 'uk', 'co')
+NAME_SEARCH_TOP_K = 10
+# weight of query containment, the share of the query trigrams found in a name, in the similarity of a name search. The
+# rest of the weight is on trigram Jaccard similarity, which ranks the closer of two names containing the query first
+NAME_SEARCH_CONTAINMENT_WEIGHT = 0.5
+# lowest similarity returned by a name search
+NAME_SEARCH_MIN_SIMILARITY = 0.3
+
+
+# Validation Config
+# columns joining a reference table to extracted account information
+VALIDATION_KEYS = (MONGO_KEY_ENTITY_REGISTRATION, MONGO_KEY_END_DATE)
+# numeric values within VALIDATION_ATOL + VALIDATION_RTOL * |expected| of the reference value are matches
+VALIDATION_RTOL = 1e-6
+VALIDATION_ATOL = 0.5
+VALIDATION_STATUS_MATCH = 'match'
+VALIDATION_STATUS_MISMATCH = 'mismatch'
+VALIDATION_STATUS_MISSING = 'missing'
+VALIDATION_STATUS_UNEXPECTED = 'unexpected'
+VALIDATION_STATUS_NOT_EXTRACTED = 'not_extracted'
+
+
+# Rule Config
+# largest difference in pounds between a total and the sum of its components before a component sum rule is violated
+RULE_SUM_TOLERANCE = 1.0
+# year on year changes larger than RULE_JUMP_MAX_RATIO times the previous value, or RULE_JUMP_MIN_BASE pounds if
+# larger, violate a jump rule
+RULE_JUMP_MAX_RATIO = 10.0
+RULE_JUMP_MIN_BASE = 1000.0
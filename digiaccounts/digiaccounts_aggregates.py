@@ -0,0 +1,213 @@
+"""incrementally maintained aggregate views over extracted accounts. Running sums, counts, minima and maxima of key
+financial values are kept per postcode area, period end year and dormant state, and updated as each account information
+dictionary is ingested, so that reports are served from the aggregates rather than by rescanning the collection. The
+contribution of each account is kept by its _id, so an account ingested again, whether re-run, served from the result
+cache or re-extracted with --update, replaces its earlier contribution rather than being counted twice. Partial
+aggregates built by parallel workers are combined with merge"""
+
+import os
+import json
+
+from digiaccounts.digiaccounts_util import split_postcode
+from digiaccounts import config as cfg
+
+
+def get_group_key(account_information):
+    """returns the aggregate group of an account information dictionary
+
+    Args:
+        account_information (dict): dictionary returned by get_account_information_dictionary
+
+    Returns:
+        tuple: postcode area, period end year and dormant state, each None if not extracted
+    """
+    area = account_information.get(cfg.MONGO_KEY_POSTCODE_AREA)
+    if area is None:
+        # dictionaries extracted before postcodes were split at extraction time
+        postcode_parts = split_postcode(account_information.get(cfg.MONGO_KEY_POSTAL_CODE))
+        area = postcode_parts[2] if postcode_parts is not None else None
+    period_end = account_information.get(cfg.MONGO_KEY_END_DATE)
+    return (
+        area,
+        period_end.year if period_end is not None else None,
+        account_information.get(cfg.MONGO_KEY_DORMANT_STATE),
+    )
+
+
+class AccountAggregates:
+    """running count, sum, minimum and maximum of a set of measures per aggregate group, with the contribution of each
+    account kept by _id
+
+    Args:
+        measures (tuple, optional): account information keys aggregated. Defaults to cfg.AGGREGATE_MEASURES.
+    """
+
+    def __init__(self, measures=cfg.AGGREGATE_MEASURES):
+        self.measures = tuple(measures)
+        # _id -> (group key, value per measure or None)
+        self.accounts = {}
+        # group key -> [accounts, [count, sum, min, max] per measure]
+        self.groups = {}
+        # groups whose minima or maxima were held by a replaced contribution, recomputed before they are read
+        self._stale = set()
+
+    def __len__(self):
+        return len(self.groups)
+
+    def _get_group(self, key):
+        group = self.groups.get(key)
+        if group is None:
+            # sums start as int 0 so that they keep the type of the values added, exact int for pence
+            group = self.groups[key] = [0, [[0, 0, None, None] for _ in self.measures]]
+        return group
+
+    def _get_values(self, account_information):
+        """returns the value of each measure of an account information dictionary, None where it is not a number"""
+        values = []
+        for measure in self.measures:
+            value = account_information.get(measure)
+            values.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else None)
+        return tuple(values)
+
+    def _apply(self, key, values):
+        """adds a contribution to the running totals of its group"""
+        group = self._get_group(key)
+        group[0] += 1
+        for running, value in zip(group[1], values):
+            if value is None:
+                continue
+            running[0] += 1
+            running[1] += value
+            running[2] = value if running[2] is None else min(running[2], value)
+            running[3] = value if running[3] is None else max(running[3], value)
+
+    def _retract(self, key, values):
+        """removes a contribution from the running totals of its group"""
+        group = self.groups[key]
+        group[0] -= 1
+        if not group[0]:
+            del self.groups[key]
+            self._stale.discard(key)
+            return
+        for running, value in zip(group[1], values):
+            if value is None:
+                continue
+            running[0] -= 1
+            running[1] = running[1] - value if running[0] else 0
+            if value in (running[2], running[3]):
+                self._stale.add(key)
+
+    def _contribute(self, unique_id, key, values):
+        """sets the contribution of an account, replacing any earlier contribution of the same _id"""
+        previous = self.accounts.get(unique_id)
+        if previous is not None:
+            if previous == (key, values):
+                return
+            self._retract(*previous)
+        self.accounts[unique_id] = (key, values)
+        self._apply(key, values)
+
+    def _refresh(self):
+        """recomputes the minima and maxima of stale groups from the contributions of their accounts"""
+        if not self._stale:
+            return
+        for key in self._stale:
+            for running in self.groups[key][1]:
+                running[2] = running[3] = None
+        for key, values in self.accounts.values():
+            if key not in self._stale:
+                continue
+            for running, value in zip(self.groups[key][1], values):
+                if value is not None:
+                    running[2] = value if running[2] is None else min(running[2], value)
+                    running[3] = value if running[3] is None else max(running[3], value)
+        self._stale.clear()
+
+    def add(self, account_information):
+        """adds an account information dictionary to the running totals of its group, replacing the contribution of an
+        account with the same _id
+
+        Args:
+            account_information (dict): dictionary returned by get_account_information_dictionary
+
+        Raises:
+            KeyError: if the dictionary has no _id
+        """
+        unique_id = account_information.get('_id')
+        if unique_id is None:
+            raise KeyError('Cannot aggregate an account information dictionary without an _id')
+        self._contribute(unique_id, get_group_key(account_information), self._get_values(account_information))
+
+    def update(self, account_dictionaries):
+        """adds an iterable of account information dictionaries to the running totals
+
+        Args:
+            account_dictionaries (iterable): dictionaries returned by get_account_information_dictionary
+        """
+        for account_information in account_dictionaries:
+            self.add(account_information)
+
+    def merge(self, other):
+        """merges the partial aggregates of another worker into these aggregates, the other's contribution replacing
+        this one's for an account in both
+
+        Args:
+            other (AccountAggregates): partial aggregates over the same measures
+
+        Raises:
+            KeyError: if the aggregates are over different measures
+        """
+        if other.measures != self.measures:
+            raise KeyError(f'Cannot merge aggregates over {other.measures} into aggregates over {self.measures}')
+        for unique_id, (key, values) in other.accounts.items():
+            self._contribute(unique_id, key, values)
+
+    def rows(self):
+        """returns the aggregates as report rows
+
+        Returns:
+            list: dictionaries of postcode area, period end year, dormant state, account count and the count, sum,
+            mean, minimum and maximum of each measure, sorted by group
+        """
+        self._refresh()
+        rows = []
+        for (area, year, dormant), (accounts, measures) in sorted(self.groups.items(), key=lambda item: repr(item[0])):
+            row = {'postcode_area': area, 'period_end_year': year, 'dormant': dormant, 'accounts': accounts}
+            for measure, (count, total, minimum, maximum) in zip(self.measures, measures):
+                row[measure] = {
+                    'count': count, 'sum': total, 'mean': total / count if count else None,
+                    'min': minimum, 'max': maximum,
+                }
+            rows.append(row)
+        return rows
+
+    def save(self, path):
+        """persists the contribution of each account as compact JSON, replacing the file atomically
+
+        Args:
+            path (str): path of the aggregates file
+        """
+        payload = {
+            'measures': self.measures,
+            'accounts': [[unique_id, *key, *values] for unique_id, (key, values) in self.accounts.items()],
+        }
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        """loads aggregates persisted by save, rebuilding the running totals from the contributions
+
+        Args:
+            path (str): path of the aggregates file
+
+        Returns:
+            AccountAggregates: loaded aggregates
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        aggregates = cls(payload['measures'])
+        for unique_id, area, year, dormant, *values in payload['accounts']:
+            aggregates._contribute(unique_id, (area, year, dormant), tuple(values))
+        return aggregates
@@ -0,0 +1,205 @@
+"""functions for reading iXBRL accounts files out of CH archives, directories of archives and single files"""
+
+import os
+import sqlite3
+import logging
+import zipfile
+from itertools import groupby
+
+from digiaccounts.digiaccounts_ids import get_file_registration_period_from_filename, get_uuid
+from digiaccounts import config as cfg
+
+
+def check_member_suffix(name, suffixes=cfg.ARCHIVE_MEMBER_SUFFIXES):
+    """returns boolean check if a file or archive member name has an iXBRL accounts file suffix
+
+    Args:
+        name (str): file or archive member name
+        suffixes (tuple, optional): accepted lower case suffixes. Defaults to cfg.ARCHIVE_MEMBER_SUFFIXES.
+
+    Returns:
+        bool: True if the name ends with one of the suffixes
+    """
+    return name.lower().endswith(suffixes)
+
+
+def iter_archive_paths(paths):
+    """yields the paths of every CH archive or accounts file found in a list of archive, directory and file paths.
+    Directories are walked recursively in sorted order
+
+    Args:
+        paths (list): paths to zip archives, directories or single accounts files
+
+    Yields:
+        str: path to a zip archive or single accounts file
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, filenames in sorted(os.walk(path)):
+                for filename in sorted(filenames):
+                    if zipfile.is_zipfile(os.path.join(directory, filename)) or check_member_suffix(filename):
+                        yield os.path.join(directory, filename)
+        else:
+            yield path
+
+
+def iter_archive_members(paths, suffixes=cfg.ARCHIVE_MEMBER_SUFFIXES):
+    """yields the name and raw contents of every accounts file held in a list of CH archives, directories and single
+    files. Only one member is held in memory at a time
+
+    Args:
+        paths (list): paths to zip archives, directories or single accounts files
+        suffixes (tuple, optional): accepted lower case member suffixes. Defaults to cfg.ARCHIVE_MEMBER_SUFFIXES.
+
+    Yields:
+        tuple: member name and contents as bytes
+    """
+    for path in iter_archive_paths(paths):
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and check_member_suffix(info.filename, suffixes):
+                        yield info.filename, archive.read(info)
+        elif check_member_suffix(path, suffixes):
+            with open(path, 'rb') as f:
+                yield path, f.read()
+
+
+class ArchiveIndex:
+    """persistent SQLite index of the accounts files held in a collection of CH archives, built from the member names
+    alone. Each member is indexed by registration number, period end and UUID, so that the members for a set of
+    companies can be pulled out of the archives without opening any others
+
+    Args:
+        path (str): path of the SQLite database file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            'CREATE TABLE IF NOT EXISTS archives ('
+            'archive TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS members ('
+            'registration TEXT NOT NULL, period_end TEXT NOT NULL, uuid TEXT NOT NULL, archive TEXT NOT NULL, '
+            'member TEXT NOT NULL, PRIMARY KEY (archive, member));'
+            'CREATE INDEX IF NOT EXISTS members_registration ON members (registration, period_end);'
+            'CREATE INDEX IF NOT EXISTS members_uuid ON members (uuid);'
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM members').fetchone()[0]
+
+    def close(self):
+        """closes the underlying database connection"""
+        self._connection.close()
+
+    def update(self, paths):
+        """indexes every CH archive found in a list of archive and directory paths which is new or has changed since it
+        was last indexed, and drops the entries of indexed archives which no longer exist
+
+        Args:
+            paths (list): paths to zip archives or directories of zip archives
+
+        Returns:
+            int: number of archives (re)indexed
+        """
+        self._prune()
+        indexed = 0
+        for archive_path in iter_archive_paths(paths):
+            if not zipfile.is_zipfile(archive_path):
+                continue
+            archive_path = os.path.abspath(archive_path)
+            stat = os.stat(archive_path)
+            stored = self._connection.execute(
+                'SELECT size, mtime FROM archives WHERE archive = ?', (archive_path,)
+            ).fetchone()
+            if stored == (stat.st_size, stat.st_mtime):
+                continue
+            with zipfile.ZipFile(archive_path) as archive:
+                rows = list(self._iter_member_rows(archive_path, archive.namelist()))
+            with self._connection:
+                self._connection.execute('DELETE FROM members WHERE archive = ?', (archive_path,))
+                self._connection.executemany('INSERT INTO members VALUES (?, ?, ?, ?, ?)', rows)
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO archives VALUES (?, ?, ?)', (archive_path, stat.st_size, stat.st_mtime)
+                )
+            _s = f"Indexed {len(rows)} members of archive '{archive_path}'"
+            logging.info(_s)
+            indexed += 1
+        return indexed
+
+    def _prune(self):
+        """drops the archives and members of indexed archives which have been deleted or moved"""
+        missing = [
+            (archive_path,) for archive_path, in self._connection.execute('SELECT archive FROM archives')
+            if not os.path.exists(archive_path)
+        ]
+        if not missing:
+            return
+        with self._connection:
+            self._connection.executemany('DELETE FROM members WHERE archive = ?', missing)
+            self._connection.executemany('DELETE FROM archives WHERE archive = ?', missing)
+        _s = f'Dropped {len(missing)} missing archives from the index'
+        logging.info(_s)
+
+    @staticmethod
+    def _iter_member_rows(archive_path, member_names):
+        """yields the index rows for the accounts files named in an archive"""
+        for member in member_names:
+            if not check_member_suffix(member):
+                continue
+            try:
+                registration, period_end = get_file_registration_period_from_filename(member)
+            except ValueError:
+                _s = f"Could not read registration and period end from member name '{member}'"
+                logging.warning(_s)
+                continue
+            yield registration, period_end, get_uuid(registration, period_end), archive_path, member
+
+    def find(self, registrations):
+        """returns the index entries for a collection of registration numbers
+
+        Args:
+            registrations (iterable): CH entity registration numbers
+
+        Returns:
+            list: tuples of registration, period end, UUID, archive path and member name, ordered by archive
+        """
+        with self._connection:
+            self._connection.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (registration TEXT PRIMARY KEY)')
+            self._connection.execute('DELETE FROM wanted')
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO wanted VALUES (?)', ((r,) for r in registrations)
+            )
+            return self._connection.execute(
+                'SELECT m.registration, m.period_end, m.uuid, m.archive, m.member FROM members m '
+                'JOIN wanted w ON m.registration = w.registration ORDER BY m.archive, m.member'
+            ).fetchall()
+
+    def iter_members(self, registrations):
+        """yields the contents of the accounts files for a collection of registration numbers, opening only the
+        archives which hold them and each of those only once. Archives which have been deleted or moved since they
+        were indexed are skipped with a warning
+
+        Args:
+            registrations (iterable): CH entity registration numbers
+
+        Yields:
+            tuple: UUID, member name and contents as bytes
+        """
+        for archive_path, entries in groupby(self.find(registrations), key=lambda entry: entry[3]):
+            if not os.path.exists(archive_path):
+                _s = f"Skipping missing archive '{archive_path}', which is dropped from the index on the next update"
+                logging.warning(_s)
+                continue
+            with zipfile.ZipFile(archive_path) as archive:
+                for _, _, unique_id, _, member in entries:
+                    yield unique_id, member, archive.read(member)
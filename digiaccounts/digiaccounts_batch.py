@@ -0,0 +1,452 @@
+"""batch engine for extracting account information from many iXBRL files
+
+Thread-pool mode: a single XbrlParserDA is shared by every worker thread, so the taxonomies it parses are only held
+once in memory, unlike a process pool in which each worker parses its own copy. The parser must be created with a
+ThreadSafeHttpCache, which coalesces concurrent downloads of the same taxonomy file, and its TaxonomyCache parses each
+taxonomy once under a lock. Parsing itself is CPU bound, so on standard CPython builds threads mainly overlap taxonomy
+downloads and file reads, while free-threaded builds can also run the parsing in parallel.
+
+Streaming: iter_account_information reads sources lazily and holds at most max_in_flight documents at a time. Each
+XbrlInstance is dropped as soon as its account information has been extracted, so an archive of any size is processed
+at the footprint of max_in_flight documents.
+
+Budgeted mode: iter_account_information_budgeted runs each document in a worker process under a per-document wall
+clock budget. A worker which overruns its budget is killed and replaced, and the document is retried in a slow lane
+with its own, smaller pool of workers and a longer budget. Documents over the byte budget go straight to the slow lane,
+so a few pathological filings cannot hold up the rest of the batch. A new worker first preloads the taxonomies of the
+documents submitted so far, and its first budget only starts once it is ready, so start up is not charged to a document.
+
+Quarantine: given a Quarantine, either mode first scans each document's bytes for the inline XBRL namespace, a
+schemaRef and ix:resources, and quarantines documents missing any of them with a reason code instead of parsing them.
+
+Result cache: given a ResultCache, either mode serves documents whose contents were extracted before from the cache
+without parsing them, and stores the results of the documents it does parse. In budgeted mode the cache is only read
+and written in the parent process.
+
+Interning: a parser given an InternTable shares one copy of each concept name, unit measure and dimension member
+across the batch, and the repeated fields of each account information dictionary are interned in the same table. The
+per-filing context and unit IDs are not interned, so the table stays bounded over a run of any length. In budgeted mode
+the results are interned as they arrive in the parent process.
+
+Profiled extraction: with profiled set, either mode extracts through get_account_information_dictionary_profiled, so
+documents from a producer with a registered extraction profile only have their facts scanned once.
+"""
+
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from digiaccounts.digiaccounts_ids import create_unique_id
+from digiaccounts.digiaccounts_taxonomy import get_schema_ref
+from digiaccounts.digiaccounts_cache import get_result_cache_key
+from digiaccounts.digiaccounts_util import decode_contents
+from digiaccounts.digiaccounts_io import (
+    ThreadSafeHttpCache,
+    XbrlParserDA,
+    add_stage_timing,
+    get_account_information_dictionary
+)
+from digiaccounts.digiaccounts_profiles import get_account_information_dictionary_profiled
+from digiaccounts import config as cfg
+
+
+def extract_account_information(parser, name, contents, filing_date=None, profiler=None, timings=None,
+                                result_cache=None, profiled=False):
+    """parses a single iXBRL file and extracts its account information dictionary. The fields of cfg.INTERN_ACCOUNT_KEYS
+    are interned in the intern table of the parser, if it has one. Given a result cache, a file whose contents were
+    extracted before is served from the cache without being parsed
+
+    Args:
+        parser (XbrlParserDA): parser used to create the XbrlInstance
+        name (str): CH archive file name, from which the unique ID is generated
+        contents (str or bytes): raw contents of the iXBRL file
+        filing_date (datetime.date or str, optional): date the accounts were filed. Defaults to None.
+        profiler (SamplingProfiler, optional): profiler sampling the parse and extraction. Defaults to None.
+        timings (dict, optional): dictionary the seconds spent in each parsing and extraction stage are added to.
+        Defaults to None.
+        result_cache (ResultCache, optional): cache of previously extracted results. Defaults to None.
+        profiled (bool, optional): extract through the extraction profile registered for the producer. Defaults to
+        False.
+
+    Returns:
+        dict: dictionary containing extracted fact values
+    """
+    extract = get_account_information_dictionary_profiled if profiled else get_account_information_dictionary
+    intern_table = getattr(parser, 'intern_table', None)
+    if result_cache is not None:
+        filing_hash = get_result_cache_key(contents, getattr(parser, 'pence', False))
+        account_information = result_cache.get_account_information(filing_hash, create_unique_id(name), filing_date)
+        if account_information is not None:
+            if intern_table is not None:
+                intern_table.intern_values(account_information, cfg.INTERN_ACCOUNT_KEYS)
+            return account_information
+
+    with profiler.profile() if profiler is not None else nullcontext():
+        xbrl_instance = parser.parse_string_instance(decode_contents(contents), timings=timings)
+        start = time.perf_counter()
+        account_information = extract(create_unique_id(name), filing_date, xbrl_instance)
+        if intern_table is not None:
+            intern_table.intern_values(account_information, cfg.INTERN_ACCOUNT_KEYS)
+        add_stage_timing(timings, cfg.TIMING_STAGE_EXTRACTION, start)
+    if result_cache is not None:
+        result_cache.put(filing_hash, account_information)
+    return account_information
+
+
+def _extract_or_log(parser, name, contents, profiler=None, recorder=None, quarantine=None, result_cache=None,
+                    profiled=False):
+    """extracts the account information for a source, logging and returning None on failure or quarantine"""
+    if quarantine is not None and not quarantine.check(name, contents):
+        return None
+    timings = {} if recorder is not None else None
+    try:
+        return extract_account_information(parser, name, contents, profiler=profiler, timings=timings,
+                                           result_cache=result_cache, profiled=profiled)
+    except Exception as _e:
+        _s = f"Failed to extract account information from '{name}': {_e!r}"
+        logging.error(_s)
+        return None
+    finally:
+        if recorder is not None:
+            recorder.record(name, contents, timings)
+
+
+def iter_account_information(sources, parser, max_workers=cfg.BATCH_THREAD_WORKERS, max_in_flight=None,
+                             profiler=None, recorder=None, quarantine=None, result_cache=None, profiled=False):
+    """extracts the account information for a stream of iXBRL files on a thread pool sharing a single parser, yielding
+    results in source order. Sources are only read as earlier documents complete, so no more than max_in_flight raw
+    documents and XbrlInstances are held at once
+
+    Args:
+        sources (iterable): pairs of CH archive file name and raw contents, as yielded by iter_archive_members
+        parser (XbrlParserDA): parser shared by every thread, created with a ThreadSafeHttpCache
+        max_workers (int, optional): number of worker threads. Defaults to cfg.BATCH_THREAD_WORKERS.
+        max_in_flight (int, optional): documents submitted to the pool ahead of the one being yielded. Defaults to None,
+        using max_workers * cfg.BATCH_IN_FLIGHT_PER_WORKER.
+        profiler (SamplingProfiler, optional): profiler sampling the parse and extraction of documents. Defaults to
+        None.
+        recorder (SlowFilingRecorder, optional): recorder keeping the slowest and largest documents with their stage
+        timings. Defaults to None.
+        quarantine (Quarantine, optional): quarantine of documents failing prevalidation, which are not parsed.
+        Defaults to None.
+        result_cache (ResultCache, optional): cache of previously extracted results, shared by every thread. Defaults
+        to None.
+        profiled (bool, optional): extract through the extraction profile registered for each document's producer.
+        Defaults to False.
+
+    Yields:
+        tuple: CH archive file name and account information dictionary, or None if the file could not be extracted
+    """
+    if max_in_flight is None:
+        max_in_flight = max_workers * cfg.BATCH_IN_FLIGHT_PER_WORKER
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for name, contents in sources:
+            in_flight.append((name, executor.submit(_extract_or_log, parser, name, contents, profiler, recorder,
+                                                     quarantine, result_cache, profiled)))
+            # the pool holds its own reference until the document is extracted, so none is kept here while waiting
+            del contents
+            if len(in_flight) >= max_in_flight:
+                name, future = in_flight.popleft()
+                yield name, future.result()
+        while in_flight:
+            name, future = in_flight.popleft()
+            yield name, future.result()
+
+
+def extract_accounts_threaded(sources, parser, max_workers=cfg.BATCH_THREAD_WORKERS, result_cache=None):
+    """extracts the account information for a batch of iXBRL files on a thread pool sharing a single parser
+
+    Args:
+        sources (iterable): pairs of CH archive file name and raw contents, as yielded by iter_archive_members
+        parser (XbrlParserDA): parser shared by every thread, created with a ThreadSafeHttpCache
+        max_workers (int, optional): number of worker threads. Defaults to cfg.BATCH_THREAD_WORKERS.
+        result_cache (ResultCache, optional): cache of previously extracted results. Defaults to None.
+
+    Returns:
+        list: account information dictionaries for the files which were extracted successfully, in source order
+    """
+    return [
+        result for _, result in iter_account_information(sources, parser, max_workers=max_workers,
+                                                         result_cache=result_cache)
+        if result is not None
+    ]
+
+
+class DocumentBudgetExceeded(Exception):
+    """raised when a document is not extracted within its wall clock budget"""
+
+
+# sent by a worker process once it has started up and warmed up its taxonomy cache
+WORKER_READY = 'ready'
+
+
+def _document_worker_main(connection, cache_dir, pence=False, schema_urls=(), profiled=False):
+    """main loop of a budgeted mode worker process. The parser's taxonomy cache is first warmed up with schema_urls and
+    WORKER_READY sent, then the documents sent over a pipe are extracted until sent None"""
+    parser = XbrlParserDA(ThreadSafeHttpCache(cache_dir), pence=pence)
+    for schema_url in schema_urls:
+        try:
+            parser.taxonomy_cache.get_taxonomy_url(schema_url, parser.cache)
+        except Exception as _e:
+            _s = f"Could not preload taxonomy '{schema_url}': {_e!r}"
+            logging.warning(_s)
+    connection.send(WORKER_READY)
+    while (source := connection.recv()) is not None:
+        connection.send(_extract_or_log(parser, *source, profiled=profiled))
+
+
+class DocumentWorker:
+    """worker process extracting one document at a time, which is killed if a document overruns its budget. The budget
+    of the first document only starts once the worker has started up and parsed the taxonomies of schema_urls, so the
+    cost of a cold worker is not charged to a document
+
+    Args:
+        cache_dir (str): HttpCache directory the worker's parser reads taxonomies from
+        pence (bool, optional): store GBP values as int pence, as XbrlParserDA. Defaults to False.
+        schema_urls (iterable, optional): taxonomy schema URLs preloaded by the worker before it is ready. Defaults to
+        no schemas.
+        profiled (bool, optional): extract through the registered extraction profiles. Defaults to False.
+    """
+
+    # spawn rather than fork, as the parent process runs the lanes on threads
+    _context = multiprocessing.get_context('spawn')
+
+    def __init__(self, cache_dir, pence=False, schema_urls=(), profiled=False):
+        self._connection, child_connection = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_document_worker_main, args=(child_connection, cache_dir, pence, tuple(schema_urls), profiled),
+            daemon=True
+        )
+        self._process.start()
+        child_connection.close()
+        self._ready = False
+
+    def wait_ready(self, timeout=cfg.BATCH_WORKER_STARTUP_TIMEOUT):
+        """waits for the worker to start up and warm up its taxonomy cache
+
+        Args:
+            timeout (float, optional): seconds to wait, or None for no limit. Defaults to
+            cfg.BATCH_WORKER_STARTUP_TIMEOUT.
+
+        Raises:
+            EOFError: if the worker died while starting up
+
+        Returns:
+            bool: True once the worker is ready, False if it was not ready within timeout
+        """
+        if not self._ready:
+            if not self._connection.poll(timeout):
+                return False
+            self._ready = self._connection.recv() == WORKER_READY
+        return self._ready
+
+    def extract(self, name, contents, timeout):
+        """extracts the account information of a document in the worker process
+
+        Args:
+            name (str): CH archive file name
+            contents (str or bytes): raw contents of the iXBRL file
+            timeout (float): wall clock budget in seconds, or None for no limit
+
+        Raises:
+            DocumentBudgetExceeded: if the worker is not ready within cfg.BATCH_WORKER_STARTUP_TIMEOUT, or the
+            document is not extracted within the budget, after which the worker has been killed
+
+        Returns:
+            dict: account information dictionary, or None if the file could not be extracted
+        """
+        if not self.wait_ready():
+            self.kill()
+            raise DocumentBudgetExceeded(
+                f"worker for '{name}' was not ready within {cfg.BATCH_WORKER_STARTUP_TIMEOUT} seconds"
+            )
+        self._connection.send((name, contents))
+        if not self._connection.poll(timeout):
+            self.kill()
+            raise DocumentBudgetExceeded(f"'{name}' was not extracted within {timeout} seconds")
+        return self._connection.recv()
+
+    def kill(self):
+        """kills the worker process"""
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+
+    def close(self):
+        """stops the worker process once it has finished its current document"""
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join()
+        self._connection.close()
+
+
+class WorkerLane:
+    """pool of DocumentWorker processes with a concurrency limit and a per-document budget. A worker which overruns the
+    budget or dies is replaced by a new one, which preloads the taxonomies of every document submitted so far
+
+    Args:
+        cache_dir (str): HttpCache directory the workers' parsers read taxonomies from
+        max_workers (int): number of worker processes
+        timeout (float): wall clock budget per document in seconds, or None for no limit
+        pence (bool, optional): store GBP values as int pence, as XbrlParserDA. Defaults to False.
+        profiled (bool, optional): extract through the registered extraction profiles. Defaults to False.
+    """
+
+    def __init__(self, cache_dir, max_workers, timeout, pence=False, profiled=False):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.pence = pence
+        self.profiled = profiled
+        self.replaced = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._idle = queue.SimpleQueue()
+        self._workers = []
+        self._schema_urls = set()
+        self._workers_lock = threading.Lock()
+
+    def _run(self, name, contents):
+        """extracts a document on an idle worker, starting a new worker if none is idle"""
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._workers_lock:
+                schema_urls = tuple(self._schema_urls)
+            worker = DocumentWorker(self.cache_dir, self.pence, schema_urls, self.profiled)
+            with self._workers_lock:
+                self._workers.append(worker)
+        try:
+            result = worker.extract(name, contents, self.timeout)
+        except (DocumentBudgetExceeded, EOFError, OSError) as _e:
+            # the worker has been killed or has died, so is reaped and dropped, and a new one started for the next
+            # document
+            if not isinstance(_e, DocumentBudgetExceeded):
+                worker.kill()
+            with self._workers_lock:
+                self._workers.remove(worker)
+                self.replaced += 1
+            raise
+        self._idle.put(worker)
+        return result
+
+    def submit(self, name, contents):
+        """submits a document to the lane
+
+        Args:
+            name (str): CH archive file name
+            contents (str or bytes): raw contents of the iXBRL file
+
+        Returns:
+            concurrent.futures.Future: future of the account information dictionary
+        """
+        schema_url = get_schema_ref(contents if isinstance(contents, bytes) else contents.encode('utf-8'))
+        if schema_url is not None and schema_url.startswith('http'):
+            with self._workers_lock:
+                self._schema_urls.add(schema_url)
+        return self._executor.submit(self._run, name, contents)
+
+    def close(self):
+        """cancels documents which have not started, waits for the rest and stops every worker process"""
+        self._executor.shutdown(cancel_futures=True)
+        for worker in self._workers:
+            worker.close()
+
+
+def iter_account_information_budgeted(sources, cache_dir, max_workers=cfg.BATCH_THREAD_WORKERS,
+                                      max_bytes=cfg.BATCH_MAX_DOCUMENT_BYTES, timeout=cfg.BATCH_DOCUMENT_TIMEOUT,
+                                      slow_workers=cfg.BATCH_SLOW_LANE_WORKERS,
+                                      slow_timeout=cfg.BATCH_SLOW_LANE_TIMEOUT, max_in_flight=None, pence=False,
+                                      quarantine=None, intern_table=None, result_cache=None, profiled=False):
+    """extracts the account information for a stream of iXBRL files in worker processes with per-document byte and
+    wall clock budgets, yielding results as they complete. Documents over max_bytes, and documents whose worker is
+    killed for overrunning timeout, are extracted in a slow lane of slow_workers processes with a budget of slow_timeout
+
+    Args:
+        sources (iterable): pairs of CH archive file name and raw contents, as yielded by iter_archive_members
+        cache_dir (str): HttpCache directory the workers' parsers read taxonomies from
+        max_workers (int, optional): number of worker processes. Defaults to cfg.BATCH_THREAD_WORKERS.
+        max_bytes (int, optional): byte budget per document. Defaults to cfg.BATCH_MAX_DOCUMENT_BYTES.
+        timeout (float, optional): wall clock budget per document in seconds. Defaults to cfg.BATCH_DOCUMENT_TIMEOUT.
+        slow_workers (int, optional): number of slow lane worker processes. Defaults to cfg.BATCH_SLOW_LANE_WORKERS.
+        slow_timeout (float, optional): wall clock budget per slow lane document in seconds, or None for no limit.
+        Defaults to cfg.BATCH_SLOW_LANE_TIMEOUT.
+        max_in_flight (int, optional): documents submitted to either lane at once. Defaults to None, using
+        (max_workers + slow_workers) * cfg.BATCH_IN_FLIGHT_PER_WORKER.
+        pence (bool, optional): store GBP values as int pence, as XbrlParserDA. Defaults to False.
+        quarantine (Quarantine, optional): quarantine of documents failing prevalidation, which are yielded with None
+        without being sent to a worker. Defaults to None.
+        intern_table (InternTable, optional): table the fields of cfg.INTERN_ACCOUNT_KEYS are interned in as results
+        arrive from the workers. Defaults to None.
+        result_cache (ResultCache, optional): cache of previously extracted results, read before a document is sent
+        to a worker and written as results arrive. Defaults to None.
+        profiled (bool, optional): extract through the extraction profile registered for each document's producer.
+        Defaults to False.
+
+    Yields:
+        tuple: CH archive file name and account information dictionary, or None if the file could not be extracted
+        within its budgets
+    """
+    if max_in_flight is None:
+        max_in_flight = (max_workers + slow_workers) * cfg.BATCH_IN_FLIGHT_PER_WORKER
+    fast_lane = WorkerLane(cache_dir, max_workers, timeout, pence, profiled)
+    slow_lane = WorkerLane(cache_dir, slow_workers, slow_timeout, pence, profiled)
+    sources = iter(sources)
+    pending = {}
+    try:
+        while True:
+            for name, contents in sources:
+                if quarantine is not None and not quarantine.check(name, contents):
+                    yield name, None
+                    continue
+                filing_hash = None
+                if result_cache is not None:
+                    filing_hash = get_result_cache_key(contents, pence)
+                    result = result_cache.get_account_information(filing_hash, create_unique_id(name), None)
+                    if result is not None:
+                        if intern_table is not None:
+                            intern_table.intern_values(result, cfg.INTERN_ACCOUNT_KEYS)
+                        yield name, result
+                        continue
+                if len(contents) > max_bytes:
+                    _s = f"Routing '{name}' to the slow lane: {len(contents)} bytes is over the byte budget"
+                    logging.info(_s)
+                    pending[slow_lane.submit(name, contents)] = (name, contents, slow_lane, filing_hash)
+                else:
+                    pending[fast_lane.submit(name, contents)] = (name, contents, fast_lane, filing_hash)
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, contents, lane, filing_hash = pending.pop(future)
+                try:
+                    result = future.result()
+                    if result is not None:
+                        if intern_table is not None:
+                            intern_table.intern_values(result, cfg.INTERN_ACCOUNT_KEYS)
+                        if result_cache is not None:
+                            result_cache.put(filing_hash, result)
+                    yield name, result
+                except DocumentBudgetExceeded as _e:
+                    if lane is slow_lane:
+                        logging.error(repr(_e))
+                        yield name, None
+                    else:
+                        _s = f'Routing to the slow lane: {_e}'
+                        logging.warning(_s)
+                        pending[slow_lane.submit(name, contents)] = (name, contents, slow_lane, filing_hash)
+                except (EOFError, OSError) as _e:
+                    _s = f"Worker died extracting '{name}': {_e!r}"
+                    logging.error(_s)
+                    yield name, None
+    finally:
+        fast_lane.close()
+        slow_lane.close()
@@ -0,0 +1,229 @@
+"""end-to-end throughput benchmark of the ingest pipeline. Documents are read from their sources and pushed through
+decoding, XbrlParserDA.parse_string_instance, get_account_information_dictionary and add_account_to_collection into an
+in-memory stand-in for a MongoDB collection, at several worker counts, so that the point at which scaling flattens can
+be seen without a database"""
+
+import copy
+import mmap
+import time
+import logging
+import threading
+from collections import deque
+from itertools import cycle, islice
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from digiaccounts.digiaccounts_ids import create_unique_id
+from digiaccounts.digiaccounts_io import add_account_to_collection, get_account_information_dictionary
+from digiaccounts.digiaccounts_util import decode_contents
+from digiaccounts import config as cfg
+
+
+class InMemoryCollection:
+    """thread-safe in-memory stand-in for the subset of a pymongo collection used by digiaccounts_io. Bulk writes take
+    operations holding filter, update and upsert as public attributes, in place of pymongo.UpdateOne"""
+
+    def __init__(self):
+        self.documents = {}
+        self.bulk_writes = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def find(self, query):
+        unique_ids = query['_id']['$in']
+        with self._lock:
+            return [copy.deepcopy(self.documents[i]) for i in unique_ids if i in self.documents]
+
+    def update_one(self, filter, update, upsert=False):
+        unique_id = filter['_id']
+        with self._lock:
+            if unique_id in self.documents:
+                self.documents[unique_id].update(update.get('$set', {}))
+                for key in update.get('$unset', {}):
+                    self.documents[unique_id].pop(key, None)
+            elif upsert:
+                self.documents[unique_id] = (
+                    {'_id': unique_id} | update.get('$setOnInsert', {}) | update.get('$set', {})
+                )
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+        for request in requests:
+            self.update_one(request.filter, request.update, upsert=request.upsert)
+
+
+def generate_sources(templates, count):
+    """generates CH archive style sources by repeating template iXBRL files under distinct registration numbers
+
+    Args:
+        templates (list): raw contents of the template iXBRL files
+        count (int): number of sources generated
+
+    Returns:
+        list: pairs of CH archive file name and raw contents
+    """
+    return [
+        (f'Prod223_0001_{n:08d}_20201231.html', contents) for n, contents in enumerate(islice(cycle(templates), count))
+    ]
+
+
+def get_current_rss():
+    """returns the current resident set size of the process in bytes, or None where /proc/self/statm is unavailable"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakRssSampler:
+    """context manager sampling the current resident set size on a background thread, keeping the peak reached while
+    it is in use. Unlike the ru_maxrss of getrusage, which is the peak over the life of the process, this gives the
+    peak of each benchmark run on its own
+
+    Args:
+        interval (float, optional): seconds between samples. Defaults to cfg.BENCH_RSS_SAMPLE_INTERVAL.
+    """
+
+    def __init__(self, interval=cfg.BENCH_RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = get_current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self._sample() is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+            self._sample()
+
+
+def _ingest_document(parser, collection, name, contents):
+    """runs a single document through the ingest pipeline, returning its latency in seconds or None on failure"""
+    start = time.perf_counter()
+    try:
+        xbrl_instance = parser.parse_string_instance(decode_contents(contents))
+        account_information = get_account_information_dictionary(create_unique_id(name), None, xbrl_instance)
+        add_account_to_collection(collection, account_information)
+    except Exception as _e:
+        _s = f"Failed to ingest '{name}': {_e!r}"
+        logging.error(_s)
+        return None
+    return time.perf_counter() - start
+
+
+def run_benchmark(read_sources, parser, workers):
+    """reads a set of sources and pushes them through the ingest pipeline on a thread pool into a fresh
+    InMemoryCollection. The sources are read inside the timed run, no more than workers * cfg.BATCH_IN_FLIGHT_PER_WORKER
+    documents ahead of the one being waited on, so reading is measured and the peak RSS is that of streaming ingest
+
+    Args:
+        read_sources (callable): function returning an iterable of pairs of CH archive file name and raw contents,
+        such as functools.partial(iter_archive_members, paths)
+        parser (XbrlParserDA): parser shared by every thread, created with a ThreadSafeHttpCache
+        workers (int): number of worker threads
+
+    Returns:
+        dict: workers, documents, failures, docs_per_second, mb_per_second, read_seconds (spent reading the sources),
+        p50_ms, p95_ms, p99_ms, peak_rss_mb (the peak sampled during this run, None where the RSS cannot be read) and
+        cpu_percent (100 per fully used core)
+    """
+    collection = InMemoryCollection()
+    latencies = []
+    in_flight = deque()
+    nbytes = 0
+    read_seconds = 0.0
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    with PeakRssSampler() as sampler, ThreadPoolExecutor(max_workers=workers) as executor:
+        sources = iter(read_sources())
+        while True:
+            read_start = time.perf_counter()
+            source = next(sources, None)
+            read_seconds += time.perf_counter() - read_start
+            if source is None:
+                break
+            nbytes += len(source[1])
+            in_flight.append(executor.submit(_ingest_document, parser, collection, *source))
+            del source
+            if len(in_flight) >= workers * cfg.BATCH_IN_FLIGHT_PER_WORKER:
+                latencies.append(in_flight.popleft().result())
+        latencies.extend(future.result() for future in in_flight)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    completed = np.array([latency for latency in latencies if latency is not None]) * 1000
+    p50, p95, p99 = np.percentile(completed, (50, 95, 99)) if completed.size else (np.nan, np.nan, np.nan)
+    peak_rss = sampler.peak
+    return {
+        'workers': workers,
+        'documents': len(latencies),
+        'failures': len(latencies) - completed.size,
+        'docs_per_second': len(latencies) / elapsed,
+        'mb_per_second': nbytes / elapsed / 1e6,
+        'read_seconds': read_seconds,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'peak_rss_mb': peak_rss / 1e6 if peak_rss is not None else None,
+        'cpu_percent': 100 * cpu / elapsed,
+    }
+
+
+def run_benchmarks(read_sources, parser, worker_counts=cfg.BENCH_WORKER_COUNTS):
+    """runs the benchmark at each of several worker counts, reading the sources afresh for each run, after a warm-up
+    pass over the first source so that taxonomy parsing is not counted against the first run
+
+    Args:
+        read_sources (callable): function returning an iterable of pairs of CH archive file name and raw contents
+        parser (XbrlParserDA): parser shared by every thread, created with a ThreadSafeHttpCache
+        worker_counts (tuple, optional): worker counts to benchmark. Defaults to cfg.BENCH_WORKER_COUNTS.
+
+    Returns:
+        list: result dictionaries of run_benchmark, one per worker count, or an empty list if there are no sources
+    """
+    first = next(iter(read_sources()), None)
+    if first is None:
+        return []
+    _ingest_document(parser, InMemoryCollection(), *first)
+    del first
+    return [run_benchmark(read_sources, parser, workers) for workers in worker_counts]
+
+
+def format_benchmarks(results):
+    """formats benchmark results as a table with one line per worker count
+
+    Args:
+        results (list): result dictionaries of run_benchmark
+
+    Returns:
+        str: table of results with a header line
+    """
+    lines = ['workers\tdocs/s\tMB/s\tread s\tp50 ms\tp95 ms\tp99 ms\tpeak RSS MB\tCPU %\tfailures']
+    for result in results:
+        peak_rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else '-'
+        lines.append(
+            f"{result['workers']}\t{result['docs_per_second']:.1f}\t{result['mb_per_second']:.2f}\t"
+            f"{result['read_seconds']:.2f}\t"
+            f"{result['p50_ms']:.1f}\t{result['p95_ms']:.1f}\t{result['p99_ms']:.1f}\t{peak_rss}\t"
+            f"{result['cpu_percent']:.0f}\t{result['failures']}"
+        )
+    return '\n'.join(lines)
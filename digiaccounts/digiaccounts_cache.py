@@ -0,0 +1,220 @@
+"""persistent local cache of extracted accounts information, keyed by a content hash of the raw iXBRL filing"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+from digiaccounts.digiaccounts_io import create_account_dictionary, get_account_information_dictionary
+from digiaccounts.digiaccounts_util import decode_contents
+from digiaccounts import config as cfg
+
+
+def get_filing_hash(filing):
+    """returns a fast content hash of a raw iXBRL filing
+
+    Args:
+        filing (str or bytes): raw contents of an iXBRL file
+
+    Returns:
+        str: hexadecimal digest of the filing contents
+    """
+    if isinstance(filing, str):
+        filing = filing.encode('utf-8')
+    return hashlib.blake2b(filing, digest_size=16).hexdigest()
+
+
+def get_result_cache_key(filing, pence=False):
+    """returns the key of the results extracted from a raw iXBRL filing in a ResultCache
+
+    Args:
+        filing (str or bytes): raw contents of an iXBRL file
+        pence (bool, optional): results are extracted by a parser storing GBP values as int pence. Defaults to False.
+
+    Returns:
+        str: filing hash, with cfg.RESULT_CACHE_PENCE_SUFFIX appended for results in pence
+    """
+    filing_hash = get_filing_hash(filing)
+    if pence:
+        # results in pence are cached apart from results in pounds
+        filing_hash += cfg.RESULT_CACHE_PENCE_SUFFIX
+    return filing_hash
+
+
+def encode_json_value(value):
+    """json encoder hook for the datetime values present in account information dictionaries"""
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def decode_json_value(value):
+    """json decoder hook reversing encode_json_value"""
+    if len(value) == 1 and '$date' in value:
+        return datetime.fromisoformat(value['$date'])
+    return value
+
+
+class ResultCache:
+    """SQLite backed cache of get_account_information_dictionary results. Entries are keyed by the content hash of the
+    raw filing and the extraction spec version, and the least recently used entries are evicted once the stored payloads
+    exceed max_bytes
+
+    Args:
+        path (str): path of the SQLite database file
+        max_bytes (int, optional): upper limit on the total size of stored results. Defaults to
+        cfg.RESULT_CACHE_MAX_BYTES.
+        spec_version (int, optional): version of the extraction functions the results were produced by. Defaults to
+        cfg.EXTRACTION_SPEC_VERSION.
+    """
+
+    # per-call fields set by create_account_dictionary from its arguments rather than from the filing contents, and so
+    # not cached
+    _call_keys = tuple(create_account_dictionary('', datetime.min))
+
+    def __init__(self, path, max_bytes=cfg.RESULT_CACHE_MAX_BYTES, spec_version=cfg.EXTRACTION_SPEC_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.spec_version = spec_version
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'filing_hash TEXT NOT NULL, '
+            'spec_version INTEGER NOT NULL, '
+            'payload TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'last_access REAL NOT NULL, '
+            'PRIMARY KEY (filing_hash, spec_version))'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        """closes the underlying database connection"""
+        self._connection.close()
+
+    def size(self):
+        """returns the total size in bytes of the stored results
+
+        Returns:
+            int: sum of the stored payload sizes
+        """
+        with self._lock:
+            return self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def get(self, filing_hash):
+        """returns the cached account information for a filing hash, or None if it has not been cached
+
+        Args:
+            filing_hash (str): key of the filing, as returned by get_result_cache_key
+
+        Returns:
+            dict: cached account information, without the per-call keys set by create_account_dictionary
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT payload FROM results WHERE filing_hash = ? AND spec_version = ?',
+                (filing_hash, self.spec_version)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                'UPDATE results SET last_access = ? WHERE filing_hash = ? AND spec_version = ?',
+                (time.time(), filing_hash, self.spec_version)
+            )
+            self._connection.commit()
+        return json.loads(row[0], object_hook=decode_json_value)
+
+    def get_account_information(self, filing_hash, unique_id, filing_date):
+        """returns the cached account information for a filing hash with the per-call keys of a new call, or None if it
+        has not been cached
+
+        Args:
+            filing_hash (str): key of the filing, as returned by get_result_cache_key
+            unique_id (string): UDF to serve as unique ID for dictionary
+            filing_date (datetime.date or str): date the accounts were filed
+
+        Returns:
+            dict: dictionary containing extracted fact values, as returned by get_account_information_dictionary
+        """
+        cached = self.get(filing_hash)
+        if cached is None:
+            return None
+        return create_account_dictionary(unique_id, filing_date) | cached
+
+    def put(self, filing_hash, account_information):
+        """stores the account information extracted from a filing and evicts old entries if the cache is over size
+
+        Args:
+            filing_hash (str): key of the filing, as returned by get_result_cache_key
+            account_information (dict): dictionary returned by get_account_information_dictionary
+        """
+        result = {k: v for k, v in account_information.items() if k not in self._call_keys}
+        payload = json.dumps(result, default=encode_json_value)
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results (filing_hash, spec_version, payload, size, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (filing_hash, self.spec_version, payload, len(payload), time.time())
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        """deletes the least recently used results until the total payload size is within max_bytes"""
+        total = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._connection.execute(
+            'SELECT filing_hash, spec_version, size FROM results ORDER BY last_access'
+        ).fetchall()
+        for filing_hash, spec_version, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._connection.execute(
+                'DELETE FROM results WHERE filing_hash = ? AND spec_version = ?', (filing_hash, spec_version)
+            )
+            total -= size
+            evicted += 1
+        _s = f'Evicted {evicted} results from result cache {self.path}'
+        logging.info(_s)
+
+
+def get_cached_account_information(unique_id, filing_date, filing, parser, result_cache):
+    """returns the account information dictionary for a raw filing, only parsing the filing if its contents have not
+    been seen before by the result cache
+
+    Args:
+        unique_id (string): UDF to serve as unique ID for dictionary
+        filing_date (datetime.date or str): date the accounts were filed
+        filing (str or bytes): raw contents of the iXBRL file
+        parser (XbrlParserDA): parser used to create the XbrlInstance on a cache miss
+        result_cache (ResultCache): cache of previously extracted results
+
+    Returns:
+        dict: dictionary containing extracted fact values
+    """
+    filing_hash = get_result_cache_key(filing, getattr(parser, 'pence', False))
+    cached = result_cache.get_account_information(filing_hash, unique_id, filing_date)
+    if cached is not None:
+        return cached
+
+    xbrl_instance = parser.parse_string_instance(decode_contents(filing))
+    account_information = get_account_information_dictionary(unique_id, filing_date, xbrl_instance)
+    result_cache.put(filing_hash, account_information)
+    return account_information
@@ -0,0 +1,548 @@
+"""command line interface for the digiaccounts package
+
+    digiaccounts ingest <paths> --cache-dir <dir> --output {jsonl,columnar,mongo,oracle} --destination <target>
+    digiaccounts warm-cache <paths> --cache-dir <dir>
+    digiaccounts replay <corpus> --cache-dir <dir>
+    digiaccounts bench [<paths>] [--template <file>] --cache-dir <dir> --workers 1 2 4 8
+    digiaccounts validate <reference csv> <columnar dir> [--mismatches <csv>]
+
+ingest extracts the account information of every iXBRL file in a set of CH archives, directories and file lists on a
+thread pool, writing the results in batches to the chosen output while reporting progress on stderr.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from itertools import islice
+from functools import partial
+
+from digiaccounts.digiaccounts_io import (
+    ThreadSafeHttpCache,
+    XbrlParserDA,
+    insert_accounts_in_collection,
+    update_accounts_in_collection
+)
+from digiaccounts.digiaccounts_archive import iter_archive_members
+from digiaccounts.digiaccounts_aggregates import AccountAggregates
+from digiaccounts.digiaccounts_names import NameIndex
+from digiaccounts.digiaccounts_intern import InternTable
+from digiaccounts.digiaccounts_bench import format_benchmarks, generate_sources, run_benchmarks
+from digiaccounts.digiaccounts_batch import iter_account_information, iter_account_information_budgeted
+from digiaccounts.digiaccounts_cache import ResultCache, encode_json_value
+from digiaccounts.digiaccounts_columnar import (
+    ACCOUNT_INFORMATION_SCHEMA,
+    ACCOUNT_INFORMATION_SCHEMA_PENCE,
+    ColumnarWriter,
+    read_columnar
+)
+from digiaccounts.digiaccounts_profiling import SamplingProfiler
+from digiaccounts.digiaccounts_replay import SlowFilingRecorder, format_replay, replay_corpus
+from digiaccounts.digiaccounts_validation import (
+    format_validation,
+    read_reference_csv,
+    validate_extractions,
+    write_mismatches
+)
+from digiaccounts.digiaccounts_taxonomy import add_warm_cache_arguments, run_warm_cache
+from digiaccounts.digiaccounts_triage import Quarantine
+from digiaccounts import config as cfg
+
+
+class JsonLinesSink:
+    """writes account information dictionaries as JSON lines, with datetimes encoded as {'$date': <iso format>}
+
+    Args:
+        path (str): path of the file to append to, or '-' for stdout
+    """
+
+    def __init__(self, path):
+        self._file = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+
+    def write(self, account_dictionaries):
+        """writes a batch of account information dictionaries"""
+        for account_dictionary in account_dictionaries:
+            self._file.write(json.dumps(account_dictionary, default=encode_json_value) + '\n')
+        self._file.flush()
+
+    def close(self):
+        """closes the output file"""
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ColumnarSink:
+    """writes account information dictionaries to a columnar table, one row per filing
+
+    Args:
+        directory (str): directory the part files are written to
+        chunk_rows (int, optional): rows buffered before a part file is written. Defaults to cfg.COLUMNAR_CHUNK_ROWS.
+        pence (bool, optional): write monetary values as int64 pence. Defaults to False.
+    """
+
+    def __init__(self, directory, chunk_rows=cfg.COLUMNAR_CHUNK_ROWS, pence=False):
+        schema = ACCOUNT_INFORMATION_SCHEMA_PENCE if pence else ACCOUNT_INFORMATION_SCHEMA
+        self._writer = ColumnarWriter(directory, schema, chunk_rows=chunk_rows)
+
+    def write(self, account_dictionaries):
+        """writes a batch of account information dictionaries"""
+        self._writer.extend(account_dictionaries)
+
+    def close(self):
+        """writes any buffered rows"""
+        self._writer.close()
+
+
+class MongoSink:
+    """writes account information dictionaries to a MongoDB collection. New documents are inserted and stored documents
+    left unchanged with insert_accounts_in_collection, unless update is set, in which case the changed fields of stored
+    documents are overwritten with update_accounts_in_collection
+
+    Args:
+        uri (str): MongoDB connection string
+        database (str): database name
+        collection (str): collection name
+        update (bool, optional): overwrite the changed fields of stored documents. Defaults to False.
+    """
+
+    def __init__(self, uri, database, collection, update=False):
+        from pymongo import MongoClient
+        self._client = MongoClient(uri)
+        self._collection = self._client[database][collection]
+        self._write = update_accounts_in_collection if update else insert_accounts_in_collection
+
+    def write(self, account_dictionaries):
+        """writes a batch of account information dictionaries"""
+        if account_dictionaries:
+            self._write(self._collection, account_dictionaries)
+
+    def close(self):
+        """closes the MongoDB client"""
+        self._client.close()
+
+
+class OracleSink:
+    """writes account information dictionaries to an Oracle table with columns id VARCHAR2(32) and document CLOB,
+    holding each dictionary as a JSON document. Existing rows are replaced
+
+    Args:
+        dsn (str): Oracle connection string
+        user (str): database user, whose password is read from the cfg.CLI_ORACLE_PASSWORD_ENV environment variable
+        table (str, optional): table name. Defaults to cfg.CLI_ORACLE_TABLE.
+    """
+
+    def __init__(self, dsn, user, table=cfg.CLI_ORACLE_TABLE):
+        import oracledb
+        self._connection = oracledb.connect(user=user, password=os.environ.get(cfg.CLI_ORACLE_PASSWORD_ENV), dsn=dsn)
+        self._clob = oracledb.DB_TYPE_CLOB
+        self._statement = (
+            f'MERGE INTO {table} t USING (SELECT :id AS id, :document AS document FROM dual) s ON (t.id = s.id) '
+            'WHEN MATCHED THEN UPDATE SET t.document = s.document '
+            'WHEN NOT MATCHED THEN INSERT (id, document) VALUES (s.id, s.document)'
+        )
+
+    def write(self, account_dictionaries):
+        """writes a batch of account information dictionaries"""
+        if not account_dictionaries:
+            return
+        rows = [
+            {'id': d['_id'], 'document': json.dumps(d, default=encode_json_value)} for d in account_dictionaries
+        ]
+        with self._connection.cursor() as cursor:
+            cursor.setinputsizes(document=self._clob)
+            cursor.executemany(self._statement, rows)
+        self._connection.commit()
+
+    def close(self):
+        """closes the Oracle connection"""
+        self._connection.close()
+
+
+class ProgressReporter:
+    """reports the throughput of a batch run as a single progress line, rewritten in place at most once per interval
+
+    Args:
+        stream (file, optional): stream the progress line is written to. Defaults to sys.stderr.
+        interval (float, optional): minimum seconds between updates. Defaults to cfg.CLI_PROGRESS_INTERVAL.
+        enabled (bool, optional): whether the progress line is written, the totals being kept either way. Defaults to
+        True.
+    """
+
+    def __init__(self, stream=None, interval=cfg.CLI_PROGRESS_INTERVAL, enabled=True):
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.enabled = enabled
+        self.documents = 0
+        self.bytes = 0
+        self.failures = 0
+        self._start = time.perf_counter()
+        self._last_report = None
+
+    def format_line(self):
+        """returns the progress line for the documents processed so far
+
+        Returns:
+            str: document and failure counts with documents and megabytes per second
+        """
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        return (
+            f'{self.documents} docs, {self.failures} failed | '
+            f'{self.documents / elapsed:.1f} docs/s, {self.bytes / elapsed / 1e6:.2f} MB/s'
+        )
+
+    def update(self, documents, nbytes, failures):
+        """adds processed documents to the totals and rewrites the progress line if the interval has passed
+
+        Args:
+            documents (int): documents processed
+            nbytes (int): raw bytes read since the last update
+            failures (int): documents processed which could not be extracted
+        """
+        self.documents += documents
+        self.bytes += nbytes
+        self.failures += failures
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last_report is None or now - self._last_report >= self.interval:
+            self._last_report = now
+            self.stream.write('\r' + self.format_line())
+            self.stream.flush()
+
+    def close(self):
+        """writes the final progress line"""
+        if not self.enabled:
+            return
+        self.stream.write('\r' + self.format_line() + '\n')
+        self.stream.flush()
+
+
+def read_file_list(file_list):
+    """reads the paths listed in a file, one per line, skipping blank lines and lines starting with '#'
+
+    Args:
+        file_list (str): path of the file list, or '-' for stdin
+
+    Returns:
+        list: listed paths
+    """
+    if file_list == '-':
+        lines = sys.stdin.readlines()
+    else:
+        with open(file_list, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith('#')]
+
+
+def iter_batches(iterable, batch_size):
+    """yields lists of up to batch_size items from an iterable"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def create_sink(args):
+    """creates the output sink selected by parsed ingest arguments
+
+    Args:
+        args (argparse.Namespace): arguments added by add_ingest_arguments
+
+    Raises:
+        KeyError: if the output type is not recognised
+
+    Returns:
+        object: sink with write and close methods
+    """
+    if args.output == 'jsonl':
+        return JsonLinesSink(args.destination)
+    elif args.output == 'columnar':
+        return ColumnarSink(args.destination, pence=args.pence)
+    elif args.output == 'mongo':
+        return MongoSink(args.destination, args.database, args.collection, update=args.update)
+    elif args.output == 'oracle':
+        return OracleSink(args.destination, args.user, args.collection or cfg.CLI_ORACLE_TABLE)
+    raise KeyError(f"Unrecognised output type '{args.output}'")
+
+
+def add_ingest_arguments(parser):
+    """adds the ingest command line arguments to an argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): parser to add the arguments to
+    """
+    parser.add_argument('paths', nargs='*', help='CH archives, directories of archives or accounts files')
+    parser.add_argument('--file-list', action='append', default=[],
+                        help="file listing further input paths, one per line, or '-' for stdin")
+    parser.add_argument('--cache-dir', required=True, help='HttpCache directory for taxonomies')
+    parser.add_argument('--output', required=True, choices=('jsonl', 'columnar', 'mongo', 'oracle'))
+    parser.add_argument('--destination', required=True,
+                        help="jsonl file or '-', columnar directory, MongoDB URI or Oracle DSN")
+    parser.add_argument('--database', help='MongoDB database')
+    parser.add_argument('--collection', help='MongoDB collection or Oracle table')
+    parser.add_argument('--user', help=f'Oracle user, with password read from ${cfg.CLI_ORACLE_PASSWORD_ENV}')
+    parser.add_argument('--update', action='store_true',
+                        help='overwrite the changed fields of documents already stored in MongoDB, rather than only '
+                             'inserting new documents')
+    parser.add_argument('--workers', type=int, default=cfg.BATCH_THREAD_WORKERS, help='extraction threads')
+    parser.add_argument('--batch-size', type=int, default=cfg.CLI_BATCH_SIZE, help='documents written per batch')
+    parser.add_argument('--quiet', action='store_true', help='do not report progress')
+    parser.add_argument('--pence', action='store_true', help='store monetary values as exact integer pence')
+    parser.add_argument('--quarantine', metavar='PATH',
+                        help='CSV file the documents failing prevalidation are appended to, with their reason codes')
+    parser.add_argument('--result-cache', metavar='PATH',
+                        help='SQLite cache of extracted results, so that files seen before are not parsed again')
+    parser.add_argument('--aggregates', metavar='PATH',
+                        help='aggregates file updated with the ingested accounts, created if missing')
+    parser.add_argument('--name-index', metavar='PATH',
+                        help='registered name index (.npz) updated with the ingested accounts, created if missing')
+    parser.add_argument('--profiled', action='store_true',
+                        help='extract through the extraction profile registered for the producer of each document')
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help='profile a sample of documents, in thread mode only, writing PREFIX.prof and '
+                             'PREFIX.memory.txt. Allocations are only per document with --workers 1')
+    parser.add_argument('--profile-sample-rate', type=float, default=cfg.PROFILE_SAMPLE_RATE,
+                        help='fraction of documents profiled')
+    parser.add_argument('--capture-slow', metavar='DIR',
+                        help='write the slowest and largest documents to a replay corpus, in thread mode only')
+    parser.add_argument('--capture-top-n', type=int, default=cfg.SLOW_FILING_TOP_N,
+                        help='documents captured in each of the slowest and largest sets')
+    budget = parser.add_argument_group('budgets', 'setting --document-timeout runs each document in a worker process')
+    budget.add_argument('--document-timeout', type=float, help='wall clock budget per document in seconds')
+    budget.add_argument('--max-document-bytes', type=int, default=cfg.BATCH_MAX_DOCUMENT_BYTES,
+                        help='documents over this size are extracted in the slow lane')
+    budget.add_argument('--slow-lane-workers', type=int, default=cfg.BATCH_SLOW_LANE_WORKERS,
+                        help='worker processes in the slow lane')
+    budget.add_argument('--slow-lane-timeout', type=float, default=cfg.BATCH_SLOW_LANE_TIMEOUT,
+                        help='wall clock budget per slow lane document in seconds')
+
+
+def check_ingest_arguments(parser, args):
+    """exits with a usage error for combinations of ingest arguments which are not supported
+
+    Args:
+        parser (argparse.ArgumentParser): ingest argument parser
+        args (argparse.Namespace): arguments added by add_ingest_arguments
+    """
+    if args.document_timeout is not None and args.capture_slow:
+        # the stage timings are taken in the worker processes, which the slow filing recorder does not reach
+        parser.error('--capture-slow is not supported with --document-timeout')
+    if args.document_timeout is not None and args.profile:
+        # the documents are parsed in the worker processes, which the sampling profiler does not reach
+        parser.error('--profile is not supported with --document-timeout')
+
+
+def run_ingest(args):
+    """runs the ingest command for parsed command line arguments
+
+    Args:
+        args (argparse.Namespace): arguments added by add_ingest_arguments
+
+    Returns:
+        int: exit status
+    """
+    paths = list(args.paths)
+    for file_list in args.file_list:
+        paths.extend(read_file_list(file_list))
+
+    intern_table = InternTable()
+    parser = XbrlParserDA(ThreadSafeHttpCache(args.cache_dir), pence=args.pence, intern_table=intern_table)
+    sink = create_sink(args)
+    progress = ProgressReporter(enabled=not args.quiet)
+    read_bytes = [0]
+
+    def _counted(sources):
+        for name, contents in sources:
+            read_bytes[0] += len(contents)
+            yield name, contents
+
+    sources = _counted(iter_archive_members(paths))
+    profiler = SamplingProfiler(args.profile_sample_rate) if args.profile else None
+    recorder = SlowFilingRecorder(args.capture_top_n) if args.capture_slow else None
+    quarantine = Quarantine() if args.quarantine else None
+    result_cache = ResultCache(args.result_cache) if args.result_cache else None
+    aggregates = None
+    if args.aggregates:
+        aggregates = AccountAggregates.load(args.aggregates) if os.path.exists(args.aggregates) else AccountAggregates()
+    name_index = None
+    if args.name_index:
+        name_index = NameIndex.load(args.name_index) if os.path.exists(args.name_index) else NameIndex()
+    if args.document_timeout is None:
+        results = iter_account_information(sources, parser, max_workers=args.workers, profiler=profiler,
+                                           recorder=recorder, quarantine=quarantine, result_cache=result_cache,
+                                           profiled=args.profiled)
+    else:
+        results = iter_account_information_budgeted(
+            sources, args.cache_dir, max_workers=args.workers, max_bytes=args.max_document_bytes,
+            timeout=args.document_timeout, slow_workers=args.slow_lane_workers, slow_timeout=args.slow_lane_timeout,
+            pence=args.pence, quarantine=quarantine, intern_table=intern_table, result_cache=result_cache,
+            profiled=args.profiled
+        )
+
+    def _reported(results):
+        # progress is counted as each result arrives, rather than once per batch written to the sink
+        for name, result in results:
+            progress.update(1, read_bytes[0] - progress.bytes, int(result is None))
+            yield name, result
+
+    try:
+        for batch in iter_batches(_reported(results), args.batch_size):
+            account_dictionaries = [result for _, result in batch if result is not None]
+            sink.write(account_dictionaries)
+            if aggregates is not None:
+                aggregates.update(account_dictionaries)
+            if name_index is not None:
+                name_index.extend(account_dictionaries)
+    finally:
+        sink.close()
+        progress.close()
+        if profiler is not None:
+            profiler.dump(args.profile)
+        if recorder is not None:
+            recorder.write_corpus(args.capture_slow)
+        if aggregates is not None:
+            aggregates.save(args.aggregates)
+        if name_index is not None:
+            name_index.save(args.name_index)
+        if quarantine is not None:
+            quarantine.write(args.quarantine)
+        if result_cache is not None:
+            result_cache.close()
+    _s = f'Ingested {progress.documents - progress.failures} of {progress.documents} documents'
+    logging.info(_s)
+    if quarantine:
+        _s = f'Quarantined {len(quarantine)} documents: {quarantine.counts()}'
+        logging.warning(_s)
+    return 0
+
+
+def add_replay_arguments(parser):
+    """adds the replay command line arguments to an argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): parser to add the arguments to
+    """
+    parser.add_argument('corpus', help='replay corpus directory written by ingest --capture-slow')
+    parser.add_argument('--cache-dir', required=True, help='HttpCache directory for taxonomies')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per filing, keeping the fastest')
+
+
+def run_replay(args):
+    """runs the replay command for parsed command line arguments, printing recorded and replayed stage timings
+
+    Args:
+        args (argparse.Namespace): arguments added by add_replay_arguments
+
+    Returns:
+        int: exit status
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache(args.cache_dir))
+    print(format_replay(replay_corpus(args.corpus, parser, repeat=args.repeat)))
+    return 0
+
+
+def add_bench_arguments(parser):
+    """adds the benchmark command line arguments to an argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): parser to add the arguments to
+    """
+    parser.add_argument('paths', nargs='*', help='CH archives, directories of archives or accounts files to benchmark')
+    parser.add_argument('--template', action='append', default=[],
+                        help='iXBRL file repeated to generate the benchmark documents when no paths are given')
+    parser.add_argument('--count', type=int, default=cfg.BENCH_DOCUMENTS, help='documents generated from templates')
+    parser.add_argument('--cache-dir', required=True, help='HttpCache directory for taxonomies')
+    parser.add_argument('--workers', type=int, nargs='+', default=list(cfg.BENCH_WORKER_COUNTS),
+                        help='worker counts to benchmark')
+
+
+def run_bench(args):
+    """runs the benchmark command for parsed command line arguments, printing a table of results
+
+    Args:
+        args (argparse.Namespace): arguments added by add_bench_arguments
+
+    Returns:
+        int: exit status, non-zero if there was nothing to benchmark
+    """
+    if args.paths:
+        # the archives are read within each timed run
+        read_sources = partial(iter_archive_members, args.paths)
+    else:
+        templates = []
+        for template in args.template:
+            with open(template, 'rb') as f:
+                templates.append(f.read())
+        read_sources = partial(generate_sources, templates, args.count)
+    parser = XbrlParserDA(ThreadSafeHttpCache(args.cache_dir))
+    results = run_benchmarks(read_sources, parser, args.workers)
+    if not results:
+        print('no documents to benchmark, give archive paths or --template files', file=sys.stderr)
+        return 1
+    print(format_benchmarks(results))
+    return 0
+
+
+def add_validate_arguments(parser):
+    """adds the validate command line arguments to an argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): parser to add the arguments to
+    """
+    parser.add_argument('reference', help='CSV file of expected values with a header line of account information keys')
+    parser.add_argument('extracted', help='columnar directory written by ingest --output columnar')
+    parser.add_argument('--fields', nargs='+', help='fields compared, defaulting to every field of both tables')
+    parser.add_argument('--mismatches', metavar='PATH', help='CSV file the mismatches are written to')
+    parser.add_argument('--rtol', type=float, default=cfg.VALIDATION_RTOL, help='relative tolerance of numbers')
+    parser.add_argument('--atol', type=float, default=cfg.VALIDATION_ATOL,
+                        help='absolute tolerance of numbers, in pounds for monetary values')
+    parser.add_argument('--pence', action='store_true',
+                        help='compare with a table written by ingest --pence, reading reference pounds as pence')
+
+
+def run_validate(args):
+    """runs the validate command for parsed command line arguments, printing per-field match rates
+
+    Args:
+        args (argparse.Namespace): arguments added by add_validate_arguments
+
+    Returns:
+        int: exit status
+    """
+    summary, mismatches = validate_extractions(read_reference_csv(args.reference, pence=args.pence),
+                                               read_columnar(args.extracted), fields=args.fields, rtol=args.rtol,
+                                               atol=args.atol, pence=args.pence)
+    print(format_validation(summary))
+    if args.mismatches:
+        write_mismatches(mismatches, args.mismatches)
+    return 0
+
+
+def main(argv=None):
+    """command line entry point for the digiaccounts console command"""
+    parser = argparse.ArgumentParser(prog='digiaccounts', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest_parser = subparsers.add_parser('ingest', help='extract account information from iXBRL files')
+    add_ingest_arguments(ingest_parser)
+    add_warm_cache_arguments(subparsers.add_parser('warm-cache', help='fetch referenced taxonomies into a cache'))
+    add_replay_arguments(subparsers.add_parser('replay', help='re-run a replay corpus and compare timings'))
+    add_bench_arguments(subparsers.add_parser('bench', help='benchmark end-to-end ingest throughput'))
+    add_validate_arguments(subparsers.add_parser('validate', help='compare extracted accounts to reference values'))
+
+    args = parser.parse_args(argv)
+    if args.command == 'ingest':
+        check_ingest_arguments(ingest_parser, args)
+        return run_ingest(args)
+    elif args.command == 'replay':
+        return run_replay(args)
+    elif args.command == 'bench':
+        return run_bench(args)
+    elif args.command == 'validate':
+        return run_validate(args)
+    return run_warm_cache(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""chunked columnar storage for tables of extracted accounts data. Rows are buffered up to a fixed chunk size and then
+written as one NumPy .npz part file per chunk, so that tables spanning thousands of filings are written at bounded
+memory. Missing values are recorded in a validity array alongside each column"""
+
+import os
+import glob
+import logging
+import numpy as np
+
+from digiaccounts.digiaccounts_data import get_financial_fact_rows
+from digiaccounts.digiaccounts_intern import InternTable
+from digiaccounts import config as cfg
+
+VALID_SUFFIX = '__valid'
+
+# values written in place of None, by NumPy dtype kind
+FILL_VALUES = {
+    'U': '',
+    'f': np.nan,
+    'i': 0,
+    'b': False,
+    'M': np.datetime64('NaT'),
+}
+
+FINANCIAL_FACT_SCHEMA = {
+    '_id': 'U',
+    'concept': 'U',
+    'dimensions': 'U',
+    'start_date': 'datetime64[D]',
+    'date': 'datetime64[D]',
+    'value': 'float64',
+    'occurrence': 'int64',
+}
+
+MONETARY_KEYS = (
+    cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT,
+    cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_INTANGIBLE_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_INTANGIBLE_ASSETS_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT,
+    cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_INVESTMENT_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_INVESTMENT_ASSETS_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_INVESTMENT_PROPERTY_CLOSING_CURRENT,
+    cfg.MONGO_KEY_INVESTMENT_PROPERTY_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_BIOLOGICAL_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_BIOLOGICAL_ASSETS_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_PREVIOUS,
+    cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT,
+    cfg.MONGO_KEY_EQUITY_CLOSING_PREVIOUS,
+)
+
+ACCOUNT_INFORMATION_SCHEMA = {
+    '_id': 'U',
+    'filing_date': 'datetime64[D]',
+    cfg.MONGO_KEY_ENTITY_REGISTRATION: 'U',
+    cfg.MONGO_KEY_ENTITY_NAME: 'U',
+    cfg.MONGO_KEY_START_DATE: 'datetime64[D]',
+    cfg.MONGO_KEY_END_DATE: 'datetime64[D]',
+    cfg.MONGO_KEY_POSTAL_CODE: 'U',
+    cfg.MONGO_KEY_POSTCODE_OUTWARD: 'U',
+    cfg.MONGO_KEY_POSTCODE_INWARD: 'U',
+    cfg.MONGO_KEY_POSTCODE_AREA: 'U',
+    cfg.MONGO_KEY_POSTCODE_DISTRICT: 'U',
+    cfg.MONGO_KEY_DORMANT_STATE: 'bool',
+    cfg.MONGO_KEY_ACCOUNTING_SOFTWARE: 'U',
+    cfg.MONGO_KEY_AVERAGE_EMPLOYEES: 'float64',
+} | {key: 'float64' for key in MONETARY_KEYS}
+
+# schemas of tables extracted by a parser created with pence=True
+FINANCIAL_FACT_SCHEMA_PENCE = FINANCIAL_FACT_SCHEMA | {'value': 'int64'}
+ACCOUNT_INFORMATION_SCHEMA_PENCE = ACCOUNT_INFORMATION_SCHEMA | {key: 'int64' for key in MONETARY_KEYS}
+
+
+def to_masked_column(values, dtype):
+    """converts a list of values to a masked array, masked where values are None
+
+    Args:
+        values (list): column values
+        dtype (numpy.dtype): NumPy dtype of the column
+
+    Returns:
+        numpy.ma.MaskedArray: column values, with missing values set to the fill value of the dtype
+    """
+    dtype = np.dtype(dtype)
+    fill = FILL_VALUES[dtype.kind]
+    return np.ma.MaskedArray(
+        np.array([fill if v is None else v for v in values], dtype=dtype),
+        mask=np.fromiter((v is None for v in values), dtype=bool, count=len(values)),
+    )
+
+
+def to_masked_columns(rows, schema=ACCOUNT_INFORMATION_SCHEMA):
+    """converts a batch of rows, such as account information dictionaries, to masked arrays in the same form as
+    read_columnar returns
+
+    Args:
+        rows (list): dictionaries of values keyed by column name
+        schema (dict, optional): column names and their NumPy dtypes. Defaults to ACCOUNT_INFORMATION_SCHEMA.
+
+    Returns:
+        dict: masked arrays keyed by column name, masked where values were missing
+    """
+    return {name: to_masked_column([row.get(name) for row in rows], dtype) for name, dtype in schema.items()}
+
+
+class ColumnarWriter:
+    """writes rows of a table to a directory of columnar part files, one part per chunk of rows. Part files already in
+    the directory are kept, so a table can be appended to by later runs
+
+    Args:
+        directory (str): directory the part files are written to
+        schema (dict): column names and their NumPy dtypes
+        chunk_rows (int, optional): rows buffered before a part file is written. Defaults to cfg.COLUMNAR_CHUNK_ROWS.
+    """
+
+    def __init__(self, directory, schema, chunk_rows=cfg.COLUMNAR_CHUNK_ROWS):
+        self.directory = directory
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        os.makedirs(directory, exist_ok=True)
+        self._part = len(glob.glob(os.path.join(directory, 'part-*.npz')))
+        self._columns = {name: [] for name in self.schema}
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, row):
+        """appends a row to the table, writing a part file once chunk_rows rows are buffered
+
+        Args:
+            row (dict): values keyed by column name. Missing columns and None values are recorded as invalid
+        """
+        for name, values in self._columns.items():
+            values.append(row.get(name))
+        self._buffered += 1
+        if self._buffered >= self.chunk_rows:
+            self.flush()
+
+    def extend(self, rows):
+        """appends an iterable of rows to the table
+
+        Args:
+            rows (iterable): dictionaries of values keyed by column name
+        """
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """writes the buffered rows to a new part file"""
+        if not self._buffered:
+            return
+        arrays = {}
+        for name, dtype in self.schema.items():
+            column = to_masked_column(self._columns[name], dtype)
+            arrays[name + VALID_SUFFIX] = ~np.ma.getmaskarray(column)
+            arrays[name] = column.data
+        part_path = os.path.join(self.directory, f'part-{self._part:05d}.npz')
+        np.savez(part_path, **arrays)
+        _s = f"Wrote {self._buffered} rows to '{part_path}'"
+        logging.info(_s)
+        self.rows_written += self._buffered
+        self._part += 1
+        self._columns = {name: [] for name in self.schema}
+        self._buffered = 0
+
+    def close(self):
+        """writes any remaining buffered rows"""
+        self.flush()
+
+
+def read_columnar(directory, columns=None):
+    """reads a table written by ColumnarWriter
+
+    Args:
+        directory (str): directory holding the part files
+        columns (list, optional): names of the columns to read. Defaults to None, reading every column.
+
+    Returns:
+        dict: masked arrays keyed by column name, masked where values were missing
+    """
+    parts = []
+    for part_path in sorted(glob.glob(os.path.join(directory, 'part-*.npz'))):
+        # each array read from the part is a copy, so the file is closed as soon as the columns are read
+        with np.load(part_path) as part:
+            if columns is None:
+                columns = [name for name in part.files if not name.endswith(VALID_SUFFIX)]
+            parts.append({key: part[key] for name in columns for key in (name, name + VALID_SUFFIX)})
+    if not parts:
+        return {}
+    table = {}
+    for name in columns:
+        values = np.concatenate([part[name] for part in parts])
+        valid = np.concatenate([part[name + VALID_SUFFIX] for part in parts])
+        table[name] = np.ma.MaskedArray(values, mask=~valid)
+    return table
+
+
+def write_financial_fact_table(documents, directory, chunk_rows=cfg.COLUMNAR_CHUNK_ROWS, pence=False,
+                               intern_table=None):
+    """streams the GBP financial facts of many XBRL instances into a long format columnar fact table. Only one instance
+    and one chunk of rows are held at a time, and the concept names and dimension signatures of the buffered rows are
+    interned for the whole table
+
+    Args:
+        documents (iterable): pairs of unique ID and XbrlInstance
+        directory (str): directory the part files are written to
+        chunk_rows (int, optional): rows buffered before a part file is written. Defaults to cfg.COLUMNAR_CHUNK_ROWS.
+        pence (bool, optional): write values as int64 pence, for instances parsed with pence=True. Defaults to False.
+        intern_table (InternTable, optional): table the strings of the rows are interned in, such as the table of the
+        parser. Defaults to None, using a new table.
+
+    Returns:
+        int: number of fact rows written
+    """
+    schema = FINANCIAL_FACT_SCHEMA_PENCE if pence else FINANCIAL_FACT_SCHEMA
+    if intern_table is None:
+        intern_table = InternTable()
+    with ColumnarWriter(directory, schema, chunk_rows=chunk_rows) as writer:
+        for unique_id, xbrl_instance in documents:
+            try:
+                rows = get_financial_fact_rows(xbrl_instance, intern_table)
+            except KeyError as _e:
+                logging.warning(repr(_e))
+                continue
+            for row in rows:
+                row['_id'] = unique_id
+                writer.append(row)
+    return writer.rows_written
@@ -7,11 +7,12 @@ import dateutil.parser
 import digiaccounts.config as cfg
 from digiaccounts.digiaccounts_util import (
     check_name_is_string,
+    check_unit_gbp,
+    check_instant_date,
     return_dimension_dict,
+    return_dimension_signature,
     dimension_in_dimension_dict,
-    #    check_unit_gbp,
     #    check_string_in_name,
-    #    check_instant_date,
     #    return_dimension_values,
 )
 
@@ -378,81 +379,49 @@ def get_entity_equity(xbrl_instance):
     return get_openclose_pairs(xbrl_instance, fact_name, dim_name=dim_name)
 
 
-# def get_financial_facts(xbrl_instance):
-#     """create lists for the financial facts in XBRL file instances of accounts information
+def get_financial_fact_rows(xbrl_instance, intern_table=None):
+    """extracts every numeric GBP fact from an XBRL file instance of accounts information in a single pass, as rows of a
+    long format fact table. Facts sharing a concept, dimension signature and date are told apart by their occurrence
+    number in document order
 
-#     Args:
-#         xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
-#         to be extracted
-
-#     Returns:
-#         dict: a dictionary of the financial data from the accounts, listing the Fact, Value and Date for each data
-#         point
-#     """
-#     names = []
-#     values = []
-#     dates = []
-
-#     for fact in xbrl_instance.facts:
-#         if (check_instant_date(fact)) and (check_unit_gbp(fact)):
-#             fact_dimensions = return_dimension_dict(fact)
-#             if check_name_is_string('creditors', fact):
-#                 if 'MaturitiesOrExpirationPeriodsDimension' in fact_dimensions:
-#                     if fact_dimensions['MaturitiesOrExpirationPeriodsDimension'] == 'WithinOneYear':
-#                         period = 'DueWithinOneYear'
-#                         names.append(fact.concept.name + period)
-#                     else:
-#                         period = 'DueAfterOneYear'
-#                         names.append(fact.concept.name + period)
-#                 elif 'FinancialInstrumentclosingNon-closingDimension' in fact_dimensions:
-#                     if (fact_dimensions['FinancialInstrumentclosingNon-closingDimension']
-#                             == 'closingFinancialInstruments'):
-#                         period = 'DueWithinOneYear'
-#                         names.append(fact.concept.name + period)
-#                     else:
-#                         period = 'DueAfterOneYear'
-#                         names.append(fact.concept.name + period)
-#                 else:
-#                     _s = 'Creditors Fact does not contain known credit period key.'
-#                     _s_json = f'Fact JSON dictionary: {fact.json()}'
-#                     logging.error(_s)
-#                     logging.debug(_s_json)
-#                     raise KeyError(_s)
-#             elif (check_name_is_string('equity', fact)) and ('EquityClassesDimension' in fact_dimensions):
-#                 entity_type = fact_dimensions['EquityClassesDimension']
-#                 names.append(fact.concept.name + entity_type)
-#             else:
-#                 names.append(fact.concept.name)
-#             values.append(fact.value)
-#             dates.append(fact.context.instant_date.isoformat())
-#     if names:
-#         return {'Fact': names, 'Value': values, 'Date': dates}
-#     else:
-#         raise KeyError(cfg.financial_data_error)
-
-
-# def get_financial_table(xbrl_instance):
-#     """formats and returns a pandas dataframe of finanical data contained within an XBRL file instance of accounts
-#     information
-
-#     Args:
-#         xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
-#         to be extracted
-
-#     Returns:
-#         pf (DataFrame): a pandas dataframe containing the finanical information split out by reporting period start
-#         and end date
-#     """
-#     financial_dict = get_financial_facts(xbrl_instance)
-
-#     df = pd.DataFrame(financial_dict)
-#     mask = df[['Fact', 'Date']].duplicated(keep=False)
-#     df.loc[mask, 'Fact'] += df.groupby(['Fact', 'Date']).cumcount().add(1).astype(str)
-
-#     df = df.pivot(index='Fact', columns='Date', values='Value').reset_index()
-#     df.index.name = None
+    Args:
+        xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
+        to be extracted
+        intern_table (InternTable, optional): table shared by a batch, holding the single copy of each concept name and
+        dimension signature of its rows. Defaults to None.
 
-#     return df
+    Returns:
+        list: a list of dictionaries giving the concept, dimension signature, start date (duration facts only), date,
+        value and occurrence of each fact
+    """
+    _s = "Searching instance for GBP financial facts"
+    logging.info(_s)
+    rows = []
+    occurrences = {}
+    for fact in xbrl_instance.facts:
+        if (not check_unit_gbp(fact)) or isinstance(fact.value, str):
+            continue
+        if check_instant_date(fact):
+            start_date, date = None, fact.context.instant_date
+        else:
+            start_date, date = getattr(fact.context, 'start_date', None), getattr(fact.context, 'end_date', None)
+        concept, dimensions = fact.concept.name, return_dimension_signature(fact)
+        if intern_table is not None:
+            concept, dimensions = intern_table.intern(concept), intern_table.intern(dimensions)
+        key = (concept, dimensions, date)
+        occurrences[key] = occurrences.get(key, 0) + 1
+        rows.append({
+            'concept': concept,
+            'dimensions': dimensions,
+            'start_date': start_date,
+            'date': date,
+            'value': fact.value,
+            'occurrence': occurrences[key],
+        })
+    if rows:
+        return rows
+    else:
+        raise KeyError(cfg.financial_data_error())
 
 
 # def get_entity_address(xbrl_instance):
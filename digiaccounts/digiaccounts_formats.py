@@ -0,0 +1,130 @@
+"""fast parsing of ix:nonFraction values. The numeric transformation formats used by UK filings are resolved once, by
+registry namespace and format code, to precompiled routines in a dispatch table, and the common case of plain digits
+with thousands separators skips regular expressions altogether. Any other format is handed to the py-xbrl
+implementation, _extract_non_fraction_value, whose results these routines reproduce"""
+
+import re
+
+import xml.etree.ElementTree as ET
+from xbrl.instance import _extract_non_fraction_value, _extract_text_value
+
+NON_DOT_DECIMAL_PATTERN = re.compile(r'[^\d.]+')
+NON_COMMA_DECIMAL_PATTERN = re.compile(r'[^\d,]+')
+
+TRANSFORMATION_REGISTRY_2008 = 'http://www.xbrl.org/2008/inlineXBRL/transformation'
+TRANSFORMATION_REGISTRY_1 = 'http://www.xbrl.org/inlineXBRL/transformation/2010-04-20'
+TRANSFORMATION_REGISTRY_2 = 'http://www.xbrl.org/inlineXBRL/transformation/2011-07-31'
+TRANSFORMATION_REGISTRY_3 = 'http://www.xbrl.org/inlineXBRL/transformation/2015-02-26'
+TRANSFORMATION_REGISTRY_4 = 'http://www.xbrl.org/inlineXBRL/transformation/2020-02-12'
+TRANSFORMATION_REGISTRY_5 = 'http://www.xbrl.org/inlineXBRL/transformation/2022-02-16'
+
+# powers of ten of the scales found in filings, computed as pow(10, scale) as in _extract_non_fraction_value
+SCALE_FACTORS = {scale: pow(10, scale) for scale in range(-12, 13)}
+
+
+def parse_dot_decimal(text):
+    """returns the value of a number formatted as nnn*nnn*nnn.n, such as '1,234,567.89'"""
+    digits = text.replace(',', '')
+    if digits.isdecimal():
+        return float(digits)
+    return float(NON_DOT_DECIMAL_PATTERN.sub('', text))
+
+
+def parse_comma_decimal(text):
+    """returns the value of a number formatted as nnn*nnn*nnn,n, such as '1.234.567,89'"""
+    digits = text.replace('.', '')
+    if digits.isdecimal():
+        return float(digits)
+    return float(NON_COMMA_DECIMAL_PATTERN.sub('', text).replace(',', '.'))
+
+
+def parse_zero(text):
+    """returns the value of a fixed zero format, such as a dash"""
+    return 0.0
+
+
+FORMAT_PARSERS = {
+    **{
+        (registry, code): parser
+        for registry in (TRANSFORMATION_REGISTRY_2008, TRANSFORMATION_REGISTRY_1)
+        for code, parser in (
+            ('numcomma', parse_comma_decimal),
+            ('numcommadot', parse_dot_decimal),
+            ('numdash', parse_zero),
+            ('numdotcomma', parse_comma_decimal),
+            ('numspacecomma', parse_comma_decimal),
+            ('numspacedot', parse_dot_decimal),
+        )
+    },
+    **{
+        (registry, code): parser
+        for registry in (TRANSFORMATION_REGISTRY_2, TRANSFORMATION_REGISTRY_3)
+        for code, parser in (
+            ('numcommadecimal', parse_comma_decimal),
+            ('numdotdecimal', parse_dot_decimal),
+            ('zerodash', parse_zero),
+        )
+    },
+    **{
+        (registry, code): parser
+        for registry in (TRANSFORMATION_REGISTRY_4, TRANSFORMATION_REGISTRY_5)
+        for code, parser in (
+            ('num-comma-decimal', parse_comma_decimal),
+            ('num-dot-decimal', parse_dot_decimal),
+            ('fixed-zero', parse_zero),
+        )
+    },
+}
+
+
+def _get_format_parser(fact_format, ns_map):
+    """returns the parser of a format QName from FORMAT_PARSERS, or None if it has none"""
+    prefix, _, code = fact_format.partition(':')
+    registry = ns_map.get(prefix)
+    if not code or registry is None:
+        return None
+    return FORMAT_PARSERS.get((registry, code))
+
+
+def extract_non_fraction_value(fact_elem: ET.Element) -> float or None or str:
+    """returns the value of an ix:nonFraction element with its format, scale and sign applied, giving the same result as
+    _extract_non_fraction_value
+
+    Args:
+        fact_elem (ET.Element): ix:nonFraction element, with an 'ns_map' attribute as added by parse_file
+
+    Returns:
+        float or None or str: value of the fact, None if it is nil, or the raw text if its format could not be applied
+    """
+    attrib = fact_elem.attrib
+    ns_map = attrib['ns_map']
+    if 'xsi' in ns_map and attrib.get('{' + ns_map['xsi'] + '}nil') == 'true':
+        return None
+
+    fact_format = attrib.get('format')
+    if fact_format is None:
+        parse = float
+    else:
+        parse = _get_format_parser(fact_format, ns_map)
+        if parse is None:
+            return _extract_non_fraction_value(fact_elem)
+
+    text = '' if fact_elem.text is None else fact_elem.text
+    for child in fact_elem:
+        text += _extract_text_value(child)
+    if fact_format is not None:
+        text = text.strip()
+
+    scale = attrib.get('scale')
+    if scale is None:
+        value = parse(text)
+    else:
+        scale = int(scale)
+        factor = SCALE_FACTORS.get(scale)
+        value = parse(text) * (pow(10, scale) if factor is None else factor)
+    # floating-point error mitigation, as in _extract_non_fraction_value
+    if abs(value) > 1e6:
+        value = float(round(value))
+    if attrib.get('sign') == '-':
+        value = -value
+    return value
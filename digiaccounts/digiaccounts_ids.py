@@ -0,0 +1,58 @@
+"""functions for deriving entity registration numbers, period end dates and unique IDs from CH archive file names. This
+module only depends on the standard library so that it can be imported without loading the XBRL parser"""
+
+import uuid
+from datetime import datetime
+
+
+def get_file_registration_period_from_filename(filename):
+    """extracts the entity registration number and end period date from CH archive file name
+
+    Args:
+        filename (str): CH archive file name
+
+    Returns:
+        tuple: registration number and end period extracted from the file name
+    """
+    name = filename.split('/')[-1].split('.')[0]
+    registration, end_period = name.split('_')[2:4]
+    end_period = format_end_period(end_period)
+    return registration, end_period
+
+
+def format_end_period(end_period):
+    """converts CH archive end period date to iso format
+
+    Args:
+        end_period (str): _description_
+
+    Returns:
+        str: iso format date
+    """
+    return datetime.strptime(end_period, "%Y%m%d").date().isoformat()
+
+
+def get_uuid(registration, filing_date):
+    """generates a UUID from a registration number and an iso formatted end period date
+
+    Args:
+        registration (str): CH entity registration number
+        end_period (str): iso formatted end period date
+
+    Returns:
+        str: UUID in hexadecimal format
+    """
+    return uuid.uuid5(uuid.NAMESPACE_DNS, '_'.join((registration, filing_date))).hex
+
+
+def create_unique_id(filename):
+    """generates a uuid from a CH archive annual accounts file name
+
+    Args:
+        filename (str): _description_
+
+    Returns:
+        str: uuid in hexadecimal format
+    """
+    registration, end_period = get_file_registration_period_from_filename(filename)
+    return get_uuid(registration, end_period)
@@ -0,0 +1,97 @@
+"""batch-scoped interning of the strings repeated across the filings of a batch: concept names, measures, dimension
+members and dimension signatures. Each filing parsed allocates its own copies of these strings, so results and fact rows
+held for bulk writes keep many equal copies of each. An InternTable shared by the documents of a batch keeps one object
+per distinct string, and comparisons between interned strings succeed on identity. Unlike sys.intern, the strings are
+released with the table once the batch is done.
+
+Only strings drawn from the taxonomies and from small vocabularies are interned, so a table shared by a whole run stays
+bounded by the taxonomies in use. Context and unit IDs, and typed dimension values, are chosen by each filing, often as
+GUIDs, so interning them would add entries for every filing and save nothing"""
+
+
+class InternTable:
+    """table of the distinct strings of a batch. Lookups and inserts are single dictionary operations, so one table can
+    be shared by every thread of a batch"""
+
+    def __init__(self):
+        self.strings = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, string):
+        return string in self.strings
+
+    def intern(self, string):
+        """returns the table's copy of a string, adding the string if it is new
+
+        Args:
+            string (str or None): string to intern
+
+        Returns:
+            str or None: object equal to string shared by the batch, or None if string is None
+        """
+        if string is None:
+            return None
+        return self.strings.setdefault(string, string)
+
+    def intern_concept(self, concept):
+        """interns the name of a taxonomy concept in place
+
+        Args:
+            concept (xbrl.taxonomy.Concept): concept of a fact or dimension
+
+        Returns:
+            xbrl.taxonomy.Concept: the same concept
+        """
+        concept.name = self.intern(concept.name)
+        return concept
+
+    def intern_contexts(self, context_dir):
+        """interns the dimensions and explicit dimension members of parsed contexts in place, leaving the per-filing
+        context IDs and typed dimension values alone
+
+        Args:
+            context_dir (dict): contexts keyed by context ID, as returned by _parse_context_elements
+
+        Returns:
+            dict: the same contexts
+        """
+        for context in context_dir.values():
+            for segment in context.segments:
+                self.intern_concept(segment.dimension)
+                if hasattr(segment, 'member'):
+                    self.intern_concept(segment.member)
+        return context_dir
+
+    def intern_units(self, unit_dir):
+        """interns the measures of parsed units in place, leaving the per-filing unit IDs alone
+
+        Args:
+            unit_dir (dict): units keyed by unit ID, as returned by _parse_unit_elements
+
+        Returns:
+            dict: the same units
+        """
+        for unit in unit_dir.values():
+            for attribute in ('unit', 'numerator', 'denominator'):
+                if hasattr(unit, attribute):
+                    setattr(unit, attribute, self.intern(getattr(unit, attribute)))
+        return unit_dir
+
+    def intern_values(self, dictionary, keys):
+        """interns the string values of some keys of a dictionary in place, such as the fields of account information
+        shared by many filings
+
+        Args:
+            dictionary (dict): dictionary of extracted values
+            keys (tuple): keys whose string values are interned
+
+        Returns:
+            dict: the same dictionary
+        """
+        for key in keys:
+            value = dictionary.get(key)
+            if isinstance(value, str):
+                dictionary[key] = self.intern(value)
+        return dictionary
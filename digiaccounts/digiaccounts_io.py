@@ -1,13 +1,18 @@
 """functions to deploy the XBRL fact extraction functions from digiaccounts_data and place collected data into
 documents"""
 
+import os
 import re
-import uuid
+import mmap
+import time
 import logging
-from io import StringIO
+import threading
+from collections import deque
+from io import RawIOBase, StringIO
 from pathlib import Path
 from typing import List
-from datetime import datetime
+from numbers import Number
+from datetime import datetime, timezone
 import xml.etree.ElementTree as ET
 import dateutil.parser
 from xbrl import InstanceParseException
@@ -26,7 +31,6 @@ from xbrl.instance import (
     TextFact,
     XbrlInstance,
     XbrlParser,
-    _extract_non_fraction_value,
     _extract_non_numeric_value,
     _load_common_taxonomy,
     _parse_context_elements,
@@ -51,69 +55,410 @@ from digiaccounts.digiaccounts_data import (
     get_entity_registered_name
 )
 
-from digiaccounts.digiaccounts_util import check_fact_value_string_none
+from digiaccounts.digiaccounts_formats import extract_non_fraction_value
+from digiaccounts.digiaccounts_intern import InternTable
+from digiaccounts.digiaccounts_util import check_fact_value_string_none, split_postcode, to_pence
+# re-exported for code which imports the file name helpers from here
+from digiaccounts.digiaccounts_ids import (
+    get_file_registration_period_from_filename,
+    format_end_period,
+    get_uuid,
+    create_unique_id
+)
 from digiaccounts import config as cfg
 
+# fields of stored documents which are not produced by extraction, so are never unset by update_accounts_in_collection
+STORED_ONLY_KEYS = ('_id', cfg.MONGO_KEY_FIRST_LOGGED, cfg.MONGO_KEY_LAST_UPDATED)
+
+POSTCODE_PART_KEYS = (
+    cfg.MONGO_KEY_POSTCODE_OUTWARD,
+    cfg.MONGO_KEY_POSTCODE_INWARD,
+    cfg.MONGO_KEY_POSTCODE_AREA,
+    cfg.MONGO_KEY_POSTCODE_DISTRICT,
+)
+
+
+class ThreadSafeHttpCache(HttpCache):
+    """extension of py-xbrl HttpCache which can be shared between threads. Concurrent requests for the same uncached
+    file are coalesced into a single download, and files are written to a temporary path and moved into place so that
+    no thread ever reads a partially written file. Downloads are coalesced on a fixed number of striped locks, so the
+    locks held do not grow with the number of files cached
+
+    Args:
+        HttpCache (HttpCache): parent class
+    """
+
+    def __init__(self, cache_dir: str, delay: int = 500, verify_https: bool = True):
+        super().__init__(cache_dir, delay=delay, verify_https=verify_https)
+        self._url_locks: list = [threading.Lock() for _ in range(cfg.HTTP_CACHE_LOCK_STRIPES)]
+
+    def cache_file(self, file_url: str) -> str:
+        """caches a file in the http cache, downloading it at most once however many threads request it
+
+        Args:
+            file_url (str): absolute url to the file to be cached
+
+        Returns:
+            str: absolute path to the cached file
+        """
+        file_url = file_url.strip()
+        file_path: str = self.url_to_path(file_url)
+        if os.path.exists(file_path):
+            return file_path
+
+        with self._url_locks[hash(file_url) % len(self._url_locks)]:
+            # another thread may have downloaded the file while this one waited for the lock
+            if os.path.exists(file_path):
+                return file_path
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            query_response = self.connection_manager.download(file_url, headers=self.headers)
+            if not query_response.status_code == 200:
+                if query_response.status_code == 404:
+                    raise Exception(f'Could not find file on {file_url}. Error code: {query_response.status_code}')
+                raise Exception(f'Could not download file from {file_url}. Error code: {query_response.status_code}')
+            temporary_path = f'{file_path}.{threading.get_ident()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                file.write(query_response.content)
+            os.replace(temporary_path, file_path)
+        return file_path
+
+
+class TaxonomyCache:
+    """taxonomy schemas shared by every thread using a parser. Taxonomies are read without locking and parsed under a
+    lock on a miss, so each taxonomy is only parsed once. Common taxonomies loaded on demand for facts and for the
+    dimensions of contexts are added to the shared taxonomies under the same lock, the latter being resolved by
+    resolve_context_taxonomies before the contexts are parsed
+    """
+
+    def __init__(self):
+        self._taxonomies: dict = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._taxonomies)
+
+    def get_taxonomy_url(self, schema_url: str, cache: HttpCache) -> TaxonomySchema:
+        """returns the parsed taxonomy for a remote schema, parsing it on first use
+
+        Args:
+            schema_url (str): url of the taxonomy schema
+            cache (HttpCache): cache used to fetch the schema and its imports
+
+        Returns:
+            TaxonomySchema:
+        """
+        taxonomy = self._taxonomies.get(schema_url)
+        if taxonomy is None:
+            with self._lock:
+                taxonomy = self._taxonomies.get(schema_url)
+                if taxonomy is None:
+                    taxonomy = parse_taxonomy_url(schema_url, cache)
+                    self._taxonomies[schema_url] = taxonomy
+        return taxonomy
+
+    def get_namespace_taxonomy(self, namespace: str, taxonomy: TaxonomySchema, cache: HttpCache) -> TaxonomySchema:
+        """returns the taxonomy for a namespace used by an instance, loading it as a common taxonomy if it is not
+        imported by the instance's taxonomy
+
+        Args:
+            namespace (str): namespace of the taxonomy
+            taxonomy (TaxonomySchema): taxonomy of the instance
+            cache (HttpCache): cache used to fetch the common taxonomy
+
+        Returns:
+            TaxonomySchema:
+        """
+        tax = taxonomy.get_taxonomy(namespace)
+        if tax is None:
+            with self._lock:
+                tax = taxonomy.get_taxonomy(namespace)
+                if tax is None:
+                    tax = _load_common_taxonomy(cache, namespace, taxonomy)
+        return tax
+
+    def resolve_context_taxonomies(self, context_elements: List[ET.Element], ns_map: dict, taxonomy: TaxonomySchema,
+                                   cache: HttpCache):
+        """loads the taxonomies of the dimensions and members of an instance's contexts through
+        get_namespace_taxonomy, so that _parse_context_elements finds every one among the taxonomy's imports rather
+        than loading common taxonomies without the lock
+
+        Args:
+            context_elements (list): xbrli:context elements of the instance
+            ns_map (dict): prefix to namespace map of the instance, updated as by _parse_context_elements
+            taxonomy (TaxonomySchema): taxonomy of the instance
+            cache (HttpCache): cache used to fetch common taxonomies
+        """
+        for context_elem in context_elements:
+            segment: ET.Element = context_elem.find('xbrli:entity/xbrli:segment', NAME_SPACES)
+            if segment is None:
+                continue
+            for member_elem in segment.findall('xbrldi:explicitMember', NAME_SPACES) + segment.findall(
+                    'xbrldi:typedMember', NAME_SPACES):
+                _update_ns_map(ns_map, member_elem.attrib['ns_map'])
+                prefixes = {member_elem.attrib['dimension'].strip().split(':')[0]}
+                if member_elem.tag == '{' + NAME_SPACES['xbrldi'] + '}explicitMember':
+                    prefixes.add(member_elem.text.strip().split(':')[0])
+                for prefix in prefixes:
+                    self.get_namespace_taxonomy(ns_map[prefix], taxonomy, cache)
+
 
 class XbrlParserDA(XbrlParser):
-    """extension of py-xbrl Parser class to include new function for reading iXBRL files from strings in memory
+    """extension of py-xbrl Parser class to include new functions for reading iXBRL files from strings in memory and
+    from memory-mapped local files. A single parser can be shared by many threads if it is given a ThreadSafeHttpCache,
+    as parsed taxonomies are held in a TaxonomyCache. A parser created with pence=True stores the values of GBP facts
+    as exact int pence rather than float pounds. A parser given an InternTable shares one copy of each concept name,
+    context ID, unit and dimension member between all the documents it parses
 
     Args:
         XbrlParser (XbrlParser): parent class
     """
 
-    def parse_string_instance(self, string_instance: str) -> XbrlInstance:
+    def __init__(self, cache: HttpCache, taxonomy_cache: TaxonomyCache = None, pence: bool = False,
+                 intern_table: InternTable = None):
+        super().__init__(cache)
+        self.taxonomy_cache = TaxonomyCache() if taxonomy_cache is None else taxonomy_cache
+        self.pence = pence
+        self.intern_table = intern_table
+
+    def parse_string_instance(self, string_instance: str, timings: dict = None) -> XbrlInstance:
         """custom reader class for creating XbrlInstance from iXBRL file stored as string in memory
 
         Args:
             string_instance (str): string containing iXBRL file contents
+            timings (dict, optional): dictionary the seconds spent in each parsing stage are added to. Defaults to None.
 
         Returns:
             XbrlInstance:
         """
-        return parse_ixbrl_string(string_instance, self.cache)
+        return parse_ixbrl_string(string_instance, self.cache, taxonomy_cache=self.taxonomy_cache, timings=timings,
+                                  pence=self.pence, intern_table=self.intern_table)
+
+    def parse_file_instance(self, file_path: str, timings: dict = None) -> XbrlInstance:
+        """reader for creating XbrlInstance from a local iXBRL file, which is memory-mapped rather than read into a
+        string
+
+        Args:
+            file_path (str): path to the iXBRL file
+            timings (dict, optional): dictionary the seconds spent in each parsing stage are added to. Defaults to None.
 
+        Returns:
+            XbrlInstance:
+        """
+        return parse_ixbrl_file(file_path, self.cache, taxonomy_cache=self.taxonomy_cache, timings=timings,
+                                pence=self.pence, intern_table=self.intern_table)
 
-def parse_ixbrl_string(string_instance: str, cache: HttpCache, schema_root=None) -> XbrlInstance:
+
+# openers of the payloads left out by SkippingReader, searched for separately as an alternation of the two is several
+# times slower to scan with
+SCRIPT_OPEN_PATTERN = re.compile(rb'<[ ]*script', flags=re.IGNORECASE)
+SCRIPT_CLOSE_PATTERN = re.compile(rb'/[ ]*script[ ]*>', flags=re.IGNORECASE)
+BASE64_MARKER_PATTERN = re.compile(rb';base64,', flags=re.IGNORECASE)
+DATA_URI_PREFIX_PATTERN = re.compile(rb'data:[\w/+.-]+\Z', flags=re.IGNORECASE)
+BASE64_PAYLOAD_PATTERN = re.compile(rb'[^"\'\s>)]*')
+# longest opener match looked for past the end of a search window, so that openers straddling it are found
+SKIPPED_PAYLOAD_OPENER_OVERLAP = 64
+
+
+class SkippingReader(RawIOBase):
+    """read-only binary stream over a buffer (such as an mmap of an iXBRL file) which leaves out script elements and
+    the payloads of base64 data URIs, so that they never reach the XML parser. Only the chunks requested by the reader
+    are copied out of the buffer, and the buffer is searched for payloads one window at a time as reading advances, so
+    a reader which stops early, such as triage, never scans the rest of the buffer
+
+    Args:
+        buffer (bytes or mmap.mmap): raw iXBRL file contents
+        window (int, optional): bytes searched for payloads at a time. Defaults to cfg.SKIPPING_READER_WINDOW.
+    """
+
+    def __init__(self, buffer, window=cfg.SKIPPING_READER_WINDOW):
+        super().__init__()
+        self._buffer = buffer
+        self._window = window
+        self._position = 0
+        # offset up to which payload openers have been searched for, and end of the last payload found
+        self._scanned = 0
+        self._skipped_to = 0
+        self._skips = deque()
+
+    def _get_skip(self, opener):
+        """returns the span left out for a payload opener match, or None if it does not open a payload"""
+        if opener.re is SCRIPT_OPEN_PATTERN:
+            close = SCRIPT_CLOSE_PATTERN.search(self._buffer, opener.end())
+            return (opener.start(), close.end()) if close is not None else None
+        lookback = max(0, opener.start() - cfg.SKIPPING_READER_DATA_URI_LOOKBACK)
+        if DATA_URI_PREFIX_PATTERN.search(self._buffer[lookback:opener.start()]) is None:
+            return None
+        payload = BASE64_PAYLOAD_PATTERN.match(self._buffer, opener.end())
+        return opener.end(), payload.end()
+
+    def _scan(self):
+        """finds the payloads opening in the next window of the buffer"""
+        start = max(self._scanned, self._skipped_to)
+        end = min(len(self._buffer), start + self._window)
+        openers = [
+            match for pattern in (SCRIPT_OPEN_PATTERN, BASE64_MARKER_PATTERN)
+            for match in pattern.finditer(self._buffer, start, end + SKIPPED_PAYLOAD_OPENER_OVERLAP)
+            if match.start() < end
+        ]
+        for opener in sorted(openers, key=lambda match: match.start()):
+            if opener.start() < self._skipped_to:
+                continue
+            skip = self._get_skip(opener)
+            if skip is not None and skip[1] > skip[0]:
+                self._skips.append(skip)
+                self._skipped_to = skip[1]
+        self._scanned = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            while self._skips and self._skips[0][0] <= self._position:
+                self._position = max(self._position, self._skips.popleft()[1])
+            if self._skips or self._position < self._scanned or self._scanned >= len(self._buffer):
+                break
+            self._scan()
+        end = self._skips[0][0] if self._skips else self._scanned
+        size = min(len(b), end - self._position)
+        if size <= 0:
+            return 0
+        b[:size] = self._buffer[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        self._buffer = None
+        super().close()
+
+
+def add_stage_timing(timings, stage, start):
+    """adds the seconds elapsed since start to a stage of a timings dictionary
+
+    Args:
+        timings (dict): dictionary of seconds keyed by stage name, or None if timings are not being recorded
+        stage (str): stage name
+        start (float): time.perf_counter value at the start of the stage
+
+    Returns:
+        float: time.perf_counter value at the end of the stage
+    """
+    end = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + end - start
+    return end
+
+
+def parse_ixbrl_string(string_instance: str, cache: HttpCache, schema_root=None,
+                       taxonomy_cache: TaxonomyCache = None, timings: dict = None, pence: bool = False,
+                       intern_table: InternTable = None) -> XbrlInstance:
     """
     Parses a inline XBRL (iXBRL) instance file.
 
     :param string_instance: string in memory containing contents of iXBRL instance
     :param cache: HttpCache instance
     :param schema_root: path to the directory where the taxonomy schema is stored (Only works for relative imports)
+    :param taxonomy_cache: TaxonomyCache instance holding remote taxonomies shared between documents and threads
+    :param timings: dictionary the seconds spent in each parsing stage are added to, keyed by cfg.TIMING_STAGE_*
+    :param pence: store GBP fact values as exact int pence, rounded to the precision of their decimals attribute
+    :param intern_table: InternTable shared by a batch, holding the single copy of each repeated string
     :return: parsed XbrlInstance object containing all facts with additional information
     """
 
+    start = time.perf_counter()
     contents = string_instance
     pattern = r'<[ ]*script.*?\/[ ]*script[ ]*>'
     contents = re.sub(pattern, '', contents, flags=(re.IGNORECASE | re.MULTILINE | re.DOTALL))
 
     root: ET.ElementTree = parse_file(StringIO(contents))
+    add_stage_timing(timings, cfg.TIMING_STAGE_XML_PARSE, start)
+    return parse_ixbrl_tree(root, string_instance, cache, schema_root, taxonomy_cache, timings, pence,
+                            intern_table)
+
+
+def parse_ixbrl_file(file_path: str, cache: HttpCache, schema_root=None,
+                     taxonomy_cache: TaxonomyCache = None, timings: dict = None, pence: bool = False,
+                     intern_table: InternTable = None) -> XbrlInstance:
+    """
+    Parses a inline XBRL (iXBRL) instance file from disk. The file is memory-mapped and fed to the XML parser in chunks,
+    leaving out script elements and embedded base64 payloads, and the mapping is released as soon as the document tree
+    has been built.
+
+    :param file_path: path to the iXBRL instance file
+    :param cache: HttpCache instance
+    :param schema_root: path to the directory where the taxonomy schema is stored (Only works for relative imports)
+    :param taxonomy_cache: TaxonomyCache instance holding remote taxonomies shared between documents and threads
+    :param timings: dictionary the seconds spent in each parsing stage are added to, keyed by cfg.TIMING_STAGE_*
+    :param pence: store GBP fact values as exact int pence, rounded to the precision of their decimals attribute
+    :param intern_table: InternTable shared by a batch, holding the single copy of each repeated string
+    :return: parsed XbrlInstance object containing all facts with additional information
+    """
+
+    start = time.perf_counter()
+    with open(file_path, 'rb') as f:
+        if Path(file_path).stat().st_size == 0:
+            raise InstanceParseException(f'Could not parse empty file {file_path}')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with SkippingReader(mapped) as reader:
+                root: ET.ElementTree = parse_file(reader)
+    add_stage_timing(timings, cfg.TIMING_STAGE_XML_PARSE, start)
+    return parse_ixbrl_tree(root, file_path, cache, schema_root, taxonomy_cache, timings, pence,
+                            intern_table)
+
+
+def parse_ixbrl_tree(root: ET.ElementTree, instance_uri: str, cache: HttpCache, schema_root=None,
+                     taxonomy_cache: TaxonomyCache = None, timings: dict = None, pence: bool = False,
+                     intern_table: InternTable = None) -> XbrlInstance:
+    """
+    Creates the XbrlInstance for the parsed document tree of an inline XBRL (iXBRL) instance file.
+
+    :param root: document tree, as returned by xbrl.helper.xml_parser.parse_file
+    :param instance_uri: location of the instance, used to find relative taxonomy schemas
+    :param cache: HttpCache instance
+    :param schema_root: path to the directory where the taxonomy schema is stored (Only works for relative imports)
+    :param taxonomy_cache: TaxonomyCache instance holding remote taxonomies shared between documents and threads
+    :param timings: dictionary the seconds spent in each parsing stage are added to, keyed by cfg.TIMING_STAGE_*
+    :param pence: store GBP fact values as exact int pence, rounded to the precision of their decimals attribute
+    :param intern_table: InternTable shared by a batch, holding the single copy of each repeated string
+    :return: parsed XbrlInstance object containing all facts with additional information
+    """
+
+    start = time.perf_counter()
     ns_map: dict = root.getroot().attrib['ns_map']
     # get the link to the taxonomy schema and parse it
     schema_ref: ET.Element = root.find(f'.//{LINK_NS}schemaRef')
     schema_uri: str = schema_ref.attrib[XLINK_NS + 'href']
     # check if the schema uri is relative or absolute
     # submissions from SEC normally have their own schema files, whereas submissions from the uk have absolute schemas
+    if taxonomy_cache is None:
+        taxonomy_cache = TaxonomyCache()
     if schema_uri.startswith('http'):
         # fetch the taxonomy extension schema from remote
-        taxonomy: TaxonomySchema = parse_taxonomy_url(schema_uri, cache)
+        taxonomy: TaxonomySchema = taxonomy_cache.get_taxonomy_url(schema_uri, cache)
     elif schema_root:
         # take the given schema_root path as directory for searching for the taxonomy schema
         schema_path = str(next(Path(schema_root).glob(f'**/{schema_uri}')))
         taxonomy: TaxonomySchema = parse_taxonomy(schema_path, cache)
     else:
         # try to find the taxonomy extension schema file locally because no full url can be constructed
-        schema_path = resolve_uri(string_instance, schema_uri)
+        schema_path = resolve_uri(instance_uri, schema_uri)
         taxonomy: TaxonomySchema = parse_taxonomy(schema_path, cache)
+    start = add_stage_timing(timings, cfg.TIMING_STAGE_TAXONOMY, start)
 
     # get all contexts and units
     xbrl_resources: ET.Element = root.find('.//ix:resources', ns_map)
     if xbrl_resources is None:
         raise InstanceParseException('Could not find xbrl resources in file')
-    # parse contexts and units
-    context_dir = _parse_context_elements(xbrl_resources.findall('xbrli:context', NAME_SPACES), ns_map, taxonomy, cache)
+    # parse contexts and units, after loading the taxonomies of their dimensions under the taxonomy cache lock
+    context_elements: List[ET.Element] = xbrl_resources.findall('xbrli:context', NAME_SPACES)
+    taxonomy_cache.resolve_context_taxonomies(context_elements, ns_map, taxonomy, cache)
+    context_dir = _parse_context_elements(context_elements, ns_map, taxonomy, cache)
     unit_dir = _parse_unit_elements(xbrl_resources.findall('xbrli:unit', NAME_SPACES))
+    if intern_table is not None:
+        context_dir = intern_table.intern_contexts(context_dir)
+        unit_dir = intern_table.intern_units(unit_dir)
 
     # parse facts
     facts: List[AbstractFact] = []
@@ -124,42 +469,45 @@ def parse_ixbrl_string(string_instance: str, cache: HttpCache, schema_root=None)
         _update_ns_map(ns_map, fact_elem.attrib['ns_map'])
         taxonomy_prefix, concept_name = fact_elem.attrib['name'].split(':')
 
-        tax = taxonomy.get_taxonomy(ns_map[taxonomy_prefix])
-        if tax is None:
-            tax = _load_common_taxonomy(cache, ns_map[taxonomy_prefix], taxonomy)
+        tax = taxonomy_cache.get_namespace_taxonomy(ns_map[taxonomy_prefix], taxonomy, cache)
 
         xml_id: str or None = fact_elem.attrib['id'] if 'id' in fact_elem.attrib else None
 
         concept: Concept = tax.concepts[tax.name_id_map[concept_name]]
+        if intern_table is not None:
+            intern_table.intern_concept(concept)
         context: AbstractContext = context_dir[fact_elem.attrib['contextRef'].strip()]
         # ixbrl values are not normalized! They are formatted (i.e. 123,000,000)
 
         if fact_elem.tag == '{' + ns_map['ix'] + '}nonFraction':
-            fact_value: float or None = _extract_non_fraction_value(fact_elem)
+            fact_value: float or None = extract_non_fraction_value(fact_elem)
 
             unit: AbstractUnit = unit_dir[fact_elem.attrib['unitRef'].strip()]
             decimals_text: str = str(fact_elem.attrib['decimals']).strip() if 'decimals' in fact_elem.attrib else '0'
             decimals: int = None if decimals_text.lower() == 'inf' else int(decimals_text)
+            if pence and getattr(unit, 'unit', None) == 'iso4217:GBP':
+                fact_value = to_pence(fact_value, decimals)
 
             facts.append(NumericFact(concept, context, fact_value, unit, decimals, xml_id))
         elif fact_elem.tag == '{' + ns_map['ix'] + '}nonNumeric':
             fact_value: str = _extract_non_numeric_value(fact_elem)
             facts.append(TextFact(concept, context, str(fact_value), xml_id))
 
-    return XbrlInstance(string_instance, taxonomy, facts, context_dir, unit_dir)
+    add_stage_timing(timings, cfg.TIMING_STAGE_FACT_BUILD, start)
+    return XbrlInstance(instance_uri, taxonomy, facts, context_dir, unit_dir)
 
 
-def get_account_information_dictionary(unique_id: str, filing_date: datetime.date or str, xbrl_instance):
-    """use functions from digiaccouts_data to extract important facts from XBRL documents and return dictionary of
-    results
+def create_account_dictionary(unique_id: str, filing_date: datetime.date or str):
+    """creates the account information dictionary holding the unique ID and filing date, ahead of any facts being
+    extracted into it
 
     Args:
         unique_id (string): UDF to serve as unique ID for dictionary
-        xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
-        to be extracted
+        filing_date (datetime.date or str): date the accounts were filed. Omitted from the dictionary if not a datetime
+        or a parsable string
 
     Returns:
-        dict: dictionary containing extracted fact values
+        dict: dictionary containing the unique ID and filing date
     """
 
     account_information = {
@@ -173,6 +521,24 @@ def get_account_information_dictionary(unique_id: str, filing_date: datetime.dat
     else:
         pass
 
+    return account_information
+
+
+def get_account_information_dictionary(unique_id: str, filing_date: datetime.date or str, xbrl_instance):
+    """use functions from digiaccouts_data to extract important facts from XBRL documents and return dictionary of
+    results
+
+    Args:
+        unique_id (string): UDF to serve as unique ID for dictionary
+        xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
+        to be extracted
+
+    Returns:
+        dict: dictionary containing extracted fact values
+    """
+
+    account_information = create_account_dictionary(unique_id, filing_date)
+
     try:
         account_information[cfg.MONGO_KEY_ENTITY_REGISTRATION] = get_entity_registration(xbrl_instance)
     except KeyError as _e:
@@ -195,6 +561,10 @@ def get_account_information_dictionary(unique_id: str, filing_date: datetime.dat
         logging.warning(repr(_e))
         account_information[cfg.MONGO_KEY_POSTAL_CODE] = None
 
+    postcode_parts = split_postcode(account_information[cfg.MONGO_KEY_POSTAL_CODE]) or (None,) * 4
+    for key, part in zip(POSTCODE_PART_KEYS, postcode_parts):
+        account_information[key] = part
+
     try:
         account_information[cfg.MONGO_KEY_DORMANT_STATE] = get_dormant_state(xbrl_instance)
     except KeyError as _e:
@@ -399,60 +769,114 @@ def add_account_to_collection(accounts_collection, account_dictionary):
             '_id': unique_id,
         },
         update={
-            '$setOnInsert': account_dictionary | {'first_logged': datetime.now()}
+            '$setOnInsert': account_dictionary | {cfg.MONGO_KEY_FIRST_LOGGED: datetime.now()}
         },
         upsert=True,
     )
 
 
-def get_file_registration_period_from_filename(filename):
-    """extracts the entity registration number and end period date from CH archive file name
+def insert_accounts_in_collection(accounts_collection, account_dictionaries):
+    """creates the documents in a mongoDB collection for a batch of accounts data as one bulk write, leaving documents
+    which are already stored unchanged, as in add_account_to_collection
 
     Args:
-        filename (str): CH archive file name
+        accounts_collection (_type_): MongoDB collection
+        account_dictionaries (list): dictionaries containing data extracted from annual accounts XBRL instances
 
     Returns:
-        tuple: registration number and end period extracted from the file name
+        int: number of documents written, including those already stored
     """
-    name = filename.split('/')[-1].split('.')[0]
-    registration, end_period = name.split('_')[2:4]
-    end_period = format_end_period(end_period)
-    return registration, end_period
 
+    # pymongo is only needed by this function, so is not imported with the module
+    from pymongo import UpdateOne
 
-def format_end_period(end_period):
-    """converts CH archive end period date to iso format
+    now = datetime.now()
+    operations = [
+        UpdateOne(
+            {'_id': account_dictionary['_id']},
+            {'$setOnInsert': account_dictionary | {cfg.MONGO_KEY_FIRST_LOGGED: now}},
+            upsert=True
+        )
+        for account_dictionary in account_dictionaries
+    ]
+    if operations:
+        accounts_collection.bulk_write(operations, ordered=False)
+    return len(operations)
 
-    Args:
-        end_period (str): _description_
 
-    Returns:
-        str: iso format date
-    """
-    return datetime.strptime(end_period, "%Y%m%d").date().isoformat()
+def _to_naive_utc(value):
+    """returns a datetime as a naive UTC datetime, as MongoDB stores it, converting timezone aware datetimes to UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
-def get_uuid(registration, filing_date):
-    """generates a UUID from a registration number and an iso formatted end period date
+def check_stored_value_changed(stored_value, new_value):
+    """returns boolean check if a newly extracted value differs from the value stored in a MongoDB document. Datetimes
+    are compared in UTC at the millisecond precision MongoDB stores them with, and numbers are compared by value, so a
+    stored int equal to a new float is unchanged. Other values of different types are changed
 
     Args:
-        registration (str): CH entity registration number
-        end_period (str): iso formatted end period date
+        stored_value (_type_): value read back from MongoDB
+        new_value (_type_): newly extracted value
 
     Returns:
-        str: UUID in hexadecimal format
+        bool: True if the stored value needs updating
     """
-    return uuid.uuid5(uuid.NAMESPACE_DNS, '_'.join((registration, filing_date))).hex
+    if isinstance(stored_value, datetime) and isinstance(new_value, datetime):
+        new_value = _to_naive_utc(new_value)
+        new_value = new_value.replace(microsecond=new_value.microsecond // 1000 * 1000)
+        return _to_naive_utc(stored_value) != new_value
+    if (isinstance(stored_value, Number) and isinstance(new_value, Number)
+            and not isinstance(stored_value, bool) and not isinstance(new_value, bool)):
+        return stored_value != new_value
+    return stored_value != new_value or type(stored_value) is not type(new_value)
 
 
-def create_unique_id(filename):
-    """generates a uuid from a CH archive annual accounts file name
+def update_accounts_in_collection(accounts_collection, account_dictionaries):
+    """updates the documents in a mongoDB collection for a batch of accounts data, only writing the fields whose values
+    have changed and unsetting the fields the new extraction no longer produces. The stored documents are loaded in a
+    single query and the changes sent as one bulk write, with new documents inserted as in add_account_to_collection
 
     Args:
-        filename (str): _description_
+        accounts_collection (_type_): MongoDB collection
+        account_dictionaries (list): dictionaries containing data extracted from annual accounts XBRL instances
 
     Returns:
-        str: uuid in hexadecimal format
+        int: number of documents inserted or updated
     """
-    registration, end_period = get_file_registration_period_from_filename(filename)
-    return get_uuid(registration, end_period)
+
+    # pymongo is only needed by this function, so is not imported with the module
+    from pymongo import UpdateOne
+
+    unique_ids = [account_dictionary['_id'] for account_dictionary in account_dictionaries]
+    stored_documents = {
+        document['_id']: document for document in accounts_collection.find({'_id': {'$in': unique_ids}})
+    }
+
+    now = datetime.now()
+    operations = []
+    for account_dictionary in account_dictionaries:
+        unique_id = account_dictionary['_id']
+        stored_document = stored_documents.get(unique_id)
+        if stored_document is None:
+            operations.append(UpdateOne(
+                {'_id': unique_id},
+                {'$setOnInsert': account_dictionary | {cfg.MONGO_KEY_FIRST_LOGGED: now}},
+                upsert=True
+            ))
+            continue
+        changes = {
+            key: value for key, value in account_dictionary.items()
+            if (key not in stored_document) or check_stored_value_changed(stored_document[key], value)
+        }
+        removed = {key: '' for key in stored_document if key not in account_dictionary and key not in STORED_ONLY_KEYS}
+        if changes or removed:
+            update = {'$set': changes | {cfg.MONGO_KEY_LAST_UPDATED: now}}
+            if removed:
+                update['$unset'] = removed
+            operations.append(UpdateOne({'_id': unique_id}, update))
+
+    if operations:
+        accounts_collection.bulk_write(operations, ordered=False)
+    return len(operations)
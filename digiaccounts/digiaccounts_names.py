@@ -0,0 +1,207 @@
+"""trigram inverted index over normalised registered names for fast partial and fuzzy company name search. Each name is
+broken into character trigrams, and each trigram maps to the sorted ordinals of the names containing it. A query only
+scans the postings of its rarest trigrams to find candidates, then scores the candidates by a blend of query containment,
+so that part of a name finds the whole of it, and trigram Jaccard similarity"""
+
+import os
+import re
+import math
+import logging
+from array import array
+
+import numpy as np
+
+from digiaccounts import config as cfg
+
+NAME_APOSTROPHE_PATTERN = re.compile(r"['\u2019`]")
+NAME_PUNCTUATION_PATTERN = re.compile(r'[^a-z0-9&]+')
+
+
+def normalise_name(name):
+    """normalises a registered name for searching, by lower casing it, deleting apostrophes so that possessives stay one
+    word, replacing other punctuation with spaces and dropping trailing company type suffixes such as 'limited' and 'ltd'
+
+    Args:
+        name (str): registered name
+
+    Returns:
+        str: normalised name
+    """
+    words = NAME_PUNCTUATION_PATTERN.sub(' ', NAME_APOSTROPHE_PATTERN.sub('', name.lower())).split()
+    while len(words) > 1 and words[-1] in cfg.NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def get_trigrams(name):
+    """returns the distinct character trigrams of a normalised name, padded so that word starts are weighted
+
+    Args:
+        name (str): normalised name
+
+    Returns:
+        set: trigrams of the name
+    """
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """trigram inverted index of unique IDs by normalised registered name. Names are appended in ordinal order, so
+    every postings list stays sorted without re-sorting. Re-adding an ID with a new name replaces its old entry"""
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        # trigram count of each name, zero for replaced entries
+        self.lengths = array('H')
+        self.postings = {}
+        self._ordinals = {}
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    @classmethod
+    def build(cls, account_dictionaries):
+        """builds an index from a stream of account information dictionaries, such as an export of the collection
+
+        Args:
+            account_dictionaries (iterable): dictionaries returned by get_account_information_dictionary
+
+        Returns:
+            NameIndex: index of the dictionaries with a registered name
+        """
+        index = cls()
+        index.extend(account_dictionaries)
+        return index
+
+    def add(self, unique_id, name):
+        """adds a registered name to the index
+
+        Args:
+            unique_id (str): unique ID of the account
+            name (str): registered name
+        """
+        normalised = normalise_name(name)
+        previous = self._ordinals.get(unique_id)
+        if previous is not None:
+            if self.names[previous] == normalised:
+                return
+            self.lengths[previous] = 0
+        ordinal = len(self.ids)
+        trigrams = get_trigrams(normalised)
+        self.ids.append(unique_id)
+        self.names.append(normalised)
+        self.lengths.append(len(trigrams))
+        self._ordinals[unique_id] = ordinal
+        for trigram in trigrams:
+            postings = self.postings.get(trigram)
+            if postings is None:
+                postings = self.postings[trigram] = array('I')
+            postings.append(ordinal)
+
+    def extend(self, account_dictionaries):
+        """adds the registered names of a batch of account information dictionaries, such as those written during an
+        ingest, skipping dictionaries without a name
+
+        Args:
+            account_dictionaries (iterable): dictionaries returned by get_account_information_dictionary
+        """
+        for account_information in account_dictionaries:
+            name = account_information.get(cfg.MONGO_KEY_ENTITY_NAME)
+            if name:
+                self.add(account_information['_id'], name)
+
+    def _get_postings(self, trigram):
+        postings = self.postings.get(trigram)
+        if postings is None:
+            return np.empty(0, dtype=np.uint32)
+        return np.frombuffer(postings, dtype=np.uint32)
+
+    def search(self, query, k=cfg.NAME_SEARCH_TOP_K, min_similarity=cfg.NAME_SEARCH_MIN_SIMILARITY,
+               containment_weight=cfg.NAME_SEARCH_CONTAINMENT_WEIGHT):
+        """returns the k registered names most similar to a query, tolerating misspellings and partial names
+
+        The similarity of a name sharing o of the q query trigrams is containment_weight * o / q plus the rest of the
+        weight times their trigram Jaccard similarity. Neither is over o / q, so a name with a similarity of at least
+        min_similarity must share at least ceil(min_similarity * q) query trigrams, and must appear in the postings of
+        the q - ceil(min_similarity * q) + 1 rarest query trigrams. Only those postings are scanned for candidates
+
+        Args:
+            query (str): company name, or part of one
+            k (int, optional): number of results. Defaults to cfg.NAME_SEARCH_TOP_K.
+            min_similarity (float, optional): lowest similarity returned. Defaults to cfg.NAME_SEARCH_MIN_SIMILARITY.
+            containment_weight (float, optional): weight of query containment, between 0 for trigram Jaccard
+            similarity alone and 1 for containment alone. Defaults to cfg.NAME_SEARCH_CONTAINMENT_WEIGHT.
+
+        Returns:
+            list: tuples of unique ID, normalised name and similarity, most similar first
+        """
+        trigrams = sorted(get_trigrams(normalise_name(query)), key=lambda t: len(self.postings.get(t, ())))
+        if not trigrams or not self.ids:
+            return []
+        prefix = len(trigrams) - math.ceil(min_similarity * len(trigrams)) + 1
+        lengths = np.frombuffer(self.lengths, dtype=np.uint16)
+        candidates = np.unique(np.concatenate([self._get_postings(t) for t in trigrams[:prefix]]))
+        candidates = candidates[lengths[candidates] > 0]
+        if not candidates.size:
+            return []
+
+        overlap = np.zeros(candidates.size, dtype=np.uint16)
+        for trigram in trigrams:
+            postings = self._get_postings(trigram)
+            if not postings.size:
+                continue
+            positions = np.minimum(np.searchsorted(postings, candidates), postings.size - 1)
+            overlap += postings[positions] == candidates
+        jaccard = overlap / (len(trigrams) + lengths[candidates].astype(np.float64) - overlap)
+        similarity = containment_weight * overlap / len(trigrams) + (1 - containment_weight) * jaccard
+
+        top = np.flatnonzero(similarity >= min_similarity)
+        if top.size > k:
+            top = top[np.argpartition(-similarity[top], k - 1)[:k]]
+        top = top[np.argsort(-similarity[top], kind='stable')]
+        return [(self.ids[candidates[i]], self.names[candidates[i]], float(similarity[i])) for i in top]
+
+    def save(self, path):
+        """saves the index as a NumPy .npz file, with the postings concatenated into a single array, replacing the file
+        atomically. The file is written through a handle so that np.savez does not append .npz to a path without that
+        suffix, which ingest --name-index checks for on the next run
+
+        Args:
+            path (str): path of the index file
+        """
+        trigrams = list(self.postings)
+        offsets = np.cumsum([0] + [len(self.postings[t]) for t in trigrams])
+        postings = np.concatenate([self._get_postings(t) for t in trigrams]) if trigrams else np.empty(0, np.uint32)
+        with open(f'{path}.tmp', 'wb') as f:
+            np.savez(
+                f, ids=np.array(self.ids, dtype=str), names=np.array(self.names, dtype=str),
+                lengths=np.frombuffer(self.lengths, dtype=np.uint16), trigrams=np.array(trigrams, dtype=str),
+                offsets=offsets, postings=postings
+            )
+        os.replace(f'{path}.tmp', path)
+        _s = f"Saved name index of {len(self)} names to '{path}'"
+        logging.info(_s)
+
+    @classmethod
+    def load(cls, path):
+        """loads an index saved by save
+
+        Args:
+            path (str): path of the index file
+
+        Returns:
+            NameIndex: loaded index
+        """
+        index = cls()
+        with np.load(path) as arrays:
+            index.ids = arrays['ids'].tolist()
+            index.names = arrays['names'].tolist()
+            index.lengths = array('H', arrays['lengths'].tobytes())
+            offsets = arrays['offsets']
+            postings = arrays['postings']
+            for i, trigram in enumerate(arrays['trigrams'].tolist()):
+                index.postings[trigram] = array('I', postings[offsets[i]:offsets[i + 1]].tobytes())
+        index._ordinals = {unique_id: i for i, unique_id in enumerate(index.ids) if index.lengths[i]}
+        return index
@@ -0,0 +1,168 @@
+"""compact local index of extracted accounts by postcode region. Unique IDs are held in sorted NumPy arrays per postcode
+district, grouped by postcode area, so that region membership is answered with a binary search rather than a scan of
+the collection"""
+
+import os
+import re
+import logging
+from collections import defaultdict
+
+import numpy as np
+
+from digiaccounts.digiaccounts_util import split_postcode
+from digiaccounts import config as cfg
+
+# postcode district or outward code, an outward code with a sub-district letter resolving to its district
+REGION_PATTERN = re.compile(r'([A-Z]{1,2})([0-9][0-9]?)[A-Z]?')
+
+
+def get_region_parts(account_information):
+    """returns the postcode area and district of an account information dictionary, splitting the raw postcode for
+    dictionaries extracted before postcodes were split at extraction time
+
+    Args:
+        account_information (dict): dictionary returned by get_account_information_dictionary
+
+    Returns:
+        tuple: postcode area and district, or None if the postcode is missing or malformed
+    """
+    district = account_information.get(cfg.MONGO_KEY_POSTCODE_DISTRICT)
+    if district is not None:
+        return account_information[cfg.MONGO_KEY_POSTCODE_AREA], district
+    postcode_parts = split_postcode(account_information.get(cfg.MONGO_KEY_POSTAL_CODE))
+    return postcode_parts[2:] if postcode_parts is not None else None
+
+
+class PostcodeIndex:
+    """index of unique IDs by postcode area and district, each district holding a sorted array of IDs"""
+
+    def __init__(self):
+        # area -> district -> sorted array of unique IDs
+        self.areas = {}
+
+    def __len__(self):
+        return sum(ids.size for districts in self.areas.values() for ids in districts.values())
+
+    @classmethod
+    def build(cls, account_dictionaries):
+        """builds an index from an iterable of account information dictionaries
+
+        Args:
+            account_dictionaries (iterable): dictionaries returned by get_account_information_dictionary
+
+        Returns:
+            PostcodeIndex: index of the dictionaries with a valid postcode
+        """
+        index = cls()
+        index.extend(account_dictionaries)
+        return index
+
+    def extend(self, account_dictionaries):
+        """adds a batch of account information dictionaries to the index. IDs are grouped by district and merged into
+        each district's array once per batch, so appending in batches is much cheaper than one dictionary at a time
+
+        Args:
+            account_dictionaries (iterable): dictionaries returned by get_account_information_dictionary
+
+        Returns:
+            int: number of dictionaries without a valid postcode, which are not indexed
+        """
+        batch = defaultdict(list)
+        skipped = 0
+        for account_information in account_dictionaries:
+            region_parts = get_region_parts(account_information)
+            if region_parts is None:
+                skipped += 1
+                continue
+            batch[region_parts].append(account_information['_id'])
+        for (area, district), unique_ids in batch.items():
+            districts = self.areas.setdefault(area, {})
+            new_ids = np.array(unique_ids, dtype=str)
+            if district in districts:
+                districts[district] = np.union1d(districts[district], new_ids)
+            else:
+                districts[district] = np.unique(new_ids)
+        if skipped:
+            _s = f'{skipped} accounts without a valid postcode were not indexed'
+            logging.info(_s)
+        return skipped
+
+    def _get_district_arrays(self, region):
+        """returns the ID arrays of every district in an area, or of the district of a district or outward code"""
+        region = ''.join(region.split()).upper()
+        if region.isalpha():
+            return list(self.areas.get(region, {}).values())
+        match = REGION_PATTERN.fullmatch(region)
+        if match is None:
+            return []
+        ids = self.areas.get(match.group(1), {}).get(match.group(1) + match.group(2))
+        return [ids] if ids is not None else []
+
+    def get_ids(self, region):
+        """returns the unique IDs of the accounts in a postcode area (such as 'CF') or district (such as 'CF14')
+
+        Args:
+            region (str): postcode area or district
+
+        Returns:
+            numpy.ndarray: sorted unique IDs
+        """
+        arrays = self._get_district_arrays(region)
+        if not arrays:
+            return np.array([], dtype=str)
+        return arrays[0] if len(arrays) == 1 else np.sort(np.concatenate(arrays))
+
+    def contains(self, region, unique_id):
+        """returns boolean check if an account is registered in a postcode area or district
+
+        Args:
+            region (str): postcode area or district
+            unique_id (str): unique ID of the account
+
+        Returns:
+            bool: True if the account is in the region
+        """
+        for ids in self._get_district_arrays(region):
+            position = np.searchsorted(ids, unique_id)
+            if position < ids.size and ids[position] == unique_id:
+                return True
+        return False
+
+    def districts(self, area):
+        """returns the districts of a postcode area which hold accounts
+
+        Args:
+            area (str): postcode area
+
+        Returns:
+            list: sorted districts
+        """
+        return sorted(self.areas.get(area.strip().upper(), {}))
+
+    def save(self, path):
+        """saves the index as a NumPy .npz file with one array per district, replacing the file atomically. The file is
+        written through a handle so that np.savez does not append .npz to a path without that suffix
+
+        Args:
+            path (str): path of the index file
+        """
+        with open(f'{path}.tmp', 'wb') as f:
+            np.savez(f, **{district: ids for districts in self.areas.values() for district, ids in districts.items()})
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        """loads an index saved by save
+
+        Args:
+            path (str): path of the index file
+
+        Returns:
+            PostcodeIndex: loaded index
+        """
+        index = cls()
+        with np.load(path) as arrays:
+            for district in arrays.files:
+                area = district.rstrip('0123456789')
+                index.areas.setdefault(area, {})[district] = arrays[district]
+        return index
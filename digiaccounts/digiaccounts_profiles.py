@@ -0,0 +1,253 @@
+"""registry of extraction profiles keyed on the software that produced an iXBRL file. The facts of the concepts needed
+by get_account_information_dictionary, including the production software, are pulled out of an XbrlInstance in a
+single pass. The profile registered for the software then checks them against the layout it expects, and each getter
+only searches those facts rather than every fact in the document. A profile is registered for a producer once
+check_profile has shown it to agree with the generic extraction on a sample of its filings. The built-in profiles of
+PROFILE_BUILTINS are checked against the sample filings in digiaccounts/tests/data by the profiles tests"""
+
+import re
+import logging
+
+from digiaccounts.digiaccounts_io import get_account_information_dictionary
+from digiaccounts import config as cfg
+
+PROFILE_CONCEPTS = (
+    cfg.FACT_NAME_START_DATE,
+    cfg.FACT_NAME_END_DATE,
+    cfg.FACT_NAME_POSTAL_CODE,
+    *cfg.FACT_NAME_DORMANT_STATE,
+    cfg.FACT_NAME_ENTITY_REGISTRATION,
+    cfg.FACT_NAME_ENTITY_NAME,
+    cfg.FACT_NAME_ACCOUNTING_SOFTWARE,
+    cfg.FACT_NAME_AVERAGE_EMPLOYEES,
+    cfg.FACT_NAME_TURNOVER,
+    cfg.FACT_NAME_INTANGIBLE_ASSETS,
+    cfg.FACT_NAME_PLANT_EQUIPMENT,
+    cfg.FACT_NAME_INVESTMENT_ASSETS,
+    cfg.FACT_NAME_INVESTMENT_PROPERTY,
+    cfg.FACT_NAME_BIOLOGICAL_ASSETS,
+    cfg.FACT_NAME_EQUITY,
+)
+
+PROFILE_CONCEPT_NAMES = frozenset(c.lower() for c in PROFILE_CONCEPTS)
+
+PROFILE_REQUIRED_CONCEPTS = (
+    cfg.FACT_NAME_ENTITY_REGISTRATION,
+    cfg.FACT_NAME_END_DATE,
+)
+
+PROFILE_REGISTRY = {}
+
+# context ids of the producer of the example filings: instants END_yyyy and START_yyyy, optionally followed by a
+# dimension suffix, durations FYyyyy, the equity statement columns and the registered address
+PROFILE_VSCODE_CONTEXT_PATTERN = (
+    r'(?:(?:END|START)_\d{4}(?:_\w+)?|FY\d{4}|EquityShareCapital(?:Start|End)|registeredAddress)$'
+)
+
+
+class ProfileMismatch(Exception):
+    """raised when an XbrlInstance does not follow the layout an extraction profile expects"""
+
+
+class ProfileInstance:
+    """minimal stand-in for an XbrlInstance holding only the facts selected by an extraction profile, which the
+    digiaccounts_data getters can be run against unchanged
+
+    Args:
+        facts (list): facts selected from the original XbrlInstance, in document order
+    """
+
+    def __init__(self, facts):
+        self.facts = facts
+
+
+class ExtractionProfile:
+    """extraction profile for iXBRL files from a single producer
+
+    Args:
+        name (str): name of the profile
+        concepts (tuple, optional): concept names needed by the extraction. Defaults to PROFILE_CONCEPTS.
+        context_pattern (str, optional): regular expression the context id of every needed fact is expected to match
+        in this producer's layout. Defaults to None, accepting any context id.
+        required_concepts (tuple, optional): concept names which must be present for the profile to apply. Defaults
+        to PROFILE_REQUIRED_CONCEPTS.
+    """
+
+    def __init__(self, name, concepts=PROFILE_CONCEPTS, context_pattern=None,
+                 required_concepts=PROFILE_REQUIRED_CONCEPTS):
+        self.name = name
+        self.concepts = frozenset(c.lower() for c in concepts)
+        self.context_pattern = re.compile(context_pattern) if context_pattern is not None else None
+        self.required_concepts = frozenset(c.lower() for c in required_concepts)
+
+    def __str__(self):
+        return f'ExtractionProfile {self.name}'
+
+    def select_facts(self, xbrl_instance):
+        """selects the facts needed by the extraction in a single pass over an XbrlInstance
+
+        Args:
+            xbrl_instance (XbrlInstance): an XBRL instance containing accounts information, or the ProfileInstance
+            returned by select_profile_facts
+
+        Raises:
+            ProfileMismatch: if a needed fact breaks the expected context layout, or a required concept is missing
+
+        Returns:
+            ProfileInstance: instance holding the selected facts
+        """
+        facts = []
+        found = set()
+        for fact in xbrl_instance.facts:
+            name = fact.concept.name.lower()
+            if name not in self.concepts:
+                continue
+            if self.context_pattern is not None and not self.context_pattern.match(fact.context.xml_id):
+                raise ProfileMismatch(f"Context '{fact.context.xml_id}' of fact '{name}' does not match {self}")
+            facts.append(fact)
+            found.add(name)
+        if not self.required_concepts <= found:
+            raise ProfileMismatch(f'Missing concepts {sorted(self.required_concepts - found)} for {self}')
+        return ProfileInstance(facts)
+
+
+def get_profile_concept_names():
+    """returns the lower cased names of PROFILE_CONCEPTS and of the concepts of every registered profile
+
+    Returns:
+        frozenset: concept names selected by select_profile_facts
+    """
+    return PROFILE_CONCEPT_NAMES.union(*(profile.concepts for profile in PROFILE_REGISTRY.values()))
+
+
+def select_profile_facts(xbrl_instance, concept_names=None):
+    """selects the facts of PROFILE_CONCEPTS and of the registered profiles' concepts from an XbrlInstance in a single
+    pass, finding the production software on the way
+
+    Args:
+        xbrl_instance (XbrlInstance): an XBRL instance containing accounts information
+        concept_names (frozenset, optional): lower cased names of the concepts selected. Defaults to None, using
+        get_profile_concept_names.
+
+    Returns:
+        tuple: ProfileInstance holding the selected facts in document order, and the first NameProductionSoftware
+        value, as returned by get_accounting_software, or None if there is none
+    """
+    if concept_names is None:
+        concept_names = get_profile_concept_names()
+    software_name = cfg.FACT_NAME_ACCOUNTING_SOFTWARE.lower()
+    facts = []
+    software = None
+    for fact in xbrl_instance.facts:
+        name = fact.concept.name.lower()
+        if name not in concept_names:
+            continue
+        facts.append(fact)
+        if software is None and name == software_name:
+            software = fact.value.strip() if isinstance(fact.value, str) else fact.value
+    return ProfileInstance(facts), software
+
+
+def get_software_fingerprint(software):
+    """returns a fingerprint of a NameProductionSoftware value which is stable across releases of the software, by
+    lower casing it and dropping version numbers and punctuation
+
+    Args:
+        software (str): name of the software used to produce the iXBRL file
+
+    Returns:
+        str: fingerprint of the software name
+    """
+    words = re.sub(r'[^a-z0-9.]+', ' ', software.lower()).split()
+    return ' '.join(w for w in words if not re.fullmatch(r'v?[\d.]+', w)).replace('.', '')
+
+
+def check_profile(profile, xbrl_instances):
+    """runs the generic and profiled extraction over a sample of XbrlInstances and reports any differences
+
+    Args:
+        profile (ExtractionProfile): profile to check
+        xbrl_instances (iterable): sample of XBRL instances from the producer the profile is for
+
+    Returns:
+        list: tuples of sample index, dictionary key, generic value and profiled value for every difference
+    """
+    mismatches = []
+    for idx, xbrl_instance in enumerate(xbrl_instances):
+        generic = get_account_information_dictionary(None, None, xbrl_instance)
+        try:
+            profiled = get_account_information_dictionary(None, None, profile.select_facts(xbrl_instance))
+        except ProfileMismatch as _e:
+            logging.warning(repr(_e))
+            profiled = {}
+        for key in generic.keys() | profiled.keys():
+            if generic.get(key) != profiled.get(key):
+                mismatches.append((idx, key, generic.get(key), profiled.get(key)))
+    return mismatches
+
+
+def register_profile(software, profile, samples=None):
+    """registers an extraction profile for a producer, optionally checking it against a sample of its filings first
+
+    Args:
+        software (str): name of the software the profile is for, as found in NameProductionSoftware
+        profile (ExtractionProfile): profile to register
+        samples (iterable, optional): XBRL instances produced by the software. Defaults to None.
+
+    Raises:
+        ValueError: if the profiled extraction differs from the generic extraction for any sample
+    """
+    if samples is not None:
+        mismatches = check_profile(profile, samples)
+        if mismatches:
+            raise ValueError(f'{profile} differs from the generic extraction: {mismatches}')
+    PROFILE_REGISTRY[get_software_fingerprint(software)] = profile
+
+
+def get_profile(software):
+    """returns the extraction profile registered for a producer, or None
+
+    Args:
+        software (str): name of the software used to produce the iXBRL file
+
+    Returns:
+        ExtractionProfile: registered profile
+    """
+    return PROFILE_REGISTRY.get(get_software_fingerprint(software))
+
+
+def get_account_information_dictionary_profiled(unique_id, filing_date, xbrl_instance):
+    """extracts the account information dictionary using the extraction profile registered for the software which
+    produced the XbrlInstance, falling back to get_account_information_dictionary if there is no profile or the
+    instance does not match it. The instance's facts are scanned once, by select_profile_facts, for the concepts of
+    every registered profile, and the profile and getters then only search the facts selected
+
+    Args:
+        unique_id (string): UDF to serve as unique ID for dictionary
+        filing_date (datetime.date or str): date the accounts were filed
+        xbrl_instance (XbrlInstance): an XBRL instance containing accounts information from which financial data needs
+        to be extracted
+
+    Returns:
+        dict: dictionary containing extracted fact values
+    """
+    if not PROFILE_REGISTRY:
+        return get_account_information_dictionary(unique_id, filing_date, xbrl_instance)
+
+    selected, software = select_profile_facts(xbrl_instance)
+    profile = get_profile(software) if isinstance(software, str) else None
+    if profile is not None:
+        try:
+            xbrl_instance = profile.select_facts(selected)
+        except ProfileMismatch as _e:
+            _s = f'Falling back to generic extraction: {_e}'
+            logging.info(_s)
+    return get_account_information_dictionary(unique_id, filing_date, xbrl_instance)
+
+
+PROFILE_BUILTINS = {
+    'VsCode': ExtractionProfile('vscode', context_pattern=PROFILE_VSCODE_CONTEXT_PATTERN),
+}
+
+for _software, _profile in PROFILE_BUILTINS.items():
+    register_profile(_software, _profile)
@@ -0,0 +1,135 @@
+"""opt-in sampling profiler for parsing and extraction in production batches. A configurable fraction of documents is
+run under cProfile and tracemalloc, and the statistics are aggregated across every sampled document, so the cost of
+profiling is proportional to the sample rate while the merged profile reflects the real filing mix"""
+
+import random
+import logging
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from digiaccounts import config as cfg
+
+
+class SamplingProfiler:
+    """aggregates cProfile statistics and tracemalloc allocations over a random sample of documents
+
+    Only one document is profiled at a time. A document selected for sampling while another is being profiled is run
+    without profiling, as cProfile only follows the calling thread. tracemalloc, however, traces every thread in the
+    process, so the allocations of a sample also hold those of any documents run alongside it in other threads.
+    Such samples are counted in overlapped and flagged in the memory report; profile with a single worker for
+    allocations attributable to single documents
+
+    Args:
+        sample_rate (float, optional): fraction of documents profiled. Defaults to cfg.PROFILE_SAMPLE_RATE.
+        seed (int, optional): seed for the sampling random number generator. Defaults to None.
+        traceback_limit (int, optional): frames stored for each traced allocation. Defaults to
+        cfg.PROFILE_TRACEBACK_LIMIT.
+    """
+
+    def __init__(self, sample_rate=cfg.PROFILE_SAMPLE_RATE, seed=None, traceback_limit=cfg.PROFILE_TRACEBACK_LIMIT):
+        self.sample_rate = sample_rate
+        self.traceback_limit = traceback_limit
+        self.documents = 0
+        self.sampled = 0
+        self.overlapped = 0
+        self.stats = None
+        self.allocations = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._profiling = False
+        self._overlap = False
+
+    @contextmanager
+    def profile(self):
+        """context manager profiling its body if the document is selected for sampling, and running it unprofiled
+        otherwise"""
+        with self._lock:
+            self.documents += 1
+            self._active += 1
+            self._overlap = self._overlap or self._profiling
+            sample = not self._profiling and self._random.random() < self.sample_rate
+            if sample:
+                self._profiling = True
+                self._overlap = self._active > 1
+        try:
+            if sample:
+                with self._profile_sample():
+                    yield
+            else:
+                yield
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    @contextmanager
+    def _profile_sample(self):
+        """context manager running its body under cProfile and tracemalloc and merging the statistics into the
+        totals"""
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(self.traceback_limit)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                with self._lock:
+                    self._add_sample(profiler, snapshot)
+        finally:
+            with self._lock:
+                self._profiling = False
+
+    def _add_sample(self, profiler, snapshot):
+        """merges the statistics of one sampled document into the totals, with the lock held"""
+        self.sampled += 1
+        self.overlapped += self._overlap
+        if self.stats is None:
+            self.stats = pstats.Stats(profiler)
+        else:
+            self.stats.add(profiler)
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        for statistic in snapshot.statistics('lineno'):
+            frame = statistic.traceback[0]
+            size, count = self.allocations.get((frame.filename, frame.lineno), (0, 0))
+            self.allocations[(frame.filename, frame.lineno)] = (size + statistic.size, count + statistic.count)
+
+    def top_allocators(self, limit=cfg.PROFILE_TOP_ALLOCATORS):
+        """returns the source lines holding the most memory at the end of the sampled documents, summed over samples
+
+        Args:
+            limit (int, optional): number of lines returned. Defaults to cfg.PROFILE_TOP_ALLOCATORS.
+
+        Returns:
+            list: tuples of file name, line number, total size in bytes and total allocation count
+        """
+        ranked = sorted(self.allocations.items(), key=lambda item: item[1][0], reverse=True)
+        return [(filename, lineno, size, count) for (filename, lineno), (size, count) in ranked[:limit]]
+
+    def dump(self, prefix, limit=cfg.PROFILE_TOP_ALLOCATORS):
+        """writes the merged profile to '<prefix>.prof', readable with pstats or snakeviz, and the top allocators to
+        '<prefix>.memory.txt'
+
+        Args:
+            prefix (str): path prefix of the output files
+            limit (int, optional): number of allocators written. Defaults to cfg.PROFILE_TOP_ALLOCATORS.
+        """
+        _s = f'Profiled {self.sampled} of {self.documents} documents'
+        logging.info(_s)
+        if self.stats is not None:
+            self.stats.dump_stats(f'{prefix}.prof')
+        with open(f'{prefix}.memory.txt', 'w', encoding='utf-8') as f:
+            f.write(f'# top allocators over {self.sampled} of {self.documents} documents\n')
+            if self.overlapped:
+                f.write(f'# {self.overlapped} samples include allocations of documents run concurrently in other '
+                        f'threads\n')
+            for filename, lineno, size, count in self.top_allocators(limit):
+                f.write(f'{size / self.sampled / 1024:.1f} KiB/doc\t{count} blocks\t{filename}:{lineno}\n')
@@ -0,0 +1,169 @@
+"""capture of the slowest and largest filings of a batch into a local replay corpus, and replay of the corpus through the
+current code for performance regression work. Each captured filing is stored with the per-stage timings (taxonomy, XML
+parse, fact build and extraction) recorded when it was first processed"""
+
+import os
+import json
+import heapq
+import logging
+import threading
+from itertools import count
+
+from digiaccounts.digiaccounts_batch import extract_account_information
+from digiaccounts import config as cfg
+
+
+class SlowFilingRecorder:
+    """keeps the top_n slowest and top_n largest documents seen by a batch, with their raw contents and stage timings
+
+    Args:
+        top_n (int, optional): documents kept in each of the slowest and largest heaps. Defaults to
+        cfg.SLOW_FILING_TOP_N.
+    """
+
+    def __init__(self, top_n=cfg.SLOW_FILING_TOP_N):
+        self.top_n = top_n
+        self._slowest = []
+        self._largest = []
+        self._filings = {}
+        self._sequence = count()
+        self._lock = threading.Lock()
+
+    def record(self, name, contents, timings):
+        """offers a processed document to the slowest and largest heaps
+
+        Args:
+            name (str): CH archive file name
+            contents (str or bytes): raw contents of the iXBRL file
+            timings (dict): seconds spent in each stage, keyed by cfg.TIMING_STAGE_*
+        """
+        timings = dict(timings or {})
+        total = sum(timings.values())
+        with self._lock:
+            sequence = next(self._sequence)
+            kept = [
+                self._push(self._slowest, (total, sequence, name)),
+                self._push(self._largest, (len(contents), sequence, name)),
+            ]
+            if any(kept):
+                self._filings[sequence] = (name, contents, timings)
+            self._drop_unreferenced()
+
+    def _push(self, heap, entry):
+        """pushes an entry onto a bounded min-heap, returning whether it was kept"""
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+            return True
+        if entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+            return True
+        return False
+
+    def _drop_unreferenced(self):
+        """releases the contents of documents which have been pushed out of both heaps"""
+        referenced = {entry[1] for entry in self._slowest} | {entry[1] for entry in self._largest}
+        for sequence in self._filings.keys() - referenced:
+            del self._filings[sequence]
+
+    def filings(self):
+        """returns the kept documents, slowest first
+
+        Returns:
+            list: tuples of CH archive file name, raw contents and stage timings
+        """
+        with self._lock:
+            slowest = {entry[1] for entry in self._slowest}
+            order = sorted(self._filings, key=lambda s: (s not in slowest, -sum(self._filings[s][2].values())))
+            return [self._filings[sequence] for sequence in order]
+
+    def write_corpus(self, directory):
+        """writes the kept documents and a manifest of their sizes and timings to a replay corpus directory, replacing
+        any earlier capture of the same documents
+
+        Args:
+            directory (str): replay corpus directory
+
+        Returns:
+            int: number of documents in the corpus
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, cfg.REPLAY_MANIFEST)
+        manifest = read_manifest(directory) if os.path.exists(manifest_path) else {}
+        for name, contents, timings in self.filings():
+            file_name = os.path.basename(name)
+            if isinstance(contents, str):
+                contents = contents.encode('utf-8')
+            with open(os.path.join(directory, file_name), 'wb') as f:
+                f.write(contents)
+            manifest[file_name] = {'bytes': len(contents), 'timings': timings}
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        _s = f"Wrote {len(manifest)} filings to replay corpus '{directory}'"
+        logging.info(_s)
+        return len(manifest)
+
+
+def read_manifest(directory):
+    """reads the manifest of a replay corpus
+
+    Args:
+        directory (str): replay corpus directory
+
+    Returns:
+        dict: sizes and recorded stage timings keyed by file name
+    """
+    with open(os.path.join(directory, cfg.REPLAY_MANIFEST), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def replay_corpus(directory, parser, repeat=1):
+    """re-runs every filing of a replay corpus through the current code and compares the timings against those recorded
+    at capture. The fastest of repeat runs is kept for each stage
+
+    Args:
+        directory (str): replay corpus directory
+        parser (XbrlParserDA): parser used to re-run the filings
+        repeat (int, optional): runs per filing. Defaults to 1.
+
+    Returns:
+        list: dictionaries of file name, bytes, recorded timings and replayed timings, slowest recorded first
+    """
+    results = []
+    for file_name, entry in read_manifest(directory).items():
+        with open(os.path.join(directory, file_name), 'rb') as f:
+            contents = f.read()
+        replayed = {}
+        for _ in range(repeat):
+            timings = {}
+            try:
+                extract_account_information(parser, file_name, contents, timings=timings)
+            except Exception as _e:
+                _s = f"Failed to replay '{file_name}': {_e!r}"
+                logging.error(_s)
+            for stage, seconds in timings.items():
+                replayed[stage] = min(seconds, replayed.get(stage, seconds))
+        results.append({'name': file_name, 'bytes': entry['bytes'], 'recorded': entry['timings'],
+                        'replayed': replayed})
+    return sorted(results, key=lambda result: sum(result['recorded'].values()), reverse=True)
+
+
+def format_replay(results):
+    """formats the results of replay_corpus as a table of recorded and replayed seconds per stage
+
+    Args:
+        results (list): dictionaries returned by replay_corpus
+
+    Returns:
+        str: one line per filing, with a header line
+    """
+    stages = (cfg.TIMING_STAGE_TAXONOMY, cfg.TIMING_STAGE_XML_PARSE, cfg.TIMING_STAGE_FACT_BUILD,
+              cfg.TIMING_STAGE_EXTRACTION)
+    lines = ['\t'.join(('name', 'bytes', *stages, 'total', 'ratio'))]
+    for result in results:
+        recorded, replayed = result['recorded'], result['replayed']
+        cells = [f"{recorded.get(stage, 0.0):.3f}->{replayed.get(stage, 0.0):.3f}" for stage in stages]
+        total_recorded, total_replayed = sum(recorded.values()), sum(replayed.values())
+        ratio = total_replayed / total_recorded if total_recorded else float('nan')
+        lines.append('\t'.join((result['name'], str(result['bytes']), *cells,
+                                f'{total_recorded:.3f}->{total_replayed:.3f}', f'{ratio:.2f}')))
+    return '\n'.join(lines)
@@ -0,0 +1,209 @@
+"""vectorised accounting consistency rules over batches of account information held as columnar masked arrays, as
+returned by read_columnar or to_masked_columns. Each rule is declared once and evaluated as NumPy expressions over
+whole columns, giving a per-record violation flag which is masked wherever the values the rule needs are missing.
+Monetary tolerances are given in pounds and scaled to pence for tables of values extracted with pence=True"""
+
+import numpy as np
+
+from digiaccounts import config as cfg
+
+
+def _get_unit_scale(pence):
+    """returns the number of table units in a pound"""
+    return cfg.PENCE_PER_POUND if pence else 1
+
+
+def _get_column(table, key, dtype=np.float64):
+    """returns a column of a table as a masked array, fully masked if the table has no such column"""
+    column = table.get(key)
+    if column is None:
+        rows = len(next(iter(table.values()))) if table else 0
+        return np.ma.MaskedArray(np.zeros(rows, dtype=dtype), mask=np.ones(rows, dtype=bool))
+    return np.ma.asarray(column).astype(dtype)
+
+
+class ComponentSumRule:
+    """reported total equal to the sum of its reported components, within a tolerance. Missing components count as
+    zero, and the rule is masked if the total or every component is missing. The total must be reported separately
+    from its components, as a total computed from them, such as the tangible asset totals of
+    get_account_information_dictionary, always satisfies the rule
+
+    Args:
+        name (str): rule name
+        total (str): account information key of the total
+        components (tuple): account information keys of the components
+        tolerance (float, optional): largest difference allowed, in pounds. Defaults to cfg.RULE_SUM_TOLERANCE.
+    """
+
+    def __init__(self, name, total, components, tolerance=cfg.RULE_SUM_TOLERANCE):
+        self.name = name
+        self.total = total
+        self.components = tuple(components)
+        self.tolerance = tolerance
+
+    def evaluate(self, table, pence=False):
+        """returns the violation flags of the rule over a table of account information
+
+        Args:
+            table (dict): masked arrays keyed by account information key
+            pence (bool, optional): monetary values of the table are in pence. Defaults to False.
+
+        Returns:
+            numpy.ma.MaskedArray: True where a record violates the rule, masked where it could not be evaluated
+        """
+        total = _get_column(table, self.total)
+        components = [_get_column(table, key) for key in self.components]
+        mask = np.ma.getmaskarray(total) | np.logical_and.reduce([np.ma.getmaskarray(c) for c in components])
+        component_sum = np.sum([c.filled(0.0) for c in components], axis=0)
+        tolerance = self.tolerance * _get_unit_scale(pence)
+        return np.ma.MaskedArray(np.abs(total.filled(0.0) - component_sum) > tolerance, mask=mask)
+
+
+class OrderingRule:
+    """one date strictly before another, such as the period start and end dates
+
+    Args:
+        name (str): rule name
+        earlier (str): account information key of the earlier date
+        later (str): account information key of the later date
+    """
+
+    def __init__(self, name, earlier, later):
+        self.name = name
+        self.earlier = earlier
+        self.later = later
+
+    def evaluate(self, table, pence=False):
+        """returns the violation flags of the rule, as ComponentSumRule.evaluate"""
+        earlier = _get_column(table, self.earlier, dtype='datetime64[D]')
+        later = _get_column(table, self.later, dtype='datetime64[D]')
+        return np.ma.MaskedArray(
+            np.ma.getdata(earlier) >= np.ma.getdata(later),
+            mask=np.ma.getmaskarray(earlier) | np.ma.getmaskarray(later),
+        )
+
+
+class SignRule:
+    """value never negative
+
+    Args:
+        name (str): rule name
+        key (str): account information key of the value
+    """
+
+    def __init__(self, name, key):
+        self.name = name
+        self.key = key
+
+    def evaluate(self, table, pence=False):
+        """returns the violation flags of the rule, as ComponentSumRule.evaluate"""
+        value = _get_column(table, self.key)
+        return np.ma.MaskedArray(value.filled(0.0) < 0, mask=np.ma.getmaskarray(value))
+
+
+class JumpRule:
+    """year on year change between the previous and current closing values no larger than max_ratio times the previous
+    value, or times min_base where the previous value is smaller
+
+    Args:
+        name (str): rule name
+        previous (str): account information key of the previous closing value
+        current (str): account information key of the current closing value
+        max_ratio (float, optional): largest change allowed relative to the previous value. Defaults to
+        cfg.RULE_JUMP_MAX_RATIO.
+        min_base (float, optional): smallest base the change is measured against, in pounds. Defaults to
+        cfg.RULE_JUMP_MIN_BASE.
+    """
+
+    def __init__(self, name, previous, current, max_ratio=cfg.RULE_JUMP_MAX_RATIO, min_base=cfg.RULE_JUMP_MIN_BASE):
+        self.name = name
+        self.previous = previous
+        self.current = current
+        self.max_ratio = max_ratio
+        self.min_base = min_base
+
+    def evaluate(self, table, pence=False):
+        """returns the violation flags of the rule, as ComponentSumRule.evaluate"""
+        previous = _get_column(table, self.previous)
+        current = _get_column(table, self.current)
+        previous_values, current_values = previous.filled(0.0), current.filled(0.0)
+        base = np.maximum(np.abs(previous_values), self.min_base * _get_unit_scale(pence))
+        return np.ma.MaskedArray(
+            np.abs(current_values - previous_values) > self.max_ratio * base,
+            mask=np.ma.getmaskarray(previous) | np.ma.getmaskarray(current),
+        )
+
+
+TANGIBLE_COMPONENTS_CURRENT = (
+    cfg.MONGO_KEY_INVESTMENT_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_INVESTMENT_PROPERTY_CLOSING_CURRENT,
+    cfg.MONGO_KEY_BIOLOGICAL_ASSETS_CLOSING_CURRENT,
+    cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT,
+)
+
+# the extracted tangible asset totals are computed as the sums of their components rather than reported, so no
+# component sum rule over them is among the defaults
+DEFAULT_RULES = (
+    OrderingRule('period_order', cfg.MONGO_KEY_START_DATE, cfg.MONGO_KEY_END_DATE),
+    *(SignRule(f'{key}_sign', key) for key in (
+        cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT,
+        cfg.MONGO_KEY_AVERAGE_EMPLOYEES,
+        cfg.MONGO_KEY_INTANGIBLE_ASSETS_CLOSING_CURRENT,
+        cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT,
+        *TANGIBLE_COMPONENTS_CURRENT,
+    )),
+    *(JumpRule(f'{current}_jump', previous, current) for previous, current in (
+        (cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS, cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT),
+        (cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_PREVIOUS, cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT),
+        (cfg.MONGO_KEY_INTANGIBLE_ASSETS_CLOSING_PREVIOUS, cfg.MONGO_KEY_INTANGIBLE_ASSETS_CLOSING_CURRENT),
+        (cfg.MONGO_KEY_EQUITY_CLOSING_PREVIOUS, cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT),
+    )),
+)
+
+
+def evaluate_rules(table, rules=DEFAULT_RULES, pence=False):
+    """evaluates a set of rules over a batch of account information
+
+    Args:
+        table (dict): masked arrays keyed by account information key, as returned by read_columnar
+        rules (tuple, optional): rules evaluated. Defaults to DEFAULT_RULES.
+        pence (bool, optional): monetary values of the table are in pence, as written by a ColumnarWriter created
+        with pence=True. Defaults to False.
+
+    Returns:
+        dict: masked boolean arrays keyed by rule name, True where a record violates the rule and masked where the
+        rule could not be evaluated
+    """
+    return {rule.name: rule.evaluate(table, pence=pence) for rule in rules}
+
+
+def get_violating_rows(flags):
+    """returns the rows violating at least one rule
+
+    Args:
+        flags (dict): masked boolean arrays returned by evaluate_rules
+
+    Returns:
+        numpy.ndarray: indices of the violating rows
+    """
+    if not flags:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(np.logical_or.reduce([violations.filled(False) for violations in flags.values()]))
+
+
+def summarise_rules(flags):
+    """counts the records each rule was evaluated on and violated by
+
+    Args:
+        flags (dict): masked boolean arrays returned by evaluate_rules
+
+    Returns:
+        dict: evaluated, violations and violation rate keyed by rule name
+    """
+    summary = {}
+    for name, violations in flags.items():
+        evaluated = int(violations.count())
+        count = int(violations.filled(False).sum())
+        summary[name] = {'evaluated': evaluated, 'violations': count,
+                         'violation_rate': count / evaluated if evaluated else None}
+    return summary
@@ -0,0 +1,187 @@
+"""functions for warming up the HttpCache with the taxonomies referenced by an archive of iXBRL files, so that the
+first filing referencing a new taxonomy does not block a batch while its schemas and linkbases are fetched one by one"""
+
+import os
+import re
+import sys
+import logging
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from xbrl.cache import HttpCache
+from xbrl.helper.uri_helper import resolve_uri
+
+from digiaccounts.digiaccounts_archive import iter_archive_members
+from digiaccounts import config as cfg
+
+SCHEMA_REF_PATTERN = re.compile(
+    rb'<\s*[\w-]+:schemaRef\b[^>]*?[\w-]+:href\s*=\s*["\']([^"\']+)["\']',
+    flags=re.IGNORECASE
+)
+
+XSD_NS = '{http://www.w3.org/2001/XMLSchema}'
+LINK_NS = '{http://www.xbrl.org/2003/linkbase}'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+# elements and attributes in schemas and linkbases that reference further files which py-xbrl fetches while parsing
+DEPENDENCY_ATTRIBUTES = (
+    (XSD_NS + 'import', 'schemaLocation'),
+    (XSD_NS + 'include', 'schemaLocation'),
+    (LINK_NS + 'linkbaseRef', XLINK_HREF),
+    (LINK_NS + 'roleRef', XLINK_HREF),
+    (LINK_NS + 'arcroleRef', XLINK_HREF),
+    (LINK_NS + 'loc', XLINK_HREF),
+)
+
+
+def get_schema_ref(contents):
+    """scans the raw bytes of an iXBRL file for the href of its link:schemaRef element without parsing the document
+
+    Args:
+        contents (bytes): raw contents of an iXBRL file
+
+    Returns:
+        str: the schema reference URI, or None if no schemaRef was found
+    """
+    match = SCHEMA_REF_PATTERN.search(contents)
+    if match is None:
+        return None
+    return match.group(1).decode('utf-8').strip()
+
+
+def scan_schema_refs(paths):
+    """collects the distinct absolute schema reference URIs of every iXBRL file in a list of CH archives, directories
+    and single files
+
+    Args:
+        paths (list): paths to zip archives, directories or single accounts files
+
+    Returns:
+        set: distinct schema reference URIs
+    """
+    schema_refs = set()
+    for name, contents in iter_archive_members(paths):
+        schema_ref = get_schema_ref(contents)
+        if schema_ref is None:
+            _s = f"No schemaRef found in '{name}'"
+            logging.warning(_s)
+        elif schema_ref.startswith('http'):
+            schema_refs.add(schema_ref)
+    return schema_refs
+
+
+def get_file_dependencies(file_path, file_url):
+    """returns the absolute URIs of the schemas and linkbases referenced by a cached schema or linkbase file
+
+    Args:
+        file_path (str): local path of the cached file
+        file_url (str): URL the file was fetched from, used to resolve relative references
+
+    Returns:
+        set: absolute URIs of the referenced files
+    """
+    dependencies = set()
+    try:
+        root = ET.parse(file_path).getroot()
+    except ET.ParseError as _e:
+        _s = f"Could not parse '{file_url}' for dependencies: {_e!r}"
+        logging.warning(_s)
+        return dependencies
+    for tag, attribute in DEPENDENCY_ATTRIBUTES:
+        for element in root.iter(tag):
+            uri = element.attrib.get(attribute)
+            if not uri:
+                continue
+            uri = uri.split('#')[0].strip()
+            if uri:
+                dependencies.add(resolve_uri(file_url, uri))
+    return dependencies
+
+
+def _cache_file(cache, file_url):
+    """caches a single file and returns the files it references"""
+    # HttpCache creates missing directories without exist_ok, which races when files sharing a directory are fetched
+    # concurrently
+    os.makedirs(os.path.dirname(cache.url_to_path(file_url)), exist_ok=True)
+    file_path = cache.cache_file(file_url)
+    return get_file_dependencies(file_path, file_url)
+
+
+def prefetch_taxonomies(schema_urls, cache, max_workers=cfg.TAXONOMY_PREFETCH_WORKERS):
+    """fetches the full import closure of a set of taxonomy schemas into an HttpCache, downloading independent files
+    concurrently. Each file is only requested once
+
+    Args:
+        schema_urls (iterable): absolute URLs of entry point taxonomy schemas
+        cache (HttpCache): cache the files are stored in
+        max_workers (int, optional): number of concurrent downloads. Defaults to cfg.TAXONOMY_PREFETCH_WORKERS.
+
+    Returns:
+        tuple: sets of the URLs that were cached and the URLs that could not be fetched
+    """
+    seen = set(schema_urls)
+    cached = set()
+    failed = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_cache_file, cache, url): url for url in seen}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    dependencies = future.result()
+                except Exception as _e:
+                    _s = f"Could not fetch '{url}': {_e!r}"
+                    logging.error(_s)
+                    failed.add(url)
+                    continue
+                cached.add(url)
+                for dependency in dependencies - seen:
+                    if dependency.startswith('http'):
+                        seen.add(dependency)
+                        pending[executor.submit(_cache_file, cache, dependency)] = dependency
+    return cached, failed
+
+
+def warm_taxonomy_cache(paths, cache, max_workers=cfg.TAXONOMY_PREFETCH_WORKERS):
+    """scans a list of CH archives for the taxonomies they reference and fetches them into an HttpCache
+
+    Args:
+        paths (list): paths to zip archives, directories or single accounts files
+        cache (HttpCache): cache the files are stored in
+        max_workers (int, optional): number of concurrent downloads. Defaults to cfg.TAXONOMY_PREFETCH_WORKERS.
+
+    Returns:
+        tuple: sets of the URLs that were cached and the URLs that could not be fetched
+    """
+    schema_urls = scan_schema_refs(paths)
+    _s = f'Found {len(schema_urls)} distinct taxonomy schemas'
+    logging.info(_s)
+    return prefetch_taxonomies(schema_urls, cache, max_workers=max_workers)
+
+
+def add_warm_cache_arguments(parser):
+    """adds the warm-up command line arguments to an argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): parser to add the arguments to
+    """
+    parser.add_argument('paths', nargs='+', help='CH archives, directories of archives or accounts files')
+    parser.add_argument('--cache-dir', required=True, help='HttpCache directory to warm up')
+    parser.add_argument('--workers', type=int, default=cfg.TAXONOMY_PREFETCH_WORKERS, help='concurrent downloads')
+    parser.add_argument('--delay', type=int, default=0, help='milliseconds to wait between requests to a server')
+
+
+def run_warm_cache(args):
+    """runs the warm-up command for parsed command line arguments
+
+    Args:
+        args (argparse.Namespace): arguments added by add_warm_cache_arguments
+
+    Returns:
+        int: exit status, non-zero if any file could not be fetched
+    """
+    cache = HttpCache(args.cache_dir, delay=args.delay)
+    cached, failed = warm_taxonomy_cache(args.paths, cache, max_workers=args.workers)
+    print(f'cached {len(cached)} taxonomy files, {len(failed)} failed', file=sys.stderr)
+    return 1 if failed else 0
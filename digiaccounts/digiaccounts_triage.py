@@ -0,0 +1,250 @@
+"""functions for triaging iXBRL files on their header metadata (registration, period, dormancy and production
+software) without parsing the whole document or loading its taxonomy, and for rejecting files which cannot be parsed
+as iXBRL from a byte scan alone"""
+
+import os
+import re
+import csv
+import mmap
+import logging
+import threading
+import xml.etree.ElementTree as ET
+import dateutil.parser
+from xbrl.instance import _extract_non_numeric_value
+
+from digiaccounts.digiaccounts_io import SkippingReader
+from digiaccounts import config as cfg
+
+TRIAGE_FACT_KEYS = {
+    cfg.FACT_NAME_ENTITY_REGISTRATION.lower(): cfg.MONGO_KEY_ENTITY_REGISTRATION,
+    cfg.FACT_NAME_START_DATE.lower(): cfg.MONGO_KEY_START_DATE,
+    cfg.FACT_NAME_END_DATE.lower(): cfg.MONGO_KEY_END_DATE,
+    cfg.FACT_NAME_ACCOUNTING_SOFTWARE.lower(): cfg.MONGO_KEY_ACCOUNTING_SOFTWARE,
+} | {name.lower(): cfg.MONGO_KEY_DORMANT_STATE for name in cfg.FACT_NAME_DORMANT_STATE}
+
+# precedence of the dormant state fact names, later names overriding earlier ones as in get_dormant_state
+DORMANT_FACT_RANKS = {name.lower(): rank for rank, name in enumerate(cfg.FACT_NAME_DORMANT_STATE)}
+
+# markers every parsable iXBRL file holds, in the order they are checked, with the reason code of a file without them
+PREVALIDATION_MARKERS = (
+    (rb'http://www\.xbrl\.org/20(?:08|13)/inlineXBRL', cfg.PREVALIDATION_NO_IX_NAMESPACE),
+    (rb'schemaRef', cfg.PREVALIDATION_NO_SCHEMA_REF),
+    (rb'<\s*[\w.-]+:resources[\s>/]', cfg.PREVALIDATION_NO_RESOURCES),
+)
+PREVALIDATION_PATTERNS = {
+    bytes: [(re.compile(pattern), reason) for pattern, reason in PREVALIDATION_MARKERS],
+    str: [(re.compile(pattern.decode('ascii')), reason) for pattern, reason in PREVALIDATION_MARKERS],
+}
+
+
+def _split_tag(tag):
+    """splits an ElementTree tag into its namespace and local name"""
+    if tag[:1] == '{':
+        namespace, _, local_name = tag[1:].partition('}')
+        return namespace, local_name
+    return '', tag
+
+
+def _get_fact_text(elem, ns_map):
+    """returns the text of a fact element with its ixt format applied, as _extract_non_numeric_value"""
+    elem.attrib['ns_map'] = ns_map
+    return str(_extract_non_numeric_value(elem)).strip()
+
+
+def _format_triage_value(key, value):
+    """converts a fact value, with its format applied, to the type returned by the equivalent digiaccounts_data
+    function"""
+    if key in (cfg.MONGO_KEY_START_DATE, cfg.MONGO_KEY_END_DATE):
+        return dateutil.parser.parse(value)
+    elif key == cfg.MONGO_KEY_DORMANT_STATE:
+        return value.lower() == 'true'
+    return value
+
+
+def triage_ixbrl_stream(stream, max_facts=cfg.TRIAGE_MAX_FACTS, chunk_size=cfg.TRIAGE_CHUNK_SIZE,
+                        max_bytes=cfg.TRIAGE_MAX_BYTES):
+    """reads an iXBRL document from a binary stream only until its registration number, period start/end, dormant
+    state and production software have been found, or until max_facts facts or max_bytes bytes past the end of
+    ix:header have been read.
+    Fact formats are applied and the first fact of each name taken, with EntityDormant taking precedence over
+    EntityDormantTruefalse, as in get_account_information_dictionary. A document which is not well formed XML gives the
+    values found before the error
+
+    Args:
+        stream (io.RawIOBase): binary stream of the iXBRL document
+        max_facts (int, optional): facts to read after the end of ix:header before giving up on missing values.
+        Defaults to cfg.TRIAGE_MAX_FACTS.
+        chunk_size (int, optional): bytes fed to the XML parser at a time. Defaults to cfg.TRIAGE_CHUNK_SIZE.
+        max_bytes (int, optional): bytes to read after the end of ix:header before giving up on missing values.
+        Defaults to cfg.TRIAGE_MAX_BYTES.
+
+    Returns:
+        dict: triage values keyed as in get_account_information_dictionary, with None for values not found
+    """
+    triage = dict.fromkeys(TRIAGE_FACT_KEYS.values())
+    found = set()
+    dormant_rank = -1
+    ns_map = {}
+    header_closed = False
+    facts_after_header = 0
+    bytes_read = 0
+    header_end = None
+    fact_depth = 0
+
+    parser = ET.XMLPullParser(events=('start-ns', 'start', 'end'))
+    try:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            parser.feed(chunk)
+            bytes_read += len(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start-ns':
+                    prefix, uri = elem
+                    ns_map[prefix] = uri
+                    continue
+                namespace, local_name = _split_tag(elem.tag)
+                is_fact = 'inlineXBRL' in namespace and local_name in ('nonNumeric', 'nonFraction')
+                if event == 'start':
+                    fact_depth += is_fact
+                    continue
+
+                if is_fact:
+                    fact_depth -= 1
+                    name = elem.attrib.get('name', '').split(':')[-1].lower()
+                    key = TRIAGE_FACT_KEYS.get(name)
+                    if key == cfg.MONGO_KEY_DORMANT_STATE:
+                        if DORMANT_FACT_RANKS[name] > dormant_rank:
+                            dormant_rank = DORMANT_FACT_RANKS[name]
+                            triage[key] = _format_triage_value(key, _get_fact_text(elem, ns_map))
+                            if dormant_rank == len(DORMANT_FACT_RANKS) - 1:
+                                found.add(key)
+                    elif key is not None and key not in found:
+                        triage[key] = _format_triage_value(key, _get_fact_text(elem, ns_map))
+                        found.add(key)
+                    if header_closed:
+                        facts_after_header += 1
+                elif 'inlineXBRL' in namespace and local_name == 'header':
+                    header_closed = True
+
+                if len(found) == len(triage) or (header_closed and facts_after_header >= max_facts):
+                    return triage
+                if fact_depth == 0:
+                    elem.clear()
+            if header_closed:
+                header_end = bytes_read if header_end is None else header_end
+                if bytes_read - header_end >= max_bytes:
+                    _s = (f'Triage scan stopped {max_bytes} bytes after ix:header with missing values: '
+                          f'{sorted(set(triage) - found)}')
+                    logging.info(_s)
+                    return triage
+    except ET.ParseError as _e:
+        _s = f'Triage scan stopped at malformed XML: {_e!r}'
+        logging.warning(_s)
+        return triage
+
+    _s = f'Triage scan reached end of document with missing values: {sorted(set(triage) - found)}'
+    logging.info(_s)
+    return triage
+
+
+def triage_ixbrl(contents, max_facts=cfg.TRIAGE_MAX_FACTS):
+    """triages an iXBRL document held in memory. See triage_ixbrl_stream
+
+    Args:
+        contents (str or bytes): raw contents of the iXBRL file
+        max_facts (int, optional): facts to read after the end of ix:header before giving up on missing values.
+        Defaults to cfg.TRIAGE_MAX_FACTS.
+
+    Returns:
+        dict: triage values keyed as in get_account_information_dictionary, with None for values not found
+    """
+    if isinstance(contents, str):
+        contents = contents.encode('utf-8')
+    with SkippingReader(contents) as reader:
+        return triage_ixbrl_stream(reader, max_facts=max_facts)
+
+
+def triage_ixbrl_file(file_path, max_facts=cfg.TRIAGE_MAX_FACTS):
+    """triages a local iXBRL file, reading it through a memory map. See triage_ixbrl_stream
+
+    Args:
+        file_path (str): path to the iXBRL file
+        max_facts (int, optional): facts to read after the end of ix:header before giving up on missing values.
+        Defaults to cfg.TRIAGE_MAX_FACTS.
+
+    Returns:
+        dict: triage values keyed as in get_account_information_dictionary, with None for values not found
+    """
+    if os.path.getsize(file_path) == 0:
+        # an empty file cannot be memory-mapped
+        return triage_ixbrl(b'', max_facts=max_facts)
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with SkippingReader(mapped) as reader:
+            return triage_ixbrl_stream(reader, max_facts=max_facts)
+
+
+def prevalidate_ixbrl(contents):
+    """checks that a raw iXBRL file holds the inline XBRL namespace, a schemaRef and ix:resources, without which
+    parse_ixbrl_string would fail, by scanning its bytes rather than parsing it
+
+    Args:
+        contents (str or bytes): raw contents of the iXBRL file
+
+    Returns:
+        str: reason code of the first missing marker, one of cfg.PREVALIDATION_*, or None if the file passes
+    """
+    if not contents or contents.isspace():
+        return cfg.PREVALIDATION_EMPTY
+    for pattern, reason in PREVALIDATION_PATTERNS[str if isinstance(contents, str) else bytes]:
+        if pattern.search(contents) is None:
+            return reason
+    return None
+
+
+class Quarantine:
+    """thread-safe list of the files of a batch rejected by prevalidate_ixbrl, with their reason codes"""
+
+    def __init__(self):
+        self.filings = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.filings)
+
+    def check(self, name, contents):
+        """prevalidates a file, adding it to the quarantine if it fails
+
+        Args:
+            name (str): CH archive file name
+            contents (str or bytes): raw contents of the iXBRL file
+
+        Returns:
+            bool: True if the file passed and should be parsed
+        """
+        reason = prevalidate_ixbrl(contents)
+        if reason is None:
+            return True
+        _s = f"Quarantined '{name}': {reason}"
+        logging.warning(_s)
+        with self._lock:
+            self.filings.append((name, reason))
+        return False
+
+    def counts(self):
+        """returns the number of quarantined files per reason code
+
+        Returns:
+            dict: counts keyed by reason code
+        """
+        counts = {}
+        for _, reason in self.filings:
+            counts[reason] = counts.get(reason, 0) + 1
+        return counts
+
+    def write(self, path):
+        """appends the quarantined files and their reason codes to a CSV file
+
+        Args:
+            path (str): path of the CSV file
+        """
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(self.filings)
@@ -1,5 +1,12 @@
 """utility functions for checking XBRL Fact contents"""
 
+import re
+import math
+from decimal import Decimal, ROUND_HALF_EVEN
+
+# UK postcode with all whitespace removed: area letters, district digits and sub-district letter, then the inward code
+POSTCODE_PATTERN = re.compile(r'([A-Z]{1,2})([0-9][0-9]?)([A-Z]?)([0-9][A-Z]{2})')
+
 
 def check_unit_gbp(fact):
     """returns boolean check if a fact contains a GBP unit
@@ -10,7 +17,7 @@ def check_unit_gbp(fact):
     Returns:
         bool: True if fact has unit GBP
     """
-    if hasattr(fact, 'unit') and (fact.unit.unit == 'iso4217:GBP'):
+    if hasattr(fact, 'unit') and (getattr(fact.unit, 'unit', None) == 'iso4217:GBP'):
         return True
     else:
         return False
@@ -87,6 +94,23 @@ def return_dimension_values(fact):
     return fact.json()['dimensions'].values()
 
 
+def return_dimension_signature(fact):
+    """returns a string identifying the dimension members of a fact's context, built directly from the context
+    segments rather than from the fact json
+
+    Args:
+        fact (xbrl.instance.<fact>): single fact object from XbrlInstance
+
+    Returns:
+        str: sorted 'dimension=member' pairs joined by '|', or an empty string for facts without dimensions
+    """
+    return '|'.join(sorted(
+        f'{segment.dimension.name}={segment.member.name}'
+        for segment in fact.context.segments
+        if hasattr(segment, 'member')
+    ))
+
+
 def dimension_in_dimension_dict(dimension_name, fact):
     """returns boolian truth if a particular dimension name is found in the dimensions dictionary
 
@@ -113,3 +137,57 @@ def check_fact_value_string_none(value):
         return True
     else:
         return False
+
+
+def to_pence(value, decimals=None):
+    """converts a monetary value in pounds to an exact whole number of pence, after rounding it to the precision given
+    by the decimals attribute of its fact. For example 1234.5 with decimals -2 is 120000 pence
+
+    Args:
+        value (float): value in pounds
+        decimals (int, optional): decimals attribute of the fact, None for INF. Defaults to None.
+
+    Returns:
+        int: value in pence, rounding half to even, or the value unchanged if it is not a finite number
+    """
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+        return value
+    # the repr of a float is the shortest decimal string which reads back as the same float, so no binary drift is kept
+    amount = Decimal(repr(value))
+    if decimals is not None and decimals < 2:
+        amount = amount.quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_EVEN)
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def decode_contents(contents):
+    """decodes the raw contents of an iXBRL file to a string, replacing bytes which are not valid UTF-8 rather than
+    failing on them
+
+    Args:
+        contents (str or bytes): raw contents of the iXBRL file
+
+    Returns:
+        str: decoded contents
+    """
+    if isinstance(contents, bytes):
+        return contents.decode('utf-8', errors='replace')
+    return contents
+
+
+def split_postcode(postcode):
+    """normalises a UK postcode and splits it into its outward code, inward code, area and district, ignoring case and
+    spacing. For example 'ec1a 1bb' is split into 'EC1A', '1BB', 'EC' and 'EC1'
+
+    Args:
+        postcode (str): postcode as extracted from the accounts
+
+    Returns:
+        tuple: outward code, inward code, area and district, or None if the postcode is missing or malformed
+    """
+    if not isinstance(postcode, str):
+        return None
+    match = POSTCODE_PATTERN.fullmatch(''.join(postcode.split()).upper())
+    if match is None:
+        return None
+    area, digits, sub_district, inward = match.groups()
+    return area + digits + sub_district, inward, area, area + digits
@@ -0,0 +1,270 @@
+"""bulk validation of extracted account information against a reference dataset. A reference table keyed on
+registration number and period end is joined to a columnar table of extraction output by sorting the extracted keys
+once and binary searching every reference key, and each shared field is then compared column-wise with NumPy, giving
+per-field match rates, numeric tolerance differences and a table of mismatches"""
+
+import csv
+import logging
+
+import numpy as np
+
+from digiaccounts.digiaccounts_columnar import ACCOUNT_INFORMATION_SCHEMA, MONETARY_KEYS, to_masked_column
+from digiaccounts.digiaccounts_util import to_pence
+from digiaccounts import config as cfg
+
+# comparison outcomes, in the order of their int8 codes
+STATUSES = (
+    cfg.VALIDATION_STATUS_MATCH,
+    cfg.VALIDATION_STATUS_MISMATCH,
+    cfg.VALIDATION_STATUS_MISSING,
+    cfg.VALIDATION_STATUS_UNEXPECTED,
+)
+
+MISMATCH_COLUMNS = ('registration', 'end_date', '_id', 'field', 'status', 'expected', 'extracted', 'difference')
+
+
+def _parse_reference_value(value, dtype, pence=False):
+    """parses a reference CSV value to the NumPy dtype of its column, returning None for empty values. Monetary values
+    in pounds are converted to int pence if pence is set"""
+    value = value.strip()
+    if not value:
+        return None
+    if dtype.kind == 'b':
+        return value.lower() in ('true', '1', 'yes')
+    if dtype.kind == 'M':
+        return np.datetime64(value[:10], 'D')
+    if dtype.kind in 'fi':
+        value = float(value.replace(',', ''))
+        return to_pence(value) if pence else value
+    return value
+
+
+def read_reference_csv(path, schema=ACCOUNT_INFORMATION_SCHEMA, pence=False):
+    """reads a reference table from a CSV file with a header line of account information keys
+
+    Args:
+        path (str): path of the CSV file
+        schema (dict, optional): NumPy dtypes of known columns, other columns being read as strings. Defaults to
+        ACCOUNT_INFORMATION_SCHEMA.
+        pence (bool, optional): read the monetary values, given in pounds, as int64 pence, for comparison with a table
+        written with pence=True. Defaults to False.
+
+    Returns:
+        dict: masked arrays keyed by column name, masked where values were empty, as returned by read_columnar
+    """
+    if pence:
+        schema = schema | {key: 'int64' for key in MONETARY_KEYS if key in schema}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        dtypes = [np.dtype(schema.get(name, 'U')) for name in header]
+        monetary = [pence and name in MONETARY_KEYS for name in header]
+        columns = [[] for _ in header]
+        for line in reader:
+            for values, value, dtype, in_pence in zip(columns, line, dtypes, monetary):
+                values.append(_parse_reference_value(value, dtype, in_pence))
+    return {name: to_masked_column(values, dtype) for name, values, dtype in zip(header, columns, dtypes)}
+
+
+def _get_join_keys(reference, extracted, keys):
+    """returns structured key arrays of a common dtype for both tables, and the rows of each with every key present.
+    Registration numbers are compared stripped and upper cased"""
+    key_arrays = ([], [])
+    for key in keys:
+        for arrays, table in zip(key_arrays, (reference, extracted)):
+            values = np.ma.getdata(table[key])
+            if values.dtype.kind == 'U':
+                values = np.char.upper(np.char.strip(values))
+            arrays.append(values)
+    dtype = [(f'k{i}', np.result_type(a, b)) for i, (a, b) in enumerate(zip(*key_arrays))]
+    result = []
+    for arrays, table in zip(key_arrays, (reference, extracted)):
+        structured = np.empty(len(arrays[0]), dtype=dtype)
+        valid = np.ones(len(arrays[0]), dtype=bool)
+        for i, (values, key) in enumerate(zip(arrays, keys)):
+            structured[f'k{i}'] = values
+            valid &= ~np.ma.getmaskarray(table[key])
+        result.extend((structured, np.flatnonzero(valid)))
+    return result
+
+
+def join_tables(reference, extracted, keys=cfg.VALIDATION_KEYS):
+    """joins reference rows to extracted rows with equal keys. Where several extracted rows share a key, the last is
+    joined, so a refiled period is validated against its latest extraction
+
+    Args:
+        reference (dict): masked arrays of the reference table keyed by column name
+        extracted (dict): masked arrays of the extracted table keyed by column name, as returned by read_columnar
+        keys (tuple, optional): columns joined on. Defaults to cfg.VALIDATION_KEYS.
+
+    Returns:
+        tuple: arrays of matched reference row indices, the joined extracted row indices and the unmatched reference
+        row indices
+    """
+    reference_keys, reference_rows, extracted_keys, extracted_rows = _get_join_keys(reference, extracted, keys)
+    order = extracted_rows[np.argsort(extracted_keys[extracted_rows], kind='stable')]
+    sorted_keys = extracted_keys[order]
+    positions = np.searchsorted(sorted_keys, reference_keys[reference_rows], side='right') - 1
+    found = positions >= 0
+    found[found] = sorted_keys[positions[found]] == reference_keys[reference_rows[found]]
+    unmatched = np.setdiff1d(np.arange(len(reference_keys)), reference_rows[found], assume_unique=True)
+    return reference_rows[found], order[positions[found]], unmatched
+
+
+def compare_column(expected, extracted, rtol=cfg.VALIDATION_RTOL, atol=cfg.VALIDATION_ATOL):
+    """compares joined reference and extracted values of one field
+
+    Args:
+        expected (numpy.ma.MaskedArray): reference values
+        extracted (numpy.ma.MaskedArray): extracted values, aligned with expected
+        rtol (float, optional): relative tolerance of numeric values. Defaults to cfg.VALIDATION_RTOL.
+        atol (float, optional): absolute tolerance of numeric values. Defaults to cfg.VALIDATION_ATOL.
+
+    Returns:
+        tuple: int8 array of STATUSES codes and float array of extracted minus expected values, NaN where either is
+        missing or the field is not numeric
+    """
+    expected_valid = ~np.ma.getmaskarray(expected)
+    extracted_valid = ~np.ma.getmaskarray(extracted)
+    expected, extracted = np.ma.getdata(expected), np.ma.getdata(extracted)
+    difference = np.full(len(expected), np.nan)
+    if expected.dtype.kind in 'fi' and extracted.dtype.kind in 'fi':
+        expected, extracted = expected.astype(np.float64), extracted.astype(np.float64)
+        equal = np.isclose(extracted, expected, rtol=rtol, atol=atol)
+        both = expected_valid & extracted_valid
+        difference[both] = extracted[both] - expected[both]
+    else:
+        equal = expected == extracted
+    status = np.zeros(len(expected), dtype=np.int8)
+    status[expected_valid & extracted_valid & ~equal] = STATUSES.index(cfg.VALIDATION_STATUS_MISMATCH)
+    status[expected_valid & ~extracted_valid] = STATUSES.index(cfg.VALIDATION_STATUS_MISSING)
+    status[~expected_valid & extracted_valid] = STATUSES.index(cfg.VALIDATION_STATUS_UNEXPECTED)
+    return status, difference
+
+
+def _as_strings(values):
+    """returns the values of a masked array as strings, empty where masked"""
+    strings = np.ma.getdata(values).astype(str).astype(object)
+    strings[np.ma.getmaskarray(values)] = ''
+    return strings
+
+
+def validate_extractions(reference, extracted, fields=None, keys=cfg.VALIDATION_KEYS, rtol=cfg.VALIDATION_RTOL,
+                         atol=cfg.VALIDATION_ATOL, pence=False):
+    """validates a table of extracted account information against a reference table
+
+    Args:
+        reference (dict): masked arrays of the reference table keyed by column name
+        extracted (dict): masked arrays of the extracted table keyed by column name, as returned by read_columnar
+        fields (list, optional): fields compared. Defaults to None, comparing every non-key column of both tables.
+        keys (tuple, optional): columns joined on. Defaults to cfg.VALIDATION_KEYS.
+        rtol (float, optional): relative tolerance of numeric values. Defaults to cfg.VALIDATION_RTOL.
+        atol (float, optional): absolute tolerance of numeric values, in pounds for monetary fields. Defaults to
+        cfg.VALIDATION_ATOL.
+        pence (bool, optional): monetary values of both tables are in pence, as read by read_reference_csv and written
+        by a ColumnarWriter created with pence=True. Defaults to False.
+
+    Returns:
+        tuple: summary dictionary of row counts and per-field statistics, and a table of mismatches as arrays keyed by
+        MISMATCH_COLUMNS, including reference rows with no extraction. Monetary differences are in the unit of the
+        tables
+    """
+    if fields is None:
+        fields = [name for name in reference if name in extracted and name not in keys and name != '_id']
+    reference_rows, extracted_rows, unmatched = join_tables(reference, extracted, keys)
+    registration, end_date = (_as_strings(reference[key]) for key in keys[:2])
+    extracted_ids = _as_strings(extracted['_id']) if '_id' in extracted else np.full(len(extracted[keys[0]]), '')
+
+    summary = {
+        'reference_rows': len(reference[keys[0]]),
+        'extracted_rows': len(extracted[keys[0]]),
+        'joined_rows': len(reference_rows),
+        'not_extracted_rows': len(unmatched),
+        'fields': {},
+    }
+    mismatches = {name: [] for name in MISMATCH_COLUMNS}
+
+    def _add_mismatches(rows, joined, field, status, expected, found, difference):
+        mismatches['registration'].append(registration[rows])
+        mismatches['end_date'].append(end_date[rows])
+        mismatches['_id'].append(joined)
+        mismatches['field'].append(np.full(len(rows), field, dtype=object))
+        mismatches['status'].append(status)
+        mismatches['expected'].append(expected)
+        mismatches['extracted'].append(found)
+        mismatches['difference'].append(difference)
+
+    for field in fields:
+        expected, found = reference[field][reference_rows], extracted[field][extracted_rows]
+        field_atol = atol * cfg.PENCE_PER_POUND if pence and field in MONETARY_KEYS else atol
+        status, difference = compare_column(expected, found, rtol=rtol, atol=field_atol)
+        counts = np.bincount(status, minlength=len(STATUSES))
+        # rows missing from both tables are not counted as compared or matched
+        both_missing = int((np.ma.getmaskarray(expected) & np.ma.getmaskarray(found)).sum())
+        counts[0] -= both_missing
+        compared = len(status) - both_missing
+        differences = np.abs(difference[status == STATUSES.index(cfg.VALIDATION_STATUS_MISMATCH)])
+        summary['fields'][field] = {
+            'compared': compared,
+            **{name: int(count) for name, count in zip(STATUSES, counts)},
+            'match_rate': int(counts[0]) / compared if compared else None,
+            'max_abs_difference': float(np.nanmax(differences)) if np.isfinite(differences).any() else None,
+        }
+        failed = np.flatnonzero(status)
+        _add_mismatches(reference_rows[failed], extracted_ids[extracted_rows[failed]], field,
+                        np.array(STATUSES, dtype=object)[status[failed]], _as_strings(expected[failed]),
+                        _as_strings(found[failed]), difference[failed])
+
+    _add_mismatches(unmatched, np.full(len(unmatched), '', dtype=object), '',
+                    np.full(len(unmatched), cfg.VALIDATION_STATUS_NOT_EXTRACTED, dtype=object),
+                    np.full(len(unmatched), '', dtype=object), np.full(len(unmatched), '', dtype=object),
+                    np.full(len(unmatched), np.nan))
+    mismatches = {name: np.concatenate(arrays) for name, arrays in mismatches.items()}
+    _s = (f"Validated {summary['joined_rows']} of {summary['reference_rows']} reference rows, "
+          f"{len(mismatches['status'])} mismatches")
+    logging.info(_s)
+    return summary, mismatches
+
+
+def write_mismatches(mismatches, path):
+    """writes the mismatch table of validate_extractions to a CSV file
+
+    Args:
+        mismatches (dict): arrays keyed by MISMATCH_COLUMNS
+        path (str): path of the CSV file
+
+    Returns:
+        int: number of mismatches written
+    """
+    difference = np.char.mod('%.2f', mismatches['difference']).astype(object)
+    difference[np.isnan(mismatches['difference'])] = ''
+    columns = [difference if name == 'difference' else mismatches[name] for name in MISMATCH_COLUMNS]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MISMATCH_COLUMNS)
+        writer.writerows(zip(*columns))
+    return len(difference)
+
+
+def format_validation(summary):
+    """formats the summary of validate_extractions as a table with one line per field
+
+    Args:
+        summary (dict): summary dictionary returned by validate_extractions
+
+    Returns:
+        str: row counts followed by a table of per-field statistics
+    """
+    lines = [
+        f"joined {summary['joined_rows']} of {summary['reference_rows']} reference rows to "
+        f"{summary['extracted_rows']} extracted rows, {summary['not_extracted_rows']} not extracted",
+        '\t'.join(('field', 'compared', *STATUSES, 'match rate', 'max abs difference')),
+    ]
+    for field, statistics in summary['fields'].items():
+        match_rate = f"{statistics['match_rate']:.4f}" if statistics['match_rate'] is not None else '-'
+        max_difference = statistics['max_abs_difference']
+        lines.append('\t'.join((
+            field, str(statistics['compared']), *(str(statistics[name]) for name in STATUSES), match_rate,
+            f'{max_difference:.2f}' if max_difference is not None else '-',
+        )))
+    return '\n'.join(lines)
@@ -0,0 +1,114 @@
+"""unit tests for digiaccounts_aggregates functions"""
+
+from datetime import datetime
+
+import pytest
+
+from digiaccounts.digiaccounts_aggregates import AccountAggregates, get_group_key
+from digiaccounts import config as cfg
+
+
+def make_account(unique_id, postcode, period_end, dormant, turnover):
+    """returns a minimal account information dictionary"""
+    return {
+        '_id': unique_id,
+        cfg.MONGO_KEY_POSTAL_CODE: postcode,
+        cfg.MONGO_KEY_END_DATE: period_end,
+        cfg.MONGO_KEY_DORMANT_STATE: dormant,
+        cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT: turnover,
+    }
+
+
+ACCOUNTS = [
+    make_account('a', 'cf14 3uz', datetime(2020, 12, 31), False, 100.0),
+    make_account('b', 'CF10 1AA', datetime(2020, 6, 30), False, 300.0),
+    make_account('c', 'CF99 1NA', datetime(2020, 3, 31), False, None),
+    make_account('d', 'SW1A 2AA', datetime(2021, 3, 31), True, 0.0),
+    make_account('e', None, None, None, 5.0),
+]
+
+
+def test_account_aggregates():
+    """test AccountAggregates class
+
+    Expected to keep running totals per group, skipping missing values
+    """
+    aggregates = AccountAggregates()
+    aggregates.update(ACCOUNTS)
+
+    rows = {(row['postcode_area'], row['period_end_year'], row['dormant']): row for row in aggregates.rows()}
+    turnover = rows[('CF', 2020, False)][cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT]
+
+    assert len(aggregates) == 3
+    assert rows[('CF', 2020, False)]['accounts'] == 3
+    assert turnover == {'count': 2, 'sum': 400.0, 'mean': 200.0, 'min': 100.0, 'max': 300.0}
+    assert get_group_key(ACCOUNTS[-1]) in aggregates.groups
+
+
+def test_account_aggregates_merge_and_persist(tmp_path):
+    """test AccountAggregates merge, save and load
+
+    Expected to give the same aggregates from merged partials, before and after a round trip through the file
+    """
+    whole = AccountAggregates()
+    whole.update(ACCOUNTS)
+    first, second = AccountAggregates(), AccountAggregates()
+    first.update(ACCOUNTS[::2])
+    second.update(ACCOUNTS[1::2])
+
+    first.merge(second)
+    first.save(str(tmp_path / 'aggregates.json'))
+
+    assert first.rows() == whole.rows()
+    assert AccountAggregates.load(str(tmp_path / 'aggregates.json')).rows() == whole.rows()
+    with pytest.raises(KeyError):
+        first.merge(AccountAggregates(measures=(cfg.MONGO_KEY_AVERAGE_EMPLOYEES,)))
+
+
+def test_account_aggregates_reingest(tmp_path):
+    """test AccountAggregates class with accounts ingested again
+
+    Expected to count an unchanged account once, replace the contribution of a re-extracted account, recomputing the
+    extremes it held, and move an account whose group changed, across merges and a round trip through the file
+    """
+    whole = AccountAggregates()
+    whole.update(ACCOUNTS)
+    aggregates = AccountAggregates()
+    aggregates.update(ACCOUNTS)
+    aggregates.update(ACCOUNTS)
+    assert aggregates.rows() == whole.rows()
+
+    aggregates.add(make_account('b', 'CF10 1AA', datetime(2020, 6, 30), False, 50.0))
+    aggregates.add(make_account('d', 'SW1A 2AA', datetime(2021, 3, 31), False, 0.0))
+    aggregates.save(str(tmp_path / 'aggregates.json'))
+    loaded = AccountAggregates.load(str(tmp_path / 'aggregates.json'))
+    loaded.merge(aggregates)
+
+    for result in (aggregates, loaded):
+        rows = {(row['postcode_area'], row['period_end_year'], row['dormant']): row for row in result.rows()}
+        turnover = rows[('CF', 2020, False)][cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT]
+
+        assert rows[('CF', 2020, False)]['accounts'] == 3
+        assert turnover == {'count': 2, 'sum': 150.0, 'mean': 75.0, 'min': 50.0, 'max': 100.0}
+        assert ('SW', 2021, True) not in rows
+        assert rows[('SW', 2021, False)]['accounts'] == 1
+        assert len(result.accounts) == len(ACCOUNTS)
+    with pytest.raises(KeyError):
+        aggregates.add(make_account(None, 'CF14 3UZ', datetime(2020, 12, 31), False, 1.0))
+
+
+def test_account_aggregates_pence():
+    """test AccountAggregates class with values in pence
+
+    Expected to keep exact int sums of int values, and float sums of float values
+    """
+    aggregates = AccountAggregates()
+    aggregates.update([
+        make_account(str(value), 'CF14 3UZ', datetime(2020, 12, 31), False, value) for value in (10001, 20002)
+    ])
+    aggregates.add(make_account('f', 'SW1A 2AA', datetime(2020, 12, 31), False, 0.5))
+
+    rows = {row['postcode_area']: row[cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT] for row in aggregates.rows()}
+
+    assert rows['CF']['sum'] == 30003 and isinstance(rows['CF']['sum'], int)
+    assert rows['SW']['sum'] == 0.5
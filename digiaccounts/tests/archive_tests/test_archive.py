@@ -0,0 +1,83 @@
+"""unit tests for digiaccounts_archive functions"""
+
+import os
+import logging
+import zipfile
+
+from digiaccounts.digiaccounts_io import create_unique_id
+from digiaccounts.digiaccounts_archive import ArchiveIndex, iter_archive_members
+
+
+def _write_archive(archive_path, registrations, period_end='20201231'):
+    """writes a CH style archive holding one accounts file per registration number"""
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        for registration in registrations:
+            archive.writestr(f'Prod223_0001_{registration}_{period_end}.html', f'<html>{registration}</html>')
+        archive.writestr('Prod223_0001_99999999_20201231.xml', '<xbrl/>')
+
+
+def test_iter_archive_members(tmp_path):
+    """test iter_archive_members function
+
+    Expected to yield the iXBRL members of archives found in a directory along with single accounts files, skipping
+    other members
+    """
+    _write_archive(tmp_path / 'a.zip', ['00000001', '00000002'])
+    (tmp_path / 'Prod223_0001_00000003_20201231.html').write_bytes(b'<html>00000003</html>')
+
+    members = list(iter_archive_members([str(tmp_path)]))
+
+    assert [contents for _, contents in members] == [b'<html>00000003</html>', b'<html>00000001</html>',
+                                                     b'<html>00000002</html>']
+
+
+def test_archive_index(tmp_path):
+    """test ArchiveIndex
+
+    Expected to index archives incrementally, only reindexing new or changed archives, and yield the members for a
+    set of registration numbers along with their UUIDs
+    """
+    archives = tmp_path / 'archives'
+    archives.mkdir()
+    _write_archive(archives / 'a.zip', ['00000001', '00000002'])
+
+    with ArchiveIndex(str(tmp_path / 'index.sqlite')) as index:
+        assert index.update([str(archives)]) == 1
+        assert index.update([str(archives)]) == 0
+        assert len(index) == 2
+
+        _write_archive(archives / 'b.zip', ['00000003', '00000004'], period_end='20211231')
+        assert index.update([str(archives)]) == 1
+        assert len(index) == 4
+
+        members = list(index.iter_members(['00000002', '00000004', '12345678']))
+
+    assert [(unique_id, contents) for unique_id, _, contents in members] == [
+        (create_unique_id('Prod223_0001_00000002_20201231.html'), b'<html>00000002</html>'),
+        (create_unique_id('Prod223_0001_00000004_20211231.html'), b'<html>00000004</html>'),
+    ]
+    assert os.path.basename(members[1][1]) == 'Prod223_0001_00000004_20211231.html'
+
+
+def test_archive_index_missing_archive(tmp_path, caplog):
+    """test ArchiveIndex with an indexed archive which has been deleted
+
+    Expected to skip the missing archive with a warning when yielding members, and drop its entries on the next update
+    """
+    caplog.set_level(logging.WARNING)
+    archives = tmp_path / 'archives'
+    archives.mkdir()
+    _write_archive(archives / 'a.zip', ['00000001'])
+    _write_archive(archives / 'b.zip', ['00000002'])
+
+    with ArchiveIndex(str(tmp_path / 'index.sqlite')) as index:
+        index.update([str(archives)])
+        os.remove(archives / 'a.zip')
+
+        members = list(index.iter_members(['00000001', '00000002']))
+        assert [contents for _, _, contents in members] == [b'<html>00000002</html>']
+        assert 'Skipping missing archive' in caplog.text
+
+        assert index.update([str(archives)]) == 0
+        assert len(index) == 1
+        assert index.find(['00000001']) == []
@@ -0,0 +1,193 @@
+"""unit tests for digiaccounts_batch functions"""
+
+import logging
+
+import pytest
+
+from digiaccounts.digiaccounts_io import ThreadSafeHttpCache, XbrlParserDA
+from digiaccounts.digiaccounts_cache import ResultCache
+from digiaccounts.digiaccounts_triage import Quarantine
+from digiaccounts.digiaccounts_taxonomy import get_schema_ref
+from digiaccounts.digiaccounts_batch import (
+    DocumentWorker,
+    WorkerLane,
+    extract_account_information,
+    extract_accounts_threaded,
+    iter_account_information,
+    iter_account_information_budgeted
+)
+
+
+def test_extract_accounts_threaded(yield_sources):
+    """test extract_accounts_threaded function
+
+    Expected to return the same results as sequential extraction, in source order, with every thread sharing one parsed
+    taxonomy
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources() + [('Prod223_0001_99999999_20201231.html', b'<html>')]
+
+    results = extract_accounts_threaded(sources, parser, max_workers=8)
+
+    assert results == [extract_account_information(parser, *source) for source in sources[:-1]]
+    assert len(parser.taxonomy_cache) == 1
+
+
+def test_iter_account_information(yield_sources):
+    """test iter_account_information function
+
+    Expected to yield results in source order while only reading max_in_flight sources ahead of the one yielded
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources() + [('Prod223_0001_99999999_20201231.html', b'<html>')]
+    read = []
+
+    def _sources():
+        for source in sources:
+            read.append(source[0])
+            yield source
+
+    results = iter_account_information(_sources(), parser, max_workers=2, max_in_flight=4)
+    first_name, first_result = next(results)
+    assert first_name == sources[0][0]
+    assert len(read) == 4
+
+    rest = list(results)
+    assert [name for name, _ in rest] == [name for name, _ in sources[1:]]
+    assert rest[-1][1] is None
+    assert [first_result] + [result for _, result in rest[:-1]] == extract_accounts_threaded(sources, parser)
+
+
+def test_iter_account_information_quarantine(yield_sources):
+    """test iter_account_information function with a quarantine
+
+    Expected to yield None for a source failing prevalidation without parsing it, and record it in the quarantine
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources()[:1] + [('Prod223_0001_99999999_20201231.html', b'<html>')]
+    quarantine = Quarantine()
+
+    results = list(iter_account_information(sources, parser, max_workers=2, quarantine=quarantine))
+
+    assert results[0][1] is not None
+    assert results[1] == ('Prod223_0001_99999999_20201231.html', None)
+    assert quarantine.filings == [('Prod223_0001_99999999_20201231.html', 'no_ix_namespace')]
+
+
+def test_iter_account_information_budgeted(yield_sources, caplog):
+    """test iter_account_information_budgeted function
+
+    Expected to extract documents over the byte budget in the slow lane, and to kill a fast lane worker which overruns
+    the time budget and retry its document in the slow lane
+    """
+    caplog.set_level(logging.INFO)
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources(4)
+    sources[1] = (sources[1][0], sources[1][1] + b' ' * 1024 * 1024)
+    expected = {name: extract_account_information(parser, name, contents) for name, contents in sources}
+
+    results = dict(iter_account_information_budgeted(
+        sources, './test_cache', max_workers=2, max_bytes=1024 * 1024, timeout=60, slow_workers=1, slow_timeout=60
+    ))
+    assert results == expected
+    assert "Routing 'Prod223_0001_00000001_20201231.html' to the slow lane" in caplog.text
+
+    caplog.clear()
+    results = dict(iter_account_information_budgeted(
+        sources[:2], './test_cache', max_workers=1, timeout=0, slow_workers=1, slow_timeout=60
+    ))
+    assert results == {name: expected[name] for name, _ in sources[:2]}
+    assert caplog.text.count('Routing to the slow lane') == 2
+
+
+def test_iter_account_information_profiled(yield_sources):
+    """test iter_account_information and iter_account_information_budgeted functions with profiled extraction
+
+    Expected to yield the same results through the built-in profile of the example files' producer as the generic
+    extraction
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources(2)
+    expected = list(iter_account_information(sources, parser))
+
+    assert list(iter_account_information(sources, parser, profiled=True)) == expected
+    assert sorted(iter_account_information_budgeted(sources, './test_cache', max_workers=1, slow_workers=1,
+                                                    profiled=True)) == sorted(expected)
+
+
+def test_iter_account_information_budgeted_timeout(yield_sources):
+    """test iter_account_information_budgeted function
+
+    Expected to give up on documents which overrun the slow lane budget
+    """
+    sources = yield_sources(2)
+
+    results = list(iter_account_information_budgeted(
+        sources, './test_cache', max_workers=1, max_bytes=0, slow_workers=1, slow_timeout=0
+    ))
+
+    assert sorted(results) == [(name, None) for name, _ in sources]
+
+
+def test_document_worker_ready(yield_sources):
+    """test DocumentWorker.wait_ready and DocumentWorker.extract
+
+    Expected to become ready once its taxonomy is preloaded, after which a document is extracted within a budget
+    which a cold worker could not meet
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    name, contents = yield_sources(1)[0]
+    worker = DocumentWorker('./test_cache', schema_urls=[get_schema_ref(contents)])
+    try:
+        assert worker.wait_ready()
+        assert worker.extract(name, contents, timeout=5) == extract_account_information(parser, name, contents)
+    finally:
+        worker.close()
+
+
+def test_worker_lane_dead_worker(yield_sources):
+    """test WorkerLane with a worker which has died
+
+    Expected to reap the dead worker's process and close its connection before dropping it
+    """
+    name, contents = yield_sources(1)[0]
+    lane = WorkerLane('./test_cache', max_workers=1, timeout=60)
+    try:
+        assert lane.submit(name, contents).result() is not None
+        worker = lane._workers[0]
+        worker._process.kill()
+        worker._process.join()
+
+        with pytest.raises((EOFError, OSError)):
+            lane.submit(name, contents).result()
+        assert worker._process.exitcode is not None
+        assert worker._connection.closed
+        assert lane.replaced == 1 and not lane._workers
+    finally:
+        lane.close()
+
+
+def test_iter_account_information_result_cache(yield_sources, tmp_path, monkeypatch):
+    """test iter_account_information and iter_account_information_budgeted functions with a result cache
+
+    Expected to store the results of a first run, and to serve a second run in either mode from the cache without
+    parsing or sending documents to a worker
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources(2)
+    expected = [(name, extract_account_information(parser, name, contents)) for name, contents in sources]
+
+    with ResultCache(str(tmp_path / 'results.sqlite')) as result_cache:
+        assert list(iter_account_information(sources, parser, result_cache=result_cache)) == expected
+        assert len(result_cache) == len(sources)
+
+        def _parse(*args, **kwargs):
+            raise AssertionError('document parsed despite a cached result')
+
+        def _submit(*args, **kwargs):
+            raise AssertionError('document sent to a worker despite a cached result')
+
+        monkeypatch.setattr(parser, 'parse_string_instance', _parse)
+        monkeypatch.setattr(WorkerLane, 'submit', _submit)
+        assert list(iter_account_information(sources, parser, result_cache=result_cache)) == expected
+        assert sorted(iter_account_information_budgeted(sources, './test_cache', result_cache=result_cache)) == expected
@@ -0,0 +1,97 @@
+"""unit tests for digiaccounts_bench functions"""
+
+import time
+import zipfile
+from os import path
+
+from digiaccounts.digiaccounts_io import ThreadSafeHttpCache, XbrlParserDA
+from digiaccounts.digiaccounts_bench import (
+    PeakRssSampler,
+    format_benchmarks,
+    generate_sources,
+    get_current_rss,
+    run_benchmarks
+)
+from digiaccounts.digiaccounts_cli import main
+
+
+def test_run_benchmarks(yield_sources):
+    """test run_benchmarks function
+
+    Expected to ingest every document at each worker count and report ordered latency percentiles
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = generate_sources([contents for _, contents in yield_sources(2)], 10)
+
+    results = run_benchmarks(lambda: sources, parser, worker_counts=(1, 2))
+
+    assert [result['workers'] for result in results] == [1, 2]
+    assert all(result['documents'] == 10 and result['failures'] == 0 for result in results)
+    assert all(result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] for result in results)
+    assert all(result['docs_per_second'] > 0 and result['cpu_percent'] > 0 for result in results)
+    assert len(format_benchmarks(results).splitlines()) == 3
+    assert all(result['peak_rss_mb'] > 0 for result in results)
+
+
+def test_run_benchmark_times_reading(yield_sources):
+    """test run_benchmark function with sources which are slow to read
+
+    Expected to read the sources afresh inside each timed run, counting the reading in the elapsed time and
+    read_seconds, and to report no documents for empty sources
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    sources = yield_sources(4)
+    reads = []
+
+    def _read_sources():
+        reads.append(len(reads))
+        for source in sources:
+            time.sleep(0.05)
+            yield source
+
+    results = run_benchmarks(_read_sources, parser, worker_counts=(1, 2))
+
+    assert len(reads) == 3
+    assert all(result['documents'] == 4 and result['read_seconds'] >= 0.2 for result in results)
+    assert all(result['docs_per_second'] <= 4 / 0.2 for result in results)
+    assert run_benchmarks(lambda: [], parser) == []
+
+
+def test_peak_rss_sampler():
+    """test PeakRssSampler
+
+    Expected to report the peak reached within its own block, which falls back once a large allocation is released
+    """
+    with PeakRssSampler(interval=0.001) as first:
+        block = bytearray(200 * 1024 * 1024)
+        block[::4096] = b'x' * len(block[::4096])
+        time.sleep(0.05)
+        del block
+    with PeakRssSampler(interval=0.001) as second:
+        pass
+
+    assert first.peak >= get_current_rss() + 100 * 1024 * 1024
+    assert second.peak < first.peak - 100 * 1024 * 1024
+
+
+def test_bench_command(tmp_path, capsys):
+    """test bench command with generated documents and an archive
+
+    Expected to print one line per worker count, and fail when there is nothing to benchmark
+    """
+    template = path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml')
+
+    status = main([
+        'bench', '--template', template, '--count', '4', '--cache-dir', './test_cache', '--workers', '1', '2'
+    ])
+
+    assert status == 0
+    assert len(capsys.readouterr().out.splitlines()) == 3
+
+    archive = tmp_path / 'accounts.zip'
+    with zipfile.ZipFile(archive, 'w') as f:
+        f.write(template, 'Prod223_0001_00000001_20201231.html')
+
+    assert main(['bench', str(archive), '--cache-dir', './test_cache', '--workers', '1']) == 0
+    assert capsys.readouterr().out.splitlines()[1].split('\t')[-1] == '0'
+    assert main(['bench', str(tmp_path / 'missing'), '--cache-dir', './test_cache']) == 1
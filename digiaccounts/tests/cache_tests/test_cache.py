@@ -0,0 +1,105 @@
+"""unit tests for digiaccounts_cache functions"""
+
+from os import path
+from datetime import datetime
+
+from digiaccounts.digiaccounts_cache import ResultCache, get_cached_account_information, get_filing_hash
+
+
+class _CountingParser:
+    """parser double counting how many filings were handed to it for parsing"""
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.calls = 0
+
+    def parse_string_instance(self, string_instance):
+        self.calls += 1
+        return self.parser.parse_string_instance(string_instance)
+
+
+def test_get_filing_hash():
+    """test get_filing_hash function
+
+    Expected to return identical hashes for identical str and bytes contents, and different hashes otherwise
+    """
+    assert get_filing_hash('<html></html>') == get_filing_hash(b'<html></html>')
+    assert get_filing_hash('<html></html>') != get_filing_hash('<html> </html>')
+
+
+def test_result_cache_roundtrip(tmp_path):
+    """test ResultCache put/get
+
+    Expected to return the stored result with datetimes restored and the per-call keys removed, and to miss for a
+    different spec version
+    """
+    account_information = {
+        '_id': 'abc',
+        'filing_date': datetime(2021, 1, 1),
+        'registration_number': '0000000000',
+        'period_closing_current': datetime(2020, 12, 31),
+        'turnover_value_closing_current': 20000000.0,
+        'dormant_state': False,
+        'registered_office_post_code': None,
+    }
+    db_path = str(tmp_path / 'results.sqlite')
+    with ResultCache(db_path) as cache:
+        cache.put('hash', account_information)
+        assert len(cache) == 1
+        result = cache.get('hash')
+    assert result == {k: v for k, v in account_information.items() if k not in ('_id', 'filing_date')}
+
+    with ResultCache(db_path, spec_version=-1) as cache:
+        assert cache.get('hash') is None
+
+
+def test_result_cache_eviction(tmp_path):
+    """test ResultCache size based eviction
+
+    Expected to evict the least recently used entries once max_bytes is exceeded
+    """
+    with ResultCache(str(tmp_path / 'results.sqlite'), max_bytes=150) as cache:
+        cache.put('first', {'registration_number': '1' * 40})
+        cache.put('second', {'registration_number': '2' * 40})
+        assert cache.get('first') is not None
+        cache.put('third', {'registration_number': '3' * 40})
+
+        assert cache.size() <= 150
+        assert cache.get('second') is None
+        assert cache.get('first') is not None
+        assert cache.get('third') is not None
+
+
+def test_get_cached_account_information(tmp_path, yield_xbrl_parser):
+    """test get_cached_account_information function
+
+    Expected to parse example_happy.xhtml once only, and return the same account information for the cache hit under
+    a new unique ID
+    """
+    parser = _CountingParser(yield_xbrl_parser)
+    with open(path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml'), 'r', encoding='utf-8') as f:
+        filing = f.read()
+
+    with ResultCache(str(tmp_path / 'results.sqlite')) as cache:
+        first = get_cached_account_information('first', '2021-01-01', filing, parser, cache)
+        second = get_cached_account_information('second', '2021-01-01', filing.encode('utf-8'), parser, cache)
+
+    assert parser.calls == 1
+    assert first['registration_number'] == '0000000000'
+    assert second['_id'] == 'second'
+    assert second == first | {'_id': 'second'}
+
+
+def test_get_cached_account_information_invalid_utf8(tmp_path, yield_xbrl_parser):
+    """test get_cached_account_information function with bytes which are not valid UTF-8
+
+    Expected to replace the invalid bytes as the batch engine does, rather than fail to decode the filing
+    """
+    with open(path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml'), 'rb') as f:
+        filing = f.read() + b'<!-- \xff -->'
+
+    with ResultCache(str(tmp_path / 'results.sqlite')) as cache:
+        result = get_cached_account_information('first', None, filing, yield_xbrl_parser, cache)
+
+    assert result['registration_number'] == '0000000000'
+    assert ResultCache._call_keys == ('_id', 'filing_date')
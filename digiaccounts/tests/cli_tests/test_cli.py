@@ -0,0 +1,215 @@
+"""unit tests for digiaccounts_cli functions"""
+
+import io
+import json
+import shutil
+from os import path
+
+import pymongo
+import pytest
+
+from digiaccounts import digiaccounts_cli
+from digiaccounts.digiaccounts_aggregates import AccountAggregates
+from digiaccounts.digiaccounts_bench import InMemoryCollection
+from digiaccounts.digiaccounts_cli import ProgressReporter, main
+from digiaccounts.digiaccounts_columnar import read_columnar
+from digiaccounts import config as cfg
+
+DATA = path.join('digiaccounts', 'tests', 'data')
+
+
+def write_inputs(directory):
+    """copies the example files into a directory under CH archive file names and returns their paths"""
+    paths = []
+    for n, example in enumerate(('example_happy.xhtml', 'example_unhappy.xhtml', 'template.html')):
+        paths.append(path.join(directory, f'Prod223_0001_{n:08d}_20201231.html'))
+        shutil.copy(path.join(DATA, example), paths[-1])
+    return paths
+
+
+def test_ingest_jsonl(tmp_path, capsys):
+    """test ingest command with JSON lines output
+
+    Expected to extract every input listed directly or in a file list, skip the file which cannot be parsed, and report
+    the failure on the progress line
+    """
+    happy, unhappy, template = write_inputs(str(tmp_path))
+    file_list = tmp_path / 'files.txt'
+    file_list.write_text(f'# inputs\n{unhappy}\n\n{template}\n')
+    output = tmp_path / 'accounts.jsonl'
+
+    status = main([
+        'ingest', happy, '--file-list', str(file_list), '--cache-dir', './test_cache',
+        '--output', 'jsonl', '--destination', str(output), '--batch-size', '2'
+    ])
+    documents = [json.loads(line) for line in output.read_text().splitlines()]
+
+    assert status == 0
+    assert len(documents) == 2
+    assert documents[0][cfg.MONGO_KEY_END_DATE] == {'$date': '2020-12-31T00:00:00'}
+    assert '3 docs, 1 failed' in capsys.readouterr().err
+
+
+def test_ingest_result_cache(tmp_path):
+    """test ingest command with a result cache
+
+    Expected to store the extracted results, and write the same documents when they are served from the cache
+    """
+    happy = write_inputs(str(tmp_path))[0]
+    outputs = [tmp_path / 'first.jsonl', tmp_path / 'second.jsonl']
+
+    for output in outputs:
+        main(['ingest', happy, '--cache-dir', './test_cache', '--output', 'jsonl', '--destination', str(output),
+              '--result-cache', str(tmp_path / 'results.sqlite'), '--quiet'])
+
+    assert path.getsize(tmp_path / 'results.sqlite') > 0
+    assert outputs[0].read_text() == outputs[1].read_text() != ''
+
+
+def test_ingest_aggregates_reingest(tmp_path):
+    """test ingest command with aggregates, ingesting the same files again
+
+    Expected to count each account once, whether it is re-extracted or served from the result cache
+    """
+    inputs = write_inputs(str(tmp_path))
+    aggregates = str(tmp_path / 'aggregates.json')
+    arguments = ['ingest', *inputs, '--cache-dir', './test_cache', '--output', 'jsonl', '--aggregates', aggregates,
+                 '--quiet']
+    result_cache = ['--result-cache', str(tmp_path / 'results.sqlite')]
+    totals = []
+
+    for run, flags in enumerate(([], [], result_cache, result_cache)):
+        main(arguments + ['--destination', str(tmp_path / f'accounts{run}.jsonl'), *flags])
+        totals.append(sum(row['accounts'] for row in AccountAggregates.load(aggregates).rows()))
+
+    assert totals == [2, 2, 2, 2]
+
+
+def test_ingest_profiled(tmp_path):
+    """test ingest command with profiled extraction
+
+    Expected to write the same documents as the generic extraction
+    """
+    inputs = write_inputs(str(tmp_path))
+    outputs = [tmp_path / 'generic.jsonl', tmp_path / 'profiled.jsonl']
+
+    for output, flags in zip(outputs, ([], ['--profiled'])):
+        main(['ingest', *inputs, '--cache-dir', './test_cache', '--output', 'jsonl', '--destination', str(output),
+              '--quiet', *flags])
+
+    assert outputs[0].read_text() == outputs[1].read_text() != ''
+
+
+def test_ingest_unsupported_arguments(tmp_path, capsys):
+    """test ingest command with arguments which are not supported together
+
+    Expected to exit with a usage error, rather than write an empty replay corpus or profile, for --capture-slow and
+    --profile in budgeted mode
+    """
+    happy = write_inputs(str(tmp_path))[0]
+    arguments = ['ingest', happy, '--cache-dir', './test_cache', '--output', 'jsonl',
+                 '--destination', str(tmp_path / 'accounts.jsonl'), '--document-timeout', '60']
+
+    for flag, value in (('--capture-slow', str(tmp_path / 'corpus')), ('--profile', str(tmp_path / 'ingest'))):
+        with pytest.raises(SystemExit) as exc_info:
+            main(arguments + [flag, value])
+
+        assert exc_info.value.code == 2
+        assert f'{flag} is not supported with --document-timeout' in capsys.readouterr().err
+    assert not (tmp_path / 'accounts.jsonl').exists()
+
+
+def test_ingest_columnar(tmp_path):
+    """test ingest command with columnar output in budgeted mode
+
+    Expected to write one row per extracted document
+    """
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    write_inputs(str(inputs))
+
+    main([
+        'ingest', str(inputs), '--cache-dir', './test_cache', '--output', 'columnar',
+        '--destination', str(tmp_path / 'table'), '--quiet', '--document-timeout', '60'
+    ])
+    table = read_columnar(str(tmp_path / 'table'))
+
+    assert len(table['_id']) == 2
+    assert table[cfg.MONGO_KEY_ENTITY_REGISTRATION].tolist() == ['0000000000', '0000000000']
+
+
+def test_ingest_mongo(tmp_path, monkeypatch, yield_update_one):
+    """test ingest command with MongoDB output
+
+    Expected to only insert new documents by default, leaving stored documents unchanged, and to overwrite their
+    changed fields with --update. Documents are only prevalidated when a quarantine file is given
+    """
+    collection = InMemoryCollection()
+
+    class _MongoClient:
+        def __init__(self, uri):
+            pass
+
+        def __getitem__(self, database):
+            return {'accounts': collection}
+
+        def close(self):
+            pass
+
+    def _quarantine():
+        raise AssertionError('quarantine created without --quarantine')
+
+    monkeypatch.setattr(pymongo, 'MongoClient', _MongoClient)
+    monkeypatch.setattr(digiaccounts_cli, 'Quarantine', _quarantine)
+    happy = write_inputs(str(tmp_path))[0]
+    arguments = ['ingest', happy, '--cache-dir', './test_cache', '--output', 'mongo', '--destination', 'mongodb://',
+                 '--database', 'db', '--collection', 'accounts', '--quiet']
+
+    main(arguments)
+    unique_id, = collection.documents
+    collection.documents[unique_id][cfg.MONGO_KEY_AVERAGE_EMPLOYEES] = -1
+    main(arguments)
+    assert collection.documents[unique_id][cfg.MONGO_KEY_AVERAGE_EMPLOYEES] == -1
+
+    main(arguments + ['--update'])
+    assert collection.documents[unique_id][cfg.MONGO_KEY_AVERAGE_EMPLOYEES] != -1
+    assert cfg.MONGO_KEY_LAST_UPDATED in collection.documents[unique_id]
+
+
+def test_ingest_progress_per_document(tmp_path, monkeypatch):
+    """test ingest command progress reporting
+
+    Expected to count each document and failure as its result arrives, rather than once per batch written
+    """
+    updates = []
+
+    class _ProgressReporter(ProgressReporter):
+        def update(self, documents, nbytes, failures):
+            updates.append((documents, failures))
+            super().update(documents, nbytes, failures)
+
+    monkeypatch.setattr(digiaccounts_cli, 'ProgressReporter', _ProgressReporter)
+    inputs = write_inputs(str(tmp_path))
+
+    main(['ingest', *inputs, '--cache-dir', './test_cache', '--output', 'jsonl',
+          '--destination', str(tmp_path / 'accounts.jsonl'), '--batch-size', '10', '--workers', '1', '--quiet'])
+
+    assert updates == [(1, 0), (1, 0), (1, 1)]
+
+
+def test_progress_reporter():
+    """test ProgressReporter class
+
+    Expected to keep running totals, only rewrite the line once per interval and end the final line with a newline
+    """
+    stream = io.StringIO()
+    progress = ProgressReporter(stream=stream, interval=60)
+
+    progress.update(10, 2_000_000, 1)
+    progress.update(5, 1_000_000, 0)
+    progress.close()
+
+    lines = stream.getvalue().split('\r')[1:]
+    assert len(lines) == 2
+    assert lines[-1].startswith('15 docs, 1 failed | ')
+    assert lines[-1].endswith(' MB/s\n')
@@ -0,0 +1,71 @@
+"""unit tests for digiaccounts_columnar functions"""
+
+import glob
+from os import path
+from datetime import date
+
+import numpy as np
+
+from digiaccounts.digiaccounts_columnar import ColumnarWriter, read_columnar, write_financial_fact_table
+
+
+def test_columnar_writer(tmp_path):
+    """test ColumnarWriter and read_columnar
+
+    Expected to write a part file per chunk and read the table back with missing values masked
+    """
+    schema = {'name': 'U', 'value': 'float64', 'count': 'int64', 'date': 'datetime64[D]'}
+    rows = [
+        {'name': 'a', 'value': 1.5, 'count': 1, 'date': date(2020, 12, 31)},
+        {'name': 'bb', 'value': None, 'count': 2},
+        {'name': None, 'value': 3.0, 'count': None, 'date': date(2021, 12, 31)},
+    ]
+    with ColumnarWriter(str(tmp_path), schema, chunk_rows=2) as writer:
+        writer.extend(rows)
+
+    table = read_columnar(str(tmp_path))
+
+    assert len(glob.glob(path.join(str(tmp_path), 'part-*.npz'))) == 2
+    assert table['name'].tolist() == ['a', 'bb', None]
+    assert table['value'].tolist() == [1.5, None, 3.0]
+    assert table['count'].tolist() == [1, 2, None]
+    assert table['date'][0] == np.datetime64('2020-12-31')
+    assert table['date'].mask.tolist() == [False, True, False]
+
+
+def test_read_columnar_closes_parts(tmp_path, monkeypatch):
+    """test read_columnar closing its part files
+
+    Expected to close every part file it opens, and read only the columns asked for
+    """
+    with ColumnarWriter(str(tmp_path), {'name': 'U', 'value': 'float64'}, chunk_rows=1) as writer:
+        writer.extend([{'name': 'a', 'value': 1.0}, {'name': 'b', 'value': None}])
+    opened = []
+    load = np.load
+
+    def _load(*args, **kwargs):
+        opened.append(load(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(np, 'load', _load)
+    table = read_columnar(str(tmp_path), columns=['value'])
+
+    assert len(opened) == 2
+    assert all(part.zip is None for part in opened)
+    assert list(table) == ['value']
+    assert table['value'].tolist() == [1.0, None]
+
+
+def test_write_financial_fact_table(tmp_path, yield_xbrl_instance):
+    """test write_financial_fact_table function
+
+    Expected to stream the GBP facts of both example files into one table, keyed by document ID
+    """
+    documents = [('happy', yield_xbrl_instance()), ('unhappy', yield_xbrl_instance(sad=True))]
+
+    rows_written = write_financial_fact_table(documents, str(tmp_path), chunk_rows=10)
+    table = read_columnar(str(tmp_path))
+
+    assert rows_written == len(table['_id'])
+    assert (table['_id'] == 'happy').sum() == 16
+    assert not table['value'].mask.any()
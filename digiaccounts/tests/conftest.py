@@ -1,11 +1,17 @@
 """contains common root pytest fixtures"""
 
+import threading
 from os import path
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pymongo
 import pytest
 
 from xbrl.cache import HttpCache
 from xbrl.instance import XbrlParser
 
+from digiaccounts.digiaccounts_io import XbrlParserDA
+
 
 @pytest.fixture(name='yield_xbrl_instance', scope='session')
 def fixture_yield_xbrl_instance():
@@ -20,3 +26,70 @@ def fixture_yield_xbrl_instance():
             schema = path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml')
         return parser.parse_instance(schema)
     yield _path_select
+
+
+@pytest.fixture(name='yield_xbrl_parser', scope='session')
+def fixture_yield_xbrl_parser():
+    """fixture for generating an XbrlParserDA for parsing iXBRL files held in memory"""
+    cache = HttpCache('./test_cache')
+    yield XbrlParserDA(cache)
+
+
+class InMemoryUpdateOne:
+    """stand-in for pymongo.UpdateOne taking the same documented arguments and holding them as public attributes, so
+    that InMemoryCollection.bulk_write can apply it"""
+
+    def __init__(self, filter, update, upsert=False):
+        self.filter = filter
+        self.update = update
+        self.upsert = upsert
+
+
+@pytest.fixture(name='yield_update_one')
+def fixture_yield_update_one(monkeypatch):
+    """fixture patching pymongo.UpdateOne with InMemoryUpdateOne, so bulk writes can be sent to an InMemoryCollection"""
+    monkeypatch.setattr(pymongo, 'UpdateOne', InMemoryUpdateOne)
+    yield InMemoryUpdateOne
+
+
+class _RecordingHandler(SimpleHTTPRequestHandler):
+    """quiet file request handler which records the paths it is asked for"""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name='yield_http_server')
+def fixture_yield_http_server():
+    """fixture for serving directories from local HTTP servers, standing in for remote taxonomy hosts. Yields a
+    function taking a directory and returning the server base URL and the list of requested paths"""
+    servers = []
+
+    def _serve(directory):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_RecordingHandler, directory=str(directory)))
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}', server.requests
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(name='yield_sources', scope='session')
+def fixture_yield_sources():
+    """fixture for generating CH archive style sources of example_happy.xhtml and example_unhappy.xhtml"""
+    data = path.join('digiaccounts', 'tests', 'data')
+    with open(path.join(data, 'example_happy.xhtml'), 'rb') as f:
+        happy = f.read()
+    with open(path.join(data, 'example_unhappy.xhtml'), 'rb') as f:
+        unhappy = f.read()
+
+    def _sources(count=20):
+        return [(f'Prod223_0001_{n:08d}_20201231.html', unhappy if n % 2 else happy) for n in range(count)]
+    yield _sources
@@ -17,7 +17,8 @@ from digiaccounts.digiaccounts_data import (
     get_investment_assets,
     get_biological_assets,
     get_plant_equipment,
-    get_entity_equity
+    get_entity_equity,
+    get_financial_fact_rows
 )
 
 # DONE: get_single_fact
@@ -41,6 +42,7 @@ from digiaccounts.digiaccounts_data import (
 # DONE: get_biological_assets
 # DONE: get_plant_equipment
 # DONE: get_entity_equity
+# DONE: get_financial_fact_rows
 
 
 def test_get_single_fact(yield_xbrl_instance):
@@ -201,3 +203,26 @@ def test_get_entity_equity(yield_xbrl_instance):
     data_truth = (610000000.0, 620000000.0)
 
     assert get_entity_equity(inst) == data_truth
+
+
+def test_get_financial_fact_rows(yield_xbrl_instance):
+    """test get_financial_fact_rows function
+
+    Expected to return a row for each of the 16 GBP facts in example_happy.xhtml, with dimension signatures keeping the
+    PropertyPlantEquipment vehicle facts apart from the totals
+    """
+    inst = yield_xbrl_instance()
+    rows = get_financial_fact_rows(inst)
+    ppe_rows = [(r['dimensions'], r['date'].isoformat(), r['value']) for r in rows
+                if r['concept'] == 'PropertyPlantEquipment']
+
+    assert len(rows) == 16
+    assert all(r['occurrence'] == 1 for r in rows)
+    assert ppe_rows == [
+        ('PropertyPlantEquipmentClassesDimension=Vehicles', '2019-12-31', 511.0),
+        ('PropertyPlantEquipmentClassesDimension=Vehicles', '2020-12-31', 521.0),
+        ('', '2019-12-31', 510000000.0),
+        ('', '2020-12-31', 520000000.0),
+    ]
+    assert [r['start_date'].isoformat() for r in rows if r['concept'] == 'TurnoverRevenue'] == ['2019-01-01',
+                                                                                                '2020-01-01']
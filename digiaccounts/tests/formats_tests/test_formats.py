@@ -0,0 +1,90 @@
+"""unit tests for digiaccounts_formats functions"""
+
+from os import path
+from itertools import product
+import xml.etree.ElementTree as ET
+
+from xbrl.helper.xml_parser import parse_file
+from xbrl.instance import _extract_non_fraction_value
+
+from digiaccounts.digiaccounts_formats import (
+    TRANSFORMATION_REGISTRY_1,
+    TRANSFORMATION_REGISTRY_2,
+    TRANSFORMATION_REGISTRY_3,
+    TRANSFORMATION_REGISTRY_4,
+    extract_non_fraction_value
+)
+
+IX_NAMESPACE = 'http://www.xbrl.org/2013/inlineXBRL'
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+
+FORMATS = [None, '', 'ixt:unknown', 'nodefined:numdotdecimal', 'numdotdecimal'] + [
+    f'ixt:{code}' for code in (
+        'numcomma', 'numcommadot', 'numdash', 'numdotcomma', 'numspacecomma', 'numspacedot',
+        'numcommadecimal', 'numdotdecimal', 'zerodash', 'nocontent', 'numunitdecimal',
+        'num-comma-decimal', 'num-dot-decimal', 'fixed-zero', 'fixed-empty',
+    )
+]
+TEXTS = [
+    '0', '12', '1,234', '1,234,567', ' 1,234 ', '1,234.56', '1.234,56', '1 234 567', '(1,234)', '-', '', '12.3.4',
+    '1.5e3', '١٢', '²', 'abc', '1,2,3',
+]
+
+
+def create_element(fact_format, text, scale, sign, registry, split=False, nil=False):
+    """creates an ix:nonFraction element with the 'ns_map' attribute added by parse_file"""
+    attrib = {'ns_map': {'ix': IX_NAMESPACE, 'ixt': registry, 'xsi': XSI_NAMESPACE}}
+    for name, value in (('format', fact_format), ('scale', scale), ('sign', sign)):
+        if value is not None:
+            attrib[name] = value
+    if nil:
+        attrib[f'{{{XSI_NAMESPACE}}}nil'] = 'true'
+    elem = ET.Element(f'{{{IX_NAMESPACE}}}nonFraction', attrib)
+    if split and len(text) > 1:
+        elem.text = text[:1]
+        child = ET.SubElement(elem, 'span')
+        child.text, child.tail = text[1:-1], text[-1:]
+    else:
+        elem.text = text
+    return elem
+
+
+def get_outcome(function, elem):
+    """returns the repr of the value returned by a function, or the type of the exception it raised"""
+    try:
+        return repr(function(elem))
+    except Exception as _e:
+        return type(_e)
+
+
+def test_extract_non_fraction_value_corpus():
+    """test extract_non_fraction_value function on a generated corpus
+
+    Expected to return the same value as _extract_non_fraction_value, or raise the same exception, for every
+    combination of registry, format, text, scale, sign, child elements and nil
+    """
+    registries = (TRANSFORMATION_REGISTRY_1, TRANSFORMATION_REGISTRY_2, TRANSFORMATION_REGISTRY_3,
+                  TRANSFORMATION_REGISTRY_4)
+    corpus = product(FORMATS, TEXTS, (None, '0', '3', '-2', '6', '20'), (None, '-'), registries, (False, True))
+    count = 0
+    for fact_format, text, scale, sign, registry, split in corpus:
+        elem = create_element(fact_format, text, scale, sign, registry, split)
+        assert get_outcome(extract_non_fraction_value, elem) == get_outcome(_extract_non_fraction_value, elem), (
+            fact_format, text, scale, sign, registry, split
+        )
+        count += 1
+    assert count > 10000
+    assert extract_non_fraction_value(create_element('ixt:numdotdecimal', '1', None, None, registry, nil=True)) is None
+
+
+def test_extract_non_fraction_value_examples():
+    """test extract_non_fraction_value function on the example files
+
+    Expected to return the same value as _extract_non_fraction_value for every ix:nonFraction element
+    """
+    for example in ('example_happy.xhtml', 'example_unhappy.xhtml'):
+        root = parse_file(path.join('digiaccounts', 'tests', 'data', example))
+        elements = root.findall('.//ix:nonFraction', root.getroot().attrib['ns_map'])
+        assert elements
+        for elem in elements:
+            assert get_outcome(extract_non_fraction_value, elem) == get_outcome(_extract_non_fraction_value, elem)
@@ -0,0 +1,66 @@
+"""import time tests for the digiaccounts package"""
+
+import sys
+import json
+import subprocess
+import pytest
+
+# cold start budget for importing the package and computing a unique ID, well above the few milliseconds it takes on a
+# laptop so that only a regression to eagerly importing the parser trips it
+IMPORT_TIME_BUDGET = 0.1
+
+HEAVY_MODULES = ('xbrl', 'pymongo', 'numpy', 'dateutil', 'xml.etree.ElementTree')
+
+IMPORT_SCRIPT = f'''
+import sys, json, time
+start = time.perf_counter()
+from digiaccounts import create_unique_id
+create_unique_id('Prod223_0001_00000001_20201231.html')
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+'''
+
+
+def run_import_script():
+    """runs IMPORT_SCRIPT in a fresh interpreter and returns its import time and the heavy modules it loaded"""
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], capture_output=True, check=True, text=True)
+    return json.loads(output.stdout)
+
+
+def test_import_does_not_load_heavy_modules():
+    """test lazy package imports
+
+    Expected to compute a unique ID without loading the XBRL parser or any of its heavy dependencies
+    """
+    assert run_import_script()['loaded'] == []
+
+
+def test_import_time_budget():
+    """test cold start import time
+
+    Expected to import the package and compute a unique ID within IMPORT_TIME_BUDGET seconds
+    """
+    # best of three runs, to discount a cold disk cache on the first run
+    elapsed = min(run_import_script()['elapsed'] for _ in range(3))
+    assert elapsed < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize('name', ['XbrlParserDA', 'get_entity_registration', 'ColumnarWriter', 'triage_ixbrl'])
+def test_lazy_export(name):
+    """test package __getattr__ function
+
+    Expected to list and resolve exported names from their defining modules on first access
+    """
+    import digiaccounts
+    assert name in dir(digiaccounts)
+    assert callable(getattr(digiaccounts, name))
+
+
+def test_missing_export():
+    """test package __getattr__ function
+
+    Expected to raise AttributeError for names which are not exported
+    """
+    import digiaccounts
+    with pytest.raises(AttributeError):
+        digiaccounts.not_an_export
@@ -0,0 +1,65 @@
+"""unit tests for digiaccounts_intern functions"""
+
+from os import path
+
+from digiaccounts.digiaccounts_intern import InternTable
+from digiaccounts.digiaccounts_io import XbrlParserDA, get_account_information_dictionary
+from digiaccounts.digiaccounts_data import get_financial_fact_rows
+from digiaccounts import config as cfg
+
+EXAMPLE_HAPPY = path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml')
+
+
+def test_intern_table():
+    """test InternTable.intern and InternTable.intern_values
+
+    Expected to return one shared object for equal strings, pass None through, and only intern the string values of
+    the keys given
+    """
+    table = InternTable()
+    first = table.intern(''.join(['Property', 'Dimension']))
+    second = table.intern(''.join(['Property', 'Dimension']))
+    dictionary = {'software': ''.join(['Sage', ' 50']), 'count': 5, 'name': ''.join(['Sage', ' 50'])}
+
+    assert first is second
+    assert table.intern(None) is None
+    assert table.intern_values(dictionary, ('software', 'count', 'missing')) is dictionary
+    assert dictionary['software'] is table.intern('Sage 50')
+    assert dictionary['name'] is not dictionary['software']
+    assert len(table) == 2
+    assert 'PropertyDimension' in table
+
+
+def test_parse_string_instance_intern_table(yield_xbrl_parser):
+    """test XbrlParserDA.parse_string_instance with an intern table
+
+    Expected to give the same account information as a parser without one, while the units and fact row strings of
+    two parses of the same filing are shared objects, and the table grows by no per-filing context or unit IDs
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    table = InternTable()
+    parser = XbrlParserDA(yield_xbrl_parser.cache, intern_table=table)
+
+    first = parser.parse_string_instance(contents)
+    second = parser.parse_string_instance(contents)
+    plain = yield_xbrl_parser.parse_string_instance(contents)
+
+    assert get_account_information_dictionary('a', None, first) == get_account_information_dictionary('a', None, plain)
+    size = len(table)
+    renamed = contents.replace('END_2020', 'c0f6a9e2-5d2b-4bfa-9a57-1e2a6d4f8b31').replace('"gbp"', '"u-1e2a6d4f"')
+    assert renamed != contents
+    parser.parse_string_instance(renamed)
+    assert len(table) == size
+    assert not any(context_id in table for context_id in first.context_map)
+    for unit_id, unit in first.unit_map.items():
+        assert getattr(unit, 'unit', None) is getattr(second.unit_map[unit_id], 'unit', None)
+    assert table.intern('iso4217:GBP') is next(iter(first.unit_map.values())).unit
+
+    first_rows = get_financial_fact_rows(first, table)
+    second_rows = get_financial_fact_rows(second, table)
+    assert first_rows == get_financial_fact_rows(plain)
+    assert all(a['dimensions'] is b['dimensions'] and a['concept'] is b['concept']
+               for a, b in zip(first_rows, second_rows))
+    assert any(row['dimensions'] for row in first_rows)
+    assert set(cfg.INTERN_ACCOUNT_KEYS) <= set(get_account_information_dictionary('a', None, first))
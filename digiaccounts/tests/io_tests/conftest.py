@@ -0,0 +1,12 @@
+"""fixtures for digiaccounts_io unit tests"""
+
+import pytest
+
+from digiaccounts.digiaccounts_bench import InMemoryCollection
+
+
+@pytest.fixture(name='yield_collection')
+def fixture_yield_collection(yield_update_one):
+    """fixture for generating an empty in-memory collection, with pymongo.UpdateOne patched to the in-memory operation
+    it takes bulk writes of"""
+    yield InMemoryCollection()
@@ -0,0 +1,218 @@
+"""unit tests for digiaccounts_io functions"""
+
+import threading
+from os import path
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+
+from xbrl.instance import NAME_SPACES
+from xbrl.helper.xml_parser import parse_file
+
+from digiaccounts import digiaccounts_io
+from digiaccounts.digiaccounts_io import (
+    SkippingReader,
+    TaxonomyCache,
+    ThreadSafeHttpCache,
+    XbrlParserDA,
+    get_account_information_dictionary,
+    insert_accounts_in_collection,
+    update_accounts_in_collection
+)
+from digiaccounts.digiaccounts_columnar import MONETARY_KEYS
+from digiaccounts import config as cfg
+
+EXAMPLE_HAPPY = path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml')
+
+
+def test_skipping_reader():
+    """test SkippingReader
+
+    Expected to leave out script elements and base64 payloads while reading the rest of the buffer unchanged, whatever
+    the size of the reads and of the windows searched for payloads
+    """
+    contents = (b'<html><SCRIPT type="a">if (a < b) {}</ script ><img src="data:image/png;base64,iVBORw0KGgo="/>'
+                b'<p>text</p><script></script></html>')
+    expected = b'<html><img src="data:image/png;base64,"/><p>text</p></html>'
+
+    assert SkippingReader(contents).read() == expected
+    reader = SkippingReader(contents)
+    chunks = iter(lambda: reader.read(3), b'')
+    assert b''.join(chunks) == expected
+    for window in (1, 5, 16):
+        reader = SkippingReader(contents, window=window)
+        assert b''.join(iter(lambda: reader.read(4), b'')) == expected
+
+
+def test_parse_file_instance(tmp_path, yield_xbrl_parser):
+    """test XbrlParserDA.parse_file_instance
+
+    Expected to return the same facts as parse_string_instance for example_happy.xhtml, including when the file holds
+    a script element and an embedded image
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    image = '<img src="data:image/png;base64,' + 'A' * 100000 + '"/><script>var x = "<b>";</script>'
+    file_path = tmp_path / 'example.xhtml'
+    file_path.write_text(contents.replace('<body>', '<body>' + image, 1), encoding='utf-8')
+
+    string_facts = [(f.xml_id, f.concept.name, f.value) for f in yield_xbrl_parser.parse_string_instance(contents).facts]
+    file_instance = yield_xbrl_parser.parse_file_instance(str(file_path))
+
+    assert [(f.xml_id, f.concept.name, f.value) for f in file_instance.facts] == string_facts
+    assert file_instance.instance_url == str(file_path)
+
+
+def test_update_accounts_in_collection(yield_collection):
+    """test update_accounts_in_collection function
+
+    Expected to insert new documents, then send only the changed fields of existing documents with a last_updated
+    stamp, unset the fields no longer extracted, and skip unchanged documents, comparing datetimes in UTC and numbers
+    by value
+    """
+    first = {'_id': 'a', 'registration_number': '0000000001', 'turnover_value_closing_current': 1.0,
+             'period_closing_current': datetime(2020, 12, 31, 0, 0, 0, 123456)}
+    second = {'_id': 'b', 'registration_number': '0000000002', 'turnover_value_closing_current': 2.0}
+
+    assert update_accounts_in_collection(yield_collection, [first, second]) == 2
+    yield_collection.documents['a']['period_closing_current'] = datetime(2020, 12, 31, 0, 0, 0, 123000)
+    first_logged = yield_collection.documents['a']['first_logged']
+
+    changed = second | {'turnover_value_closing_current': 3.0, 'average_employees': 5}
+    assert update_accounts_in_collection(yield_collection, [first, changed]) == 1
+
+    update = yield_collection.bulk_writes[-1][0].update['$set']
+    assert set(update) == {'turnover_value_closing_current', 'average_employees', 'last_updated'}
+    assert yield_collection.documents['b']['turnover_value_closing_current'] == 3.0
+    assert yield_collection.documents['a']['first_logged'] == first_logged
+
+    yield_collection.documents['b']['turnover_value_closing_current'] = 3
+    unchanged = changed | {'period_closing_current': datetime(2020, 12, 31, 1, 0, tzinfo=timezone(timedelta(hours=1)))}
+    yield_collection.documents['b']['period_closing_current'] = datetime(2020, 12, 31)
+    assert update_accounts_in_collection(yield_collection, [unchanged]) == 0
+
+    removed = {key: value for key, value in unchanged.items() if key != 'average_employees'}
+    assert update_accounts_in_collection(yield_collection, [removed]) == 1
+    assert yield_collection.bulk_writes[-1][0].update['$unset'] == {'average_employees': ''}
+    assert 'average_employees' not in yield_collection.documents['b']
+    assert yield_collection.documents['b']['first_logged']
+
+
+def test_insert_accounts_in_collection(yield_collection):
+    """test insert_accounts_in_collection function
+
+    Expected to insert new documents in one bulk write, and leave documents which are already stored unchanged
+    """
+    first = {'_id': 'a', 'registration_number': '0000000001', 'turnover_value_closing_current': 1.0}
+
+    assert insert_accounts_in_collection(yield_collection, [first]) == 1
+    assert insert_accounts_in_collection(yield_collection, [first | {'turnover_value_closing_current': 2.0}]) == 1
+    assert insert_accounts_in_collection(yield_collection, []) == 0
+
+    assert len(yield_collection.bulk_writes) == 2
+    assert yield_collection.documents['a']['turnover_value_closing_current'] == 1.0
+    assert cfg.MONGO_KEY_FIRST_LOGGED in yield_collection.documents['a']
+
+
+def test_thread_safe_http_cache(tmp_path, yield_http_server):
+    """test ThreadSafeHttpCache.cache_file
+
+    Expected to download a file requested by many threads at once only once, and return its complete contents to every
+    thread
+    """
+    root = tmp_path / 'www'
+    root.mkdir()
+    (root / 'schema.xsd').write_text('x' * 100000)
+    base_url, requests = yield_http_server(root)
+    cache = ThreadSafeHttpCache(str(tmp_path / 'cache'), delay=0)
+    barrier = threading.Barrier(16)
+
+    def _request():
+        barrier.wait()
+        with open(cache.cache_file(f'{base_url}/schema.xsd'), 'r', encoding='utf-8') as f:
+            return len(f.read())
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        sizes = list(executor.map(lambda _: _request(), range(16)))
+
+    assert sizes == [100000] * 16
+    assert requests == ['/schema.xsd']
+    assert cache.cache_file(f' {base_url}/schema.xsd\n') == cache.cache_file(f'{base_url}/schema.xsd')
+    for i in range(100):
+        (root / f'{i}.xsd').write_text('x')
+        cache.cache_file(f'{base_url}/{i}.xsd')
+    assert len(cache._url_locks) == cfg.HTTP_CACHE_LOCK_STRIPES
+
+
+def test_resolve_context_taxonomies(monkeypatch):
+    """test TaxonomyCache.resolve_context_taxonomies
+
+    Expected to load the taxonomy of every context dimension and member namespace missing from the instance's
+    taxonomy once, while holding the taxonomy cache lock
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        root = parse_file(StringIO(f.read()))
+    ns_map = root.getroot().attrib['ns_map']
+    context_elements = root.find('.//ix:resources', ns_map).findall('xbrli:context', NAME_SPACES)
+    taxonomy_cache = TaxonomyCache()
+    loaded = []
+
+    class _Taxonomy:
+        imports = []
+
+        def get_taxonomy(self, namespace):
+            return next((tax for tax in self.imports if tax == namespace), None)
+
+    def _load_common_taxonomy(cache, namespace, taxonomy):
+        assert taxonomy_cache._lock.locked()
+        loaded.append(namespace)
+        taxonomy.imports.append(namespace)
+        return namespace
+
+    monkeypatch.setattr(digiaccounts_io, '_load_common_taxonomy', _load_common_taxonomy)
+    taxonomy_cache.resolve_context_taxonomies(context_elements, ns_map, _Taxonomy(), None)
+
+    member_tag = '{' + NAME_SPACES['xbrldi'] + '}explicitMember'
+    members = [elem for context in context_elements for elem in context.iter(member_tag)]
+    assert members
+    assert sorted(loaded) == sorted({ns_map[elem.attrib['dimension'].split(':')[0]] for elem in members}
+                                    | {ns_map[elem.text.strip().split(':')[0]] for elem in members})
+
+
+def test_get_account_information_dictionary_postcode(yield_xbrl_parser):
+    """test get_account_information_dictionary postcode parts
+
+    Expected to split the registered office postcode of example_happy.xhtml into its outward, inward, area and district
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        xbrl_instance = yield_xbrl_parser.parse_string_instance(f.read())
+
+    account_information = get_account_information_dictionary('happy', None, xbrl_instance)
+
+    assert account_information[cfg.MONGO_KEY_POSTAL_CODE] == 'AA1 1AA'
+    assert account_information[cfg.MONGO_KEY_POSTCODE_OUTWARD] == 'AA1'
+    assert account_information[cfg.MONGO_KEY_POSTCODE_INWARD] == '1AA'
+    assert account_information[cfg.MONGO_KEY_POSTCODE_AREA] == 'AA'
+    assert account_information[cfg.MONGO_KEY_POSTCODE_DISTRICT] == 'AA1'
+
+
+def test_get_account_information_dictionary_pence(yield_xbrl_parser):
+    """test get_account_information_dictionary with a parser created with pence=True
+
+    Expected to give the same monetary values as a parser in pounds, as exact int pence, and leave other values alone
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    pence_parser = XbrlParserDA(yield_xbrl_parser.cache, pence=True)
+
+    pounds = get_account_information_dictionary('happy', None, yield_xbrl_parser.parse_string_instance(contents))
+    pence = get_account_information_dictionary('happy', None, pence_parser.parse_string_instance(contents))
+
+    assert any(pounds[key] is not None for key in MONETARY_KEYS)
+    for key in MONETARY_KEYS:
+        if pounds[key] is None:
+            assert pence[key] is None
+        else:
+            assert isinstance(pence[key], int)
+            assert pence[key] == round(pounds[key] * 100)
+    assert pence[cfg.MONGO_KEY_AVERAGE_EMPLOYEES] == pounds[cfg.MONGO_KEY_AVERAGE_EMPLOYEES]
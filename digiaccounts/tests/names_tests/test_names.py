@@ -0,0 +1,89 @@
+"""unit tests for digiaccounts_names functions"""
+
+from digiaccounts.digiaccounts_names import NameIndex, normalise_name
+from digiaccounts import config as cfg
+
+
+ACCOUNTS = [
+    {'_id': 'a', cfg.MONGO_KEY_ENTITY_NAME: 'Acme Widgets Limited'},
+    {'_id': 'b', cfg.MONGO_KEY_ENTITY_NAME: 'ACME WIDGET HOLDINGS LTD.'},
+    {'_id': 'c', cfg.MONGO_KEY_ENTITY_NAME: 'Northern Bakery PLC'},
+    {'_id': 'd', cfg.MONGO_KEY_ENTITY_NAME: 'Widgetry (UK) Ltd'},
+    {'_id': 'e'},
+]
+
+
+def test_normalise_name():
+    """test normalise_name function
+
+    Expected to lower case names, drop punctuation and strip trailing company type words
+    """
+    assert normalise_name('Acme Widgets Limited') == 'acme widgets'
+    assert normalise_name('  ACME-WIDGETS (UK) LTD. ') == 'acme widgets'
+    assert normalise_name('A & B Co Limited') == 'a & b'
+    assert normalise_name('Limited') == 'limited'
+    assert normalise_name("J Sainsbury's PLC") == normalise_name('J SAINSBURY\u2019S PLC') == 'j sainsburys'
+
+
+def test_name_index_search():
+    """test NameIndex search
+
+    Expected to rank misspelled and partial names by similarity, skip accounts without a name and replace re-added
+    names
+    """
+    index = NameIndex.build(ACCOUNTS[:3])
+    index.extend(ACCOUNTS[3:])
+
+    assert len(index) == 4
+    results = index.search('acme widgits')
+    assert [unique_id for unique_id, _, _ in results] == ['a', 'b']
+    assert results[0][1] == 'acme widgets'
+    assert results[0][2] > results[1][2]
+    assert index.search('northern bakery', k=1)[0][0] == 'c'
+    assert index.search('zzzz') == []
+    assert index.search('') == []
+
+    index.add('a', 'Southern Bakery Limited')
+    assert len(index) == 4
+    assert [unique_id for unique_id, _, _ in index.search('acme widgets')][:1] == ['b']
+    assert 'a' not in [unique_id for unique_id, _, _ in index.search('acme widgets')]
+    assert sorted(unique_id for unique_id, _, _ in index.search('bakery', min_similarity=0.2)) == ['a', 'c']
+
+
+def test_name_index_save_load(tmp_path):
+    """test NameIndex save and load
+
+    Expected to give the same answers after a round trip through the index file, saved at the path given even without
+    an .npz suffix, and to accept further names
+    """
+    index = NameIndex.build(ACCOUNTS)
+    index.add('a', 'Southern Bakery Limited')
+    index.save(str(tmp_path / 'names'))
+
+    assert [path.name for path in tmp_path.iterdir()] == ['names']
+    loaded = NameIndex.load(str(tmp_path / 'names'))
+    loaded.add('f', 'Acme Widgets')
+
+    assert len(loaded) == 5
+    assert loaded.search('bakery', min_similarity=0.2) == index.search('bakery', min_similarity=0.2)
+    assert [unique_id for unique_id, _, _ in loaded.search('acme widgets')][:2] == ['f', 'b']
+
+
+def test_name_index_partial_search():
+    """test NameIndex search with part of a long name
+
+    Expected to find names containing the query at the default similarity, ranking the closest first, and to find
+    possessive names with or without their apostrophe
+    """
+    index = NameIndex.build([
+        {'_id': 'a', cfg.MONGO_KEY_ENTITY_NAME: 'Tesco Personal Finance Group Limited'},
+        {'_id': 'b', cfg.MONGO_KEY_ENTITY_NAME: 'Tesco Stores Limited'},
+        {'_id': 'c', cfg.MONGO_KEY_ENTITY_NAME: "J Sainsbury's PLC"},
+        {'_id': 'd', cfg.MONGO_KEY_ENTITY_NAME: 'Northern Bakery PLC'},
+    ])
+
+    assert [unique_id for unique_id, _, _ in index.search('tesco')] == ['b', 'a']
+    assert index.search('tesco personal finance', k=1)[0][0] == 'a'
+    assert index.search('sainsburys')[0][:2] == ('c', 'j sainsburys')
+    assert index.search("sainsbury's")[0][0] == 'c'
+    assert [unique_id for unique_id, _, _ in index.search('tesco', containment_weight=0)] == ['b']
@@ -0,0 +1,50 @@
+"""unit tests for digiaccounts_postcodes functions"""
+
+from digiaccounts.digiaccounts_postcodes import PostcodeIndex
+from digiaccounts import config as cfg
+
+
+ACCOUNTS = [
+    {'_id': 'd', cfg.MONGO_KEY_POSTAL_CODE: 'cf14 3uz'},
+    {'_id': 'a', cfg.MONGO_KEY_POSTAL_CODE: 'CF14 4XN'},
+    {'_id': 'c', cfg.MONGO_KEY_POSTAL_CODE: 'CF10 1AA'},
+    {'_id': 'b', cfg.MONGO_KEY_POSTCODE_AREA: 'EC', cfg.MONGO_KEY_POSTCODE_DISTRICT: 'EC1'},
+    {'_id': 'e', cfg.MONGO_KEY_POSTAL_CODE: 'not a postcode'},
+]
+
+
+def test_postcode_index():
+    """test PostcodeIndex class
+
+    Expected to index accounts by area and district from raw or split postcodes, skipping malformed postcodes
+    """
+    index = PostcodeIndex.build(ACCOUNTS[:2])
+    assert index.extend(ACCOUNTS[2:]) == 1
+
+    assert len(index) == 4
+    assert index.districts('cf') == ['CF10', 'CF14']
+    assert index.get_ids('CF14').tolist() == ['a', 'd']
+    assert index.get_ids('CF').tolist() == ['a', 'c', 'd']
+    assert index.get_ids('EC1A').tolist() == ['b']
+    assert index.get_ids('ZZ').tolist() == []
+    assert index.contains('cf', 'c')
+    assert index.contains('CF 14', 'd')
+    assert not index.contains('CF14', 'c')
+    assert not index.contains('CF14', 'e')
+
+
+def test_postcode_index_save_load(tmp_path):
+    """test PostcodeIndex save and load
+
+    Expected to give the same answers after a round trip through the index file, saved at the path given even without
+    an .npz suffix
+    """
+    index = PostcodeIndex.build(ACCOUNTS)
+    index.save(str(tmp_path / 'postcodes'))
+
+    assert [path.name for path in tmp_path.iterdir()] == ['postcodes']
+    loaded = PostcodeIndex.load(str(tmp_path / 'postcodes'))
+
+    assert loaded.districts('CF') == index.districts('CF')
+    assert loaded.get_ids('CF').tolist() == index.get_ids('CF').tolist()
+    assert loaded.contains('EC', 'b')
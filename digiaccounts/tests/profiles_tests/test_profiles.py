@@ -0,0 +1,137 @@
+"""unit tests for digiaccounts_profiles functions"""
+
+import pytest
+
+from digiaccounts import digiaccounts_profiles
+from digiaccounts.digiaccounts_io import get_account_information_dictionary
+from digiaccounts.digiaccounts_profiles import (
+    PROFILE_BUILTINS,
+    ExtractionProfile,
+    ProfileMismatch,
+    check_profile,
+    get_account_information_dictionary_profiled,
+    get_profile,
+    get_software_fingerprint,
+    register_profile,
+    select_profile_facts
+)
+
+
+@pytest.fixture(name='empty_registry')
+def fixture_empty_registry(monkeypatch):
+    """fixture replacing the profile registry with an empty one for the duration of a test"""
+    monkeypatch.setattr(digiaccounts_profiles, 'PROFILE_REGISTRY', {})
+
+
+def test_get_software_fingerprint():
+    """test get_software_fingerprint function
+
+    Expected to return the same fingerprint for different releases of the same software
+    """
+    assert get_software_fingerprint('Acme Accounts v22.3.0.123') == 'acme accounts'
+    assert get_software_fingerprint('ACME Accounts 2021.1') == 'acme accounts'
+    assert get_software_fingerprint('VsCode') == 'vscode'
+
+
+def test_register_profile(yield_xbrl_instance, empty_registry):
+    """test register_profile and get_profile functions
+
+    Expected to register a profile checked against example_happy.xhtml, and refuse a profile which drops a concept
+    """
+    inst = yield_xbrl_instance()
+    profile = ExtractionProfile('vscode')
+    register_profile('VsCode', profile, samples=[inst])
+
+    assert get_profile('VsCode 1.2') is profile
+    with pytest.raises(ValueError):
+        register_profile('VsCode', ExtractionProfile('partial', concepts=('UKCompaniesHouseRegisteredNumber',
+                                                                          'EndDateForPeriodCoveredByReport')),
+                         samples=[inst])
+
+
+def test_check_profile(yield_xbrl_instance):
+    """test check_profile function
+
+    Expected to report no differences for the default profile over both example files
+    """
+    insts = [yield_xbrl_instance(), yield_xbrl_instance(sad=True)]
+
+    assert not check_profile(ExtractionProfile('default'), insts)
+
+
+def test_builtin_profiles(yield_xbrl_instance):
+    """test the profiles of PROFILE_BUILTINS against the example files
+
+    Expected to be registered, to match the context layout of both example files and to report no differences from the
+    generic extraction
+    """
+    insts = [yield_xbrl_instance(), yield_xbrl_instance(sad=True)]
+
+    for software, profile in PROFILE_BUILTINS.items():
+        assert get_profile(software) is profile
+        for inst in insts:
+            profile.select_facts(inst)
+        assert not check_profile(profile, insts)
+
+
+def test_get_account_information_dictionary_profiled(yield_xbrl_instance, empty_registry):
+    """test get_account_information_dictionary_profiled function
+
+    Expected to return the generic extraction of example_happy.xhtml both through a matching profile and through the
+    fallback for a profile whose context layout does not match
+    """
+    inst = yield_xbrl_instance()
+    generic = get_account_information_dictionary('abc', '2021-01-01', inst)
+
+    register_profile('VsCode', ExtractionProfile('vscode'))
+    assert get_account_information_dictionary_profiled('abc', '2021-01-01', inst) == generic
+
+    mismatched = ExtractionProfile('mismatched', context_pattern=r'FY\d+$')
+    with pytest.raises(ProfileMismatch):
+        mismatched.select_facts(inst)
+    register_profile('VsCode', mismatched)
+    assert get_account_information_dictionary_profiled('abc', '2021-01-01', inst) == generic
+
+
+def test_select_profile_facts(yield_xbrl_instance, empty_registry):
+    """test select_profile_facts function and the single pass of get_account_information_dictionary_profiled
+
+    Expected to select the facts of the needed concepts and the production software, and to read the instance's facts
+    only once when extracting through a profile
+    """
+    inst = yield_xbrl_instance()
+    selected, software = select_profile_facts(inst)
+
+    assert software == 'VsCode'
+    assert 0 < len(selected.facts) < len(inst.facts)
+    assert not check_profile(ExtractionProfile('default'), [inst])
+
+    passes = []
+
+    class _Facts(list):
+        def __iter__(self):
+            passes.append(len(self))
+            return super().__iter__()
+
+    generic = get_account_information_dictionary('abc', '2021-01-01', inst)
+    inst.facts = _Facts(inst.facts)
+    register_profile('VsCode', ExtractionProfile('vscode'))
+    assert get_account_information_dictionary_profiled('abc', '2021-01-01', inst) == generic
+    assert passes == [len(inst.facts)]
+
+
+def test_select_profile_facts_profile_concepts(yield_xbrl_instance, empty_registry):
+    """test select_profile_facts function with a registered profile needing a concept outside PROFILE_CONCEPTS
+
+    Expected to select the facts of the profile's own concepts in the single pass, so the profile applies rather than
+    falling back to the generic extraction
+    """
+    inst = yield_xbrl_instance()
+    officers = ExtractionProfile('officers', concepts=('NameEntityOfficer', 'UKCompaniesHouseRegisteredNumber'),
+                                 required_concepts=('NameEntityOfficer',))
+
+    assert not any(f.concept.name == 'NameEntityOfficer' for f in select_profile_facts(inst)[0].facts)
+    register_profile('VsCode', officers)
+    selected, _ = select_profile_facts(inst)
+
+    assert len(officers.select_facts(selected).facts) == 3
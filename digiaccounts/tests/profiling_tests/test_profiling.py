@@ -0,0 +1,85 @@
+"""unit tests for digiaccounts_profiling functions"""
+
+import threading
+from os import path
+
+from xbrl.cache import HttpCache
+
+from digiaccounts.digiaccounts_io import XbrlParserDA
+from digiaccounts.digiaccounts_batch import extract_account_information
+from digiaccounts.digiaccounts_profiling import SamplingProfiler
+
+DATA = path.join('digiaccounts', 'tests', 'data')
+
+
+def read_examples():
+    """returns CH archive style sources of the two example files"""
+    sources = []
+    for n, example in enumerate(('example_happy.xhtml', 'example_unhappy.xhtml')):
+        with open(path.join(DATA, example), 'rb') as f:
+            sources.append((f'Prod223_0001_{n:08d}_20201231.html', f.read()))
+    return sources
+
+
+def test_sampling_profiler(tmp_path):
+    """test SamplingProfiler class
+
+    Expected to merge the profiles and allocations of every sampled document and write them out
+    """
+    parser = XbrlParserDA(HttpCache('./test_cache'))
+    profiler = SamplingProfiler(sample_rate=1.0)
+
+    results = [extract_account_information(parser, *source, profiler=profiler) for source in read_examples()]
+    profiler.dump(str(tmp_path / 'run'))
+
+    assert results == [extract_account_information(parser, *source) for source in read_examples()]
+    assert profiler.documents == profiler.sampled == 2
+    assert any(function == 'parse_ixbrl_tree' for _, _, function in profiler.stats.stats)
+    assert profiler.top_allocators()
+    assert (tmp_path / 'run.prof').exists()
+    assert (tmp_path / 'run.memory.txt').read_text().startswith('# top allocators over 2 of 2 documents')
+
+
+def test_sampling_profiler_unsampled():
+    """test SamplingProfiler class
+
+    Expected to run documents which are not sampled without profiling them
+    """
+    parser = XbrlParserDA(HttpCache('./test_cache'))
+    profiler = SamplingProfiler(sample_rate=0.0)
+
+    for source in read_examples():
+        extract_account_information(parser, *source, profiler=profiler)
+
+    assert profiler.documents == 2
+    assert profiler.sampled == 0
+    assert profiler.stats is None
+
+
+def test_sampling_profiler_concurrent(tmp_path):
+    """test SamplingProfiler class with documents in several threads
+
+    Expected to count every document, profile only one at a time, and flag the sample which ran alongside another
+    document in the memory report
+    """
+    profiler = SamplingProfiler(sample_rate=1.0)
+    sampling = threading.Event()
+    done = threading.Event()
+
+    def _sampled():
+        with profiler.profile():
+            sampling.set()
+            done.wait(timeout=10)
+
+    thread = threading.Thread(target=_sampled)
+    thread.start()
+    sampling.wait(timeout=10)
+    with profiler.profile():
+        pass
+    done.set()
+    thread.join()
+    profiler.dump(str(tmp_path / 'run'))
+
+    assert profiler.documents == 2
+    assert profiler.sampled == profiler.overlapped == 1
+    assert '# 1 samples include allocations of documents run concurrently' in (tmp_path / 'run.memory.txt').read_text()
@@ -0,0 +1,43 @@
+"""unit tests for digiaccounts_replay functions"""
+
+import json
+
+from digiaccounts.digiaccounts_io import ThreadSafeHttpCache, XbrlParserDA
+from digiaccounts.digiaccounts_batch import iter_account_information
+from digiaccounts.digiaccounts_replay import SlowFilingRecorder, format_replay, replay_corpus
+from digiaccounts import config as cfg
+
+
+def test_slow_filing_recorder():
+    """test SlowFilingRecorder class
+
+    Expected to keep only the slowest and largest documents, releasing the contents of the rest
+    """
+    recorder = SlowFilingRecorder(top_n=2)
+    recorder.record('slow.html', b'a', {cfg.TIMING_STAGE_XML_PARSE: 5.0})
+    recorder.record('large.html', b'a' * 100, {cfg.TIMING_STAGE_XML_PARSE: 0.1})
+    recorder.record('slower.html', b'a', {cfg.TIMING_STAGE_XML_PARSE: 3.0, cfg.TIMING_STAGE_TAXONOMY: 3.0})
+    recorder.record('small.html', b'', {cfg.TIMING_STAGE_XML_PARSE: 0.2})
+
+    assert [name for name, _, _ in recorder.filings()] == ['slower.html', 'slow.html', 'large.html']
+
+
+def test_capture_and_replay(tmp_path, yield_sources):
+    """test capture of a batch into a replay corpus and replay_corpus
+
+    Expected to record every stage for the kept documents, and replay them with fresh timings
+    """
+    parser = XbrlParserDA(ThreadSafeHttpCache('./test_cache'))
+    recorder = SlowFilingRecorder(top_n=2)
+    list(iter_account_information(yield_sources(6), parser, max_workers=2, recorder=recorder))
+
+    assert recorder.write_corpus(str(tmp_path)) <= 4
+    manifest = json.loads((tmp_path / cfg.REPLAY_MANIFEST).read_text())
+    stages = {cfg.TIMING_STAGE_TAXONOMY, cfg.TIMING_STAGE_XML_PARSE, cfg.TIMING_STAGE_FACT_BUILD,
+              cfg.TIMING_STAGE_EXTRACTION}
+    assert all(set(entry['timings']) == stages for entry in manifest.values())
+
+    results = replay_corpus(str(tmp_path), parser, repeat=2)
+    assert sorted(result['name'] for result in results) == sorted(manifest)
+    assert all(set(result['replayed']) == stages for result in results)
+    assert len(format_replay(results).splitlines()) == len(results) + 1
@@ -0,0 +1,106 @@
+"""unit tests for digiaccounts_rules functions"""
+
+from datetime import datetime
+
+from digiaccounts.digiaccounts_columnar import ACCOUNT_INFORMATION_SCHEMA_PENCE, to_masked_columns
+from digiaccounts.digiaccounts_rules import (
+    ComponentSumRule,
+    JumpRule,
+    OrderingRule,
+    SignRule,
+    DEFAULT_RULES,
+    evaluate_rules,
+    get_violating_rows,
+    summarise_rules
+)
+from digiaccounts import config as cfg
+
+ACCOUNTS = [
+    {
+        cfg.MONGO_KEY_START_DATE: datetime(2020, 1, 1), cfg.MONGO_KEY_END_DATE: datetime(2020, 12, 31),
+        cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT: 300.0, cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT: 100.0,
+        cfg.MONGO_KEY_INVESTMENT_ASSETS_CLOSING_CURRENT: 200.0, cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT: 5000.0,
+        cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS: 4000.0,
+    },
+    {
+        cfg.MONGO_KEY_START_DATE: datetime(2021, 1, 1), cfg.MONGO_KEY_END_DATE: datetime(2020, 12, 31),
+        cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT: 300.0, cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT: -100.0,
+        cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT: 500000.0, cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS: 4000.0,
+    },
+    {
+        cfg.MONGO_KEY_END_DATE: datetime(2020, 12, 31), cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT: 9000.0,
+        cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS: 0.0,
+    },
+]
+
+RULES = (
+    ComponentSumRule('tangible_sum', cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT, (
+        cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT, cfg.MONGO_KEY_INVESTMENT_ASSETS_CLOSING_CURRENT
+    )),
+    OrderingRule('period_order', cfg.MONGO_KEY_START_DATE, cfg.MONGO_KEY_END_DATE),
+    SignRule('plant_sign', cfg.MONGO_KEY_PLANT_EQUIPMENT_CLOSING_CURRENT),
+    JumpRule('turnover_jump', cfg.MONGO_KEY_TURNOVER_CLOSING_PREVIOUS, cfg.MONGO_KEY_TURNOVER_CLOSING_CURRENT),
+    SignRule('not_extracted_sign', 'not_extracted'),
+)
+
+
+def test_evaluate_rules():
+    """test evaluate_rules function
+
+    Expected to flag each violating record, masking records missing the values a rule needs and treating missing sum
+    components as zero
+    """
+    flags = evaluate_rules(to_masked_columns(ACCOUNTS), RULES)
+
+    assert flags['tangible_sum'].tolist() == [False, True, None]
+    assert flags['period_order'].tolist() == [False, True, None]
+    assert flags['plant_sign'].tolist() == [False, True, None]
+    assert flags['turnover_jump'].tolist() == [False, True, False]
+    assert flags['not_extracted_sign'].tolist() == [None, None, None]
+    assert get_violating_rows(flags).tolist() == [1]
+
+
+def test_summarise_rules():
+    """test summarise_rules function
+
+    Expected to count the records each rule was evaluated on and violated by
+    """
+    summary = summarise_rules(evaluate_rules(to_masked_columns(ACCOUNTS), RULES))
+
+    assert summary['turnover_jump'] == {'evaluated': 3, 'violations': 1, 'violation_rate': 1 / 3}
+    assert summary['not_extracted_sign'] == {'evaluated': 0, 'violations': 0, 'violation_rate': None}
+
+
+def test_default_rules():
+    """test evaluate_rules function with the default rules
+
+    Expected to evaluate every default rule without violations on a consistent record
+    """
+    flags = evaluate_rules(to_masked_columns(ACCOUNTS[:1]))
+
+    assert len(flags) > 10
+    assert get_violating_rows(flags).tolist() == []
+    assert not any(isinstance(rule, ComponentSumRule) for rule in DEFAULT_RULES)
+
+
+def test_evaluate_rules_pence():
+    """test evaluate_rules function over a table of values in pence
+
+    Expected to flag the same records as over the values in pounds, scaling the tolerances to pence
+    """
+    accounts = [
+        {key: value * 100 if isinstance(value, float) else value for key, value in account.items()}
+        for account in ACCOUNTS
+    ]
+    accounts[0][cfg.MONGO_KEY_TANGIBLE_ASSETS_CLOSING_CURRENT] += 50
+    table = to_masked_columns(accounts, schema=ACCOUNT_INFORMATION_SCHEMA_PENCE)
+
+    expected = evaluate_rules(to_masked_columns(ACCOUNTS), RULES)
+    flags = evaluate_rules(table, RULES, pence=True)
+    assert {name: value.tolist() for name, value in flags.items()} == {
+        name: value.tolist() for name, value in expected.items()
+    }
+
+    unscaled = evaluate_rules(table, RULES)
+    assert unscaled['tangible_sum'].tolist() == [True, True, None]
+    assert unscaled['turnover_jump'].tolist() == [False, True, True]
@@ -0,0 +1,58 @@
+"""fixtures for serving a stand-in taxonomy over a local HTTP server"""
+
+import zipfile
+import pytest
+
+
+ENTRY_SCHEMA = '''<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:link="http://www.xbrl.org/2003/linkbase"
+    xmlns:xlink="http://www.w3.org/1999/xlink" targetNamespace="http://example.org/entry">
+    <xsd:annotation>
+        <xsd:appinfo>
+            <link:linkbaseRef xlink:type="simple" xlink:href="entry-lab.xml"/>
+        </xsd:appinfo>
+    </xsd:annotation>
+    <xsd:import namespace="http://example.org/core" schemaLocation="../core/core.xsd"/>
+</xsd:schema>'''
+
+LABEL_LINKBASE = '''<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <link:labelLink xlink:type="extended">
+        <link:loc xlink:type="locator" xlink:href="../business/business.xsd#bus_Name" xlink:label="loc"/>
+    </link:labelLink>
+</link:linkbase>'''
+
+CORE_SCHEMA = '''<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" targetNamespace="http://example.org/core">
+    <xsd:import namespace="http://example.org/business" schemaLocation="../business/business.xsd"/>
+</xsd:schema>'''
+
+BUSINESS_SCHEMA = '''<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://example.org/business"/>'''
+
+FILING = '''<html xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+<ix:header><ix:references><link:schemaRef xlink:type="simple" xlink:href="{href}"></link:schemaRef></ix:references>
+</ix:header></html>'''
+
+
+@pytest.fixture(name='yield_taxonomy_server')
+def fixture_yield_taxonomy_server(tmp_path, yield_http_server):
+    """fixture serving a small taxonomy from a local HTTP server, yielding the server base URL and a CH archive of
+    filings which reference it"""
+    root = tmp_path / 'www'
+    for relative_path, contents in (
+        ('tax/entry/entry.xsd', ENTRY_SCHEMA),
+        ('tax/entry/entry-lab.xml', LABEL_LINKBASE),
+        ('tax/core/core.xsd', CORE_SCHEMA),
+        ('tax/business/business.xsd', BUSINESS_SCHEMA),
+    ):
+        (root / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative_path).write_text(contents)
+
+    base_url, _ = yield_http_server(root)
+
+    archive_path = tmp_path / 'Accounts_Bulk_Data.zip'
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        for n in range(3):
+            filing = FILING.format(href=f'{base_url}/tax/entry/entry.xsd')
+            archive.writestr(f'Prod223_0001_0000000{n}_20201231.html', filing)
+        archive.writestr('Prod223_0001_00000009_20201231.xml', '<xbrl/>')
+
+    yield base_url, str(archive_path)
@@ -0,0 +1,47 @@
+"""unit tests for digiaccounts_taxonomy functions"""
+
+import os
+
+from xbrl.cache import HttpCache
+
+from digiaccounts.digiaccounts_taxonomy import get_schema_ref, scan_schema_refs, warm_taxonomy_cache
+
+
+def test_get_schema_ref():
+    """test get_schema_ref function
+
+    Expected to return the schemaRef href from raw bytes, and None when no schemaRef is present
+    """
+    with open(os.path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml'), 'rb') as f:
+        contents = f.read()
+
+    assert get_schema_ref(contents) == 'https://xbrl.frc.org.uk/FRS-102/2014-09-01/FRS-102-2014-09-01.xsd'
+    assert get_schema_ref(b'<html><body></body></html>') is None
+
+
+def test_scan_schema_refs(yield_taxonomy_server):
+    """test scan_schema_refs function
+
+    Expected to return the single distinct schema referenced by every filing in the archive
+    """
+    base_url, archive_path = yield_taxonomy_server
+
+    assert scan_schema_refs([archive_path]) == {f'{base_url}/tax/entry/entry.xsd'}
+
+
+def test_warm_taxonomy_cache(tmp_path, yield_taxonomy_server):
+    """test warm_taxonomy_cache function
+
+    Expected to fetch the entry schema along with its imports, linkbases and locator targets into the cache directory
+    """
+    base_url, archive_path = yield_taxonomy_server
+    cache = HttpCache(str(tmp_path / 'cache'), delay=0)
+
+    cached, failed = warm_taxonomy_cache([archive_path], cache, max_workers=4)
+
+    expected = {f'{base_url}/tax/{p}' for p in (
+        'entry/entry.xsd', 'entry/entry-lab.xml', 'core/core.xsd', 'business/business.xsd'
+    )}
+    assert cached == expected
+    assert not failed
+    assert all(os.path.exists(cache.url_to_path(url)) for url in expected)
@@ -0,0 +1,168 @@
+"""unit tests for digiaccounts_triage functions"""
+
+from os import path
+from datetime import datetime
+
+from digiaccounts.digiaccounts_io import SkippingReader
+from digiaccounts.digiaccounts_triage import (
+    Quarantine,
+    prevalidate_ixbrl,
+    triage_ixbrl,
+    triage_ixbrl_file,
+    triage_ixbrl_stream
+)
+from digiaccounts.digiaccounts_data import get_dormant_state, get_startend_period
+from digiaccounts import config as cfg
+
+EXAMPLE_HAPPY = path.join('digiaccounts', 'tests', 'data', 'example_happy.xhtml')
+EXAMPLE_UNHAPPY = path.join('digiaccounts', 'tests', 'data', 'example_unhappy.xhtml')
+TEMPLATE = path.join('digiaccounts', 'tests', 'data', 'template.html')
+
+
+def test_triage_ixbrl_file():
+    """test triage_ixbrl_file function
+
+    Expected to return the registration, period, software and dormant state of example_happy.xhtml
+    """
+    assert triage_ixbrl_file(EXAMPLE_HAPPY) == {
+        'registration_number': '0000000000',
+        'period_opening_current': datetime(2020, 1, 1),
+        'period_closing_current': datetime(2020, 12, 31),
+        'accounting_software': 'VsCode',
+        'dormant_state': False,
+    }
+
+
+def test_triage_ixbrl_stops_reading():
+    """test triage_ixbrl function
+
+    Expected to stop reading once every triage value is found, so malformed content after the registration number is
+    never parsed
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    registration = '0000000000</ix:nonNumeric>'
+    contents = contents.replace(registration, registration + '<p><unclosed></p>', 1)
+    dormant = contents.replace('EntityDormantTruefalse', 'EntityDormant')
+
+    assert triage_ixbrl(dormant) == triage_ixbrl_file(EXAMPLE_HAPPY)
+    assert triage_ixbrl(contents)['registration_number'] == '0000000000'
+
+
+def test_triage_ixbrl_stream_flat_cost():
+    """test triage_ixbrl_stream function over documents with growing bodies
+
+    Expected to read and scan the same bytes of example_happy.xhtml, which has no EntityDormant fact to end the scan
+    early, however large its body is
+    """
+    with open(EXAMPLE_HAPPY, 'rb') as f:
+        contents = f.read()
+    paragraph = b'<p>Lorem ipsum <span>dolor</span> sit amet, consectetur adipiscing elit</p>\n'
+    scanned = []
+    for paragraphs in (10 ** 5, 10 ** 6):
+        document = contents.replace(b'</body>', paragraph * paragraphs + b'</body>', 1)
+        with SkippingReader(document, window=64 * 1024) as reader:
+            assert triage_ixbrl_stream(reader, max_bytes=256 * 1024) == triage_ixbrl(contents)
+            scanned.append((reader._position, reader._scanned))
+
+    assert scanned[0] == scanned[1]
+    assert scanned[0][1] < 1024 * 1024
+
+
+def test_triage_ixbrl_matches_extraction(yield_xbrl_parser):
+    """test triage_ixbrl function against the full extraction
+
+    Expected to apply fact formats and give EntityDormant precedence over EntityDormantTruefalse, returning the same
+    period and dormant state as get_startend_period and get_dormant_state
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    contents = contents.replace('format="ixt:datelonguk"\n                    name="business:StartDate',
+                                'format="ixt2:datedaymonthyear"\n                    name="business:StartDate', 1)
+    contents = contents.replace('>01 January 2020<', '>01/02/2020<', 1)
+    dormant = '<ix:nonNumeric contextRef="END_2020" name="business:EntityDormantTruefalse">false</ix:nonNumeric>'
+    formatted = contents.replace(dormant, dormant.replace('name=', 'format="ixt2:booleantrue" name=').replace(
+        '>false<', '>Dormant<'), 1)
+    overridden = contents.replace(dormant, dormant + dormant.replace('Truefalse', '').replace('false<', 'true<'), 1)
+
+    for document in (formatted, overridden):
+        triage = triage_ixbrl(document)
+        xbrl_instance = yield_xbrl_parser.parse_string_instance(document)
+        start, end = get_startend_period(xbrl_instance)
+
+        assert triage['period_opening_current'] == start == datetime(2020, 2, 1)
+        assert triage['period_closing_current'] == end
+        assert triage['dormant_state'] is get_dormant_state(xbrl_instance) is True
+
+
+def test_triage_ixbrl_malformed(tmp_path):
+    """test triage_ixbrl and triage_ixbrl_file functions with malformed and empty documents
+
+    Expected to return the values found before an XML error, and no values for an empty file
+    """
+    with open(EXAMPLE_HAPPY, 'r', encoding='utf-8') as f:
+        contents = f.read()
+    end_date = '31 December 2020</ix:nonNumeric>'
+    contents = contents.replace(end_date, end_date + '&nbsp;', 1)
+    empty = tmp_path / 'empty.html'
+    empty.write_bytes(b'')
+
+    triage = triage_ixbrl(contents)
+
+    assert triage['period_closing_current'] == datetime(2020, 12, 31)
+    assert triage['accounting_software'] is None
+    assert triage_ixbrl_file(str(empty)) == dict.fromkeys(triage)
+
+
+def test_unhappy_triage_ixbrl():
+    """test triage_ixbrl function in unhappy path
+
+    Expected to return None for the dormant state missing from example_unhappy.xhtml
+    """
+    with open(EXAMPLE_UNHAPPY, 'rb') as f:
+        triage = triage_ixbrl(f.read(), max_facts=0)
+
+    assert triage['dormant_state'] is None
+
+
+def test_prevalidate_ixbrl():
+    """test prevalidate_ixbrl function
+
+    Expected to pass the example files as bytes or strings, and give the reason code of the first missing marker for
+    empty, HTML only and truncated files
+    """
+    with open(EXAMPLE_HAPPY, 'rb') as f:
+        contents = f.read()
+    with open(TEMPLATE, 'rb') as f:
+        template = f.read()
+
+    assert prevalidate_ixbrl(contents) is None
+    assert prevalidate_ixbrl(contents.decode('utf-8')) is None
+    assert prevalidate_ixbrl(b'') == cfg.PREVALIDATION_EMPTY
+    assert prevalidate_ixbrl(' \n') == cfg.PREVALIDATION_EMPTY
+    assert prevalidate_ixbrl(b'<html><body>Accounts</body></html>') == cfg.PREVALIDATION_NO_IX_NAMESPACE
+    assert prevalidate_ixbrl(template) == cfg.PREVALIDATION_NO_IX_NAMESPACE
+    assert prevalidate_ixbrl(contents.replace(b'schemaRef', b'schema')) == cfg.PREVALIDATION_NO_SCHEMA_REF
+    assert prevalidate_ixbrl(contents[:contents.index(b'<ix:resources')]) == cfg.PREVALIDATION_NO_RESOURCES
+
+
+def test_quarantine(tmp_path):
+    """test Quarantine class
+
+    Expected to pass valid files, and keep and write the names and reason codes of the files which fail
+    """
+    with open(EXAMPLE_HAPPY, 'rb') as f:
+        contents = f.read()
+    quarantine = Quarantine()
+
+    assert quarantine.check('happy.html', contents)
+    assert not quarantine.check('empty.html', b'')
+    assert not quarantine.check('legacy.html', b'<html></html>')
+    assert not quarantine.check('other.html', b'<html></html>')
+    quarantine.write(str(tmp_path / 'quarantine.csv'))
+
+    assert len(quarantine) == 3
+    assert quarantine.counts() == {cfg.PREVALIDATION_EMPTY: 1, cfg.PREVALIDATION_NO_IX_NAMESPACE: 2}
+    assert (tmp_path / 'quarantine.csv').read_text().splitlines() == [
+        'empty.html,empty', 'legacy.html,no_ix_namespace', 'other.html,no_ix_namespace'
+    ]
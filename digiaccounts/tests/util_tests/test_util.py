@@ -1,10 +1,14 @@
 """unit tests for digiaccounts utility functions"""
 
+import pytest
+
 from digiaccounts.digiaccounts_util import (
     check_unit_gbp,
     check_instant_date,
     check_name_is_string,
-    check_string_in_name
+    check_string_in_name,
+    split_postcode,
+    to_pence
 )
 
 
@@ -80,3 +84,41 @@ def test_check_string_in_name(yield_xbrl_instance):
             assert check_string_in_name(coh1_fact_partial_name, fact)
         elif fact.xml_id == 'dir1':
             assert not check_string_in_name(coh1_fact_partial_name, fact)
+
+
+@pytest.mark.parametrize('postcode, expected', [
+    ('cf14 3uz', ('CF14', '3UZ', 'CF', 'CF14')),
+    (' EC1A  1bb ', ('EC1A', '1BB', 'EC', 'EC1')),
+    ('B11AA', ('B1', '1AA', 'B', 'B1')),
+    ('12345', None),
+    ('', None),
+    (None, None),
+])
+def test_split_postcode(postcode, expected):
+    """unit test for split_postcode.
+
+    Success:
+        assert postcodes are normalised and split whatever their case and spacing
+        assert malformed and missing postcodes return None
+    """
+    assert split_postcode(postcode) == expected
+
+
+@pytest.mark.parametrize('value, decimals, expected', [
+    (0.1 + 0.2, None, 30),
+    (1234.56, 2, 123456),
+    (1234.5, -2, 120000),
+    (2.5, 0, 200),
+    (12.345, 3, 1234),
+    (-75000.0, -3, -7500000),
+    (None, 0, None),
+    ('text', 0, 'text'),
+])
+def test_to_pence(value, decimals, expected):
+    """unit test for to_pence.
+
+    Success:
+        assert values are rounded to their decimals precision, half to even, and returned as exact int pence
+        assert values which are not numbers are returned unchanged
+    """
+    assert to_pence(value, decimals) == expected
@@ -0,0 +1,121 @@
+"""unit tests for digiaccounts_validation functions"""
+
+import csv
+
+import numpy as np
+
+from digiaccounts.digiaccounts_columnar import ColumnarWriter, read_columnar
+from digiaccounts.digiaccounts_validation import (
+    join_tables,
+    read_reference_csv,
+    validate_extractions,
+    write_mismatches
+)
+from digiaccounts import config as cfg
+
+SCHEMA = {
+    '_id': 'U',
+    cfg.MONGO_KEY_ENTITY_REGISTRATION: 'U',
+    cfg.MONGO_KEY_END_DATE: 'datetime64[D]',
+    cfg.MONGO_KEY_DORMANT_STATE: 'bool',
+    cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: 'float64',
+}
+
+EXTRACTED = [
+    {'_id': 'a', cfg.MONGO_KEY_ENTITY_REGISTRATION: '00000001', cfg.MONGO_KEY_END_DATE: '2020-12-31',
+     cfg.MONGO_KEY_DORMANT_STATE: False, cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: 100.0},
+    {'_id': 'b', cfg.MONGO_KEY_ENTITY_REGISTRATION: '00000002', cfg.MONGO_KEY_END_DATE: '2020-12-31',
+     cfg.MONGO_KEY_DORMANT_STATE: True, cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: 250.0},
+    {'_id': 'c', cfg.MONGO_KEY_ENTITY_REGISTRATION: '00000002', cfg.MONGO_KEY_END_DATE: '2020-12-31',
+     cfg.MONGO_KEY_DORMANT_STATE: True, cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: 200.2},
+    {'_id': 'd', cfg.MONGO_KEY_ENTITY_REGISTRATION: '00000003', cfg.MONGO_KEY_END_DATE: '2021-03-31',
+     cfg.MONGO_KEY_DORMANT_STATE: False},
+    {'_id': 'e', cfg.MONGO_KEY_ENTITY_REGISTRATION: None, cfg.MONGO_KEY_END_DATE: '2021-03-31'},
+]
+
+REFERENCE = (
+    f'{cfg.MONGO_KEY_ENTITY_REGISTRATION},{cfg.MONGO_KEY_END_DATE},{cfg.MONGO_KEY_DORMANT_STATE},'
+    f'{cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT}\n'
+    '00000001,2020-12-31,false,"1,000"\n'
+    ' 00000002 ,2020-12-31T00:00:00,true,200\n'
+    '00000003,2021-03-31,true,5\n'
+    '00000004,2021-03-31,,\n'
+)
+
+
+def write_tables(directory):
+    """writes the extracted table and reference CSV into a directory and returns them read back"""
+    with ColumnarWriter(str(directory / 'extracted'), SCHEMA) as writer:
+        writer.extend({**row, cfg.MONGO_KEY_END_DATE: np.datetime64(row[cfg.MONGO_KEY_END_DATE])} for row in EXTRACTED)
+    (directory / 'reference.csv').write_text(REFERENCE)
+    return read_reference_csv(str(directory / 'reference.csv')), read_columnar(str(directory / 'extracted'))
+
+
+def test_join_tables(tmp_path):
+    """test join_tables function
+
+    Expected to join reference rows to the last extracted row with the same registration and period end, skipping
+    rows with missing keys
+    """
+    reference, extracted = write_tables(tmp_path)
+
+    reference_rows, extracted_rows, unmatched = join_tables(reference, extracted)
+
+    assert reference_rows.tolist() == [0, 1, 2]
+    assert extracted_rows.tolist() == [0, 2, 3]
+    assert unmatched.tolist() == [3]
+
+
+def test_validate_extractions(tmp_path):
+    """test validate_extractions and write_mismatches functions
+
+    Expected to count matches within tolerance, mismatches, missing values and unextracted reference rows per field,
+    and write one CSV row per mismatch
+    """
+    reference, extracted = write_tables(tmp_path)
+
+    summary, mismatches = validate_extractions(reference, extracted)
+    written = write_mismatches(mismatches, str(tmp_path / 'mismatches.csv'))
+    with open(tmp_path / 'mismatches.csv', newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    assert summary['joined_rows'] == 3
+    assert summary['not_extracted_rows'] == 1
+    equity = summary['fields'][cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT]
+    assert (equity['compared'], equity['match'], equity['mismatch'], equity['missing']) == (3, 1, 1, 1)
+    assert equity['max_abs_difference'] == 900.0
+    dormant = summary['fields'][cfg.MONGO_KEY_DORMANT_STATE]
+    assert (dormant['compared'], dormant['match'], dormant['mismatch']) == (3, 2, 1)
+    assert dormant['match_rate'] == 2 / 3
+    assert written == 4
+    assert rows[1] == {
+        'registration': '00000001', 'end_date': '2020-12-31', '_id': 'a', 'field': cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT,
+        'status': cfg.VALIDATION_STATUS_MISMATCH, 'expected': '1000.0', 'extracted': '100.0', 'difference': '-900.00'
+    }
+    assert rows[-1]['status'] == cfg.VALIDATION_STATUS_NOT_EXTRACTED
+
+
+def test_validate_extractions_pence(tmp_path):
+    """test read_reference_csv and validate_extractions functions for a table of values in pence
+
+    Expected to read reference pounds as pence and give the same match counts as the table in pounds, scaling the
+    absolute tolerance of monetary fields to pence
+    """
+    schema = SCHEMA | {cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: 'int64'}
+    with ColumnarWriter(str(tmp_path / 'extracted'), schema) as writer:
+        writer.extend({
+            **row, cfg.MONGO_KEY_END_DATE: np.datetime64(row[cfg.MONGO_KEY_END_DATE]),
+            cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT: round(row[cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT] * 100)
+            if cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT in row else None,
+        } for row in EXTRACTED)
+    (tmp_path / 'reference.csv').write_text(REFERENCE)
+    reference = read_reference_csv(str(tmp_path / 'reference.csv'), pence=True)
+    extracted = read_columnar(str(tmp_path / 'extracted'))
+
+    assert reference[cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT].tolist() == [100000, 20000, 500, None]
+    summary, _ = validate_extractions(reference, extracted, pence=True)
+    equity = summary['fields'][cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT]
+    assert (equity['match'], equity['mismatch'], equity['missing']) == (1, 1, 1)
+    assert equity['max_abs_difference'] == 90000.0
+    summary, _ = validate_extractions(reference, extracted)
+    assert summary['fields'][cfg.MONGO_KEY_EQUITY_CLOSING_CURRENT]['mismatch'] == 2
@@ -15,12 +15,16 @@ setup(
     description='An automated tool for extracting key facts from Companies House (UK) digital accounts files',
     long_description=long_description,
     packages=['digiaccounts'],
+    entry_points={
+        'console_scripts': ['digiaccounts=digiaccounts.digiaccounts_cli:main'],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
     ],
     install_requires=[
+        'numpy',
         'oracledb',
         'py_xbrl',
         'pymongo==4.3.3',